@@ -1,7 +1,25 @@
 # File: backend/profiles/admin.py
 # -------------------------------
 from django.contrib import admin
-from .models import BusinessProfile, GalleryImage
+from django.db.models import F, Q
+from .models import REQUIRED_FIELDS, MISSING_FIELD_BITS, AdminBoundary, BusinessProfile, GalleryImage
+from .search import get_search_settings, search_profiles
+
+
+class MissingFieldFilter(admin.SimpleListFilter):
+    """Profiles missing a given required field (a bit of missing_fields)"""
+    title = 'missing field'
+    parameter_name = 'missing'
+
+    def lookups(self, request, model_admin):
+        return REQUIRED_FIELDS
+
+    def queryset(self, request, queryset):
+        bit = MISSING_FIELD_BITS.get(self.value())
+        if bit is None:
+            return queryset
+        return queryset.alias(missing_bit=F('missing_fields').bitand(bit)).filter(missing_bit=bit)
+
 
 @admin.register(BusinessProfile)
 class BusinessProfileAdmin(admin.ModelAdmin):
@@ -11,11 +29,15 @@ class BusinessProfileAdmin(admin.ModelAdmin):
         'business_email',
         'business_phone',
         'city',
+        'completion_percentage',
         'created_at'
     ]
-    list_filter = ['created_at', 'state']
-    readonly_fields = ['created_at', 'updated_at']
+    list_filter = ['created_at', 'state', 'geocode_status', 'is_complete', MissingFieldFilter]
+    # __str__ reads user.username
+    list_select_related = ['user']
+    readonly_fields = ['is_complete', 'completion_percentage', 'created_at', 'updated_at']
     search_fields = ['business_name', 'business_email', 'city']
+    search_help_text = 'Searches name, services, certifications and location; exact email match.'
     fieldsets = (
         ('Business Information', {
             'fields': ('business_name', 'business_email', 'business_phone')
@@ -33,15 +55,39 @@ class BusinessProfileAdmin(admin.ModelAdmin):
             )
         }),
         ('Metadata', {
-            'fields': ('created_at', 'updated_at'),
+            'fields': ('is_complete', 'completion_percentage', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         })
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        """Use the full-text index instead of icontains scans over search_fields"""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        ids = [
+            profile_id for profile_id, _ in
+            search_profiles(search_term, limit=get_search_settings()['MAX_RESULTS'], active_only=False)
+        ]
+        return queryset.filter(Q(pk__in=ids) | Q(business_email__iexact=search_term)), False
+
 @admin.register(GalleryImage)
 class GalleryImageAdmin(admin.ModelAdmin):
     """Admin interface for gallery images"""
-    list_display = ['profile', 'caption', 'created_at']
-    list_filter = ['created_at']
+    list_display = ['profile', 'caption', 'width', 'height', 'variants_status', 'created_at']
+    # The profile column renders str(profile), which reads profile.user
+    list_select_related = ['profile__user']
+    list_filter = ['created_at', 'variants_status']
+    readonly_fields = ['width', 'height', 'variants_status']
+    exclude = ['variants']
     search_fields = ['caption']
     raw_id_fields = ['profile']
+
+@admin.register(AdminBoundary)
+class AdminBoundaryAdmin(admin.ModelAdmin):
+    """Admin interface for town/county/state outlines (load with load_service_boundaries)"""
+    list_display = ['name', 'kind', 'state', 'updated_at']
+    list_filter = ['kind', 'state']
+    search_fields = ['name']
+    exclude = ['geometry']
+    readonly_fields = ['min_lat', 'min_lng', 'max_lat', 'max_lng', 'updated_at']
@@ -0,0 +1,147 @@
+# File: backend/profiles/availability.py
+# Weekly availability compiled to 15-minute slot bitmaps (AvailabilityIndex),
+# so availability searches are bitwise tests in SQL
+
+import logging
+import re
+
+from django.db.models import F, Q
+
+from .models import AvailabilityIndex, BusinessProfile
+
+logger = logging.getLogger(__name__)
+
+# Profile fields the index is built from
+AVAILABILITY_FIELDS = ('availability_schedule',)
+
+DAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES    # 96
+SLOTS_PER_COLUMN = SLOTS_PER_DAY // 2      # 48, AM and PM columns per day
+
+TIME_PATTERN = re.compile(r'^(\d{1,2}):(\d{2})(?::\d{2})?$')
+
+
+def slot_columns():
+    return [f'{day}_{half}' for day in DAYS for half in ('am', 'pm')]
+
+
+def parse_time(value):
+    """Minutes since midnight for 'HH:MM' (or 'HH:MM:SS', '24:00'); raises ValueError"""
+    match = TIME_PATTERN.match(str(value).strip()) if value is not None else None
+    if match is None:
+        raise ValueError(f'Invalid time: {value!r}')
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    if minutes >= 60 or hours > 24 or (hours == 24 and minutes):
+        raise ValueError(f'Invalid time: {value!r}')
+    return hours * 60 + minutes
+
+
+def _add_slots(bitmaps, day_index, first_slot, last_slot):
+    """Set slots [first_slot, last_slot) of a day, continuing into the next day"""
+    slot = first_slot
+    while slot < last_slot:
+        day = DAYS[(day_index + slot // SLOTS_PER_DAY) % len(DAYS)]
+        day_slot = slot % SLOTS_PER_DAY
+        half = 'am' if day_slot < SLOTS_PER_COLUMN else 'pm'
+        bitmaps[f'{day}_{half}'] |= 1 << (day_slot % SLOTS_PER_COLUMN)
+        slot += 1
+
+
+def _window_slots(start, end, covering=False):
+    """
+    (first, last) slots of start-end in minutes: the slots wholly inside it
+    (a schedule offers no partial slots), or with covering=True every slot
+    it touches (a search needs all of them). An end at or before the start
+    runs past midnight.
+    """
+    if end <= start:
+        end += 24 * 60
+    if covering:
+        return start // SLOT_MINUTES, -(-end // SLOT_MINUTES)
+    return -(-start // SLOT_MINUTES), end // SLOT_MINUTES
+
+
+def compile_schedule(schedule):
+    """{column: bitmap} for an availability_schedule dict"""
+    bitmaps = dict.fromkeys(slot_columns(), 0)
+    for day, hours in (schedule or {}).items():
+        if day not in DAYS or not isinstance(hours, dict) or not hours.get('enabled'):
+            continue
+        try:
+            start = parse_time(hours.get('start_time'))
+            end = parse_time(hours.get('end_time'))
+        except ValueError as e:
+            logger.warning(f'Skipping availability for {day}: {e}')
+            continue
+        _add_slots(bitmaps, DAYS.index(day), *_window_slots(start, end))
+    return bitmaps
+
+
+def index_availability(profile):
+    """Bring a profile's AvailabilityIndex up to date; returns True if written"""
+    bitmaps = compile_schedule(profile.availability_schedule)
+    current = AvailabilityIndex.objects.filter(profile_id=profile.pk).values(*bitmaps).first()
+    if not any(bitmaps.values()):
+        if current is None:
+            return False
+        AvailabilityIndex.objects.filter(profile_id=profile.pk).delete()
+        return True
+    if current == bitmaps:
+        return False
+    AvailabilityIndex.objects.update_or_create(profile_id=profile.pk, defaults=bitmaps)
+    return True
+
+
+def rebuild_availability_index(queryset=None):
+    """Index many profiles; returns (checked, updated)"""
+    if queryset is None:
+        queryset = BusinessProfile.objects.all()
+    queryset = queryset.only('id', *AVAILABILITY_FIELDS).order_by('pk')
+
+    checked = updated = 0
+    for profile in queryset.iterator(chunk_size=500):
+        checked += 1
+        updated += index_availability(profile)
+    return checked, updated
+
+
+# Queries
+
+def window_masks(day, start=None, end=None):
+    """
+    {column: mask} a profile's bitmaps must contain to be available on day
+    from start to end ('HH:MM'; one slot when end is None, the whole day
+    when start is None). Raises ValueError for unknown days or bad times.
+    """
+    day = day.lower()
+    if day not in DAYS:
+        raise ValueError(f'Invalid day: {day}')
+    if start is None:
+        start, end = 0, 24 * 60
+    else:
+        start = parse_time(start)
+        end = start + 1 if end is None else parse_time(end)
+    first_slot, last_slot = _window_slots(start, end, covering=True)
+    bitmaps = dict.fromkeys(slot_columns(), 0)
+    _add_slots(bitmaps, DAYS.index(day), first_slot, last_slot)
+    return {column: mask for column, mask in bitmaps.items() if mask}
+
+
+def available_profile_ids(day, start=None, end=None):
+    """
+    Searchable profiles' ids free for the whole window, or with no start
+    for any slot that day; the test is (column & mask) = mask per column,
+    or (column & mask) != 0 for some column, evaluated by the database
+    """
+    masks = window_masks(day, start, end)
+    aliases = {f'{column}_free': F(column).bitand(mask) for column, mask in masks.items()}
+    if start is None:
+        condition = Q()
+        for column in masks:
+            condition |= Q(**{f'{column}_free__gt': 0})
+    else:
+        condition = Q(**{f'{column}_free': mask for column, mask in masks.items()})
+    return AvailabilityIndex.objects.filter(
+        profile__is_active=True, profile__is_complete=True
+    ).alias(**aliases).filter(condition).values('profile_id')
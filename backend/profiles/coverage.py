@@ -0,0 +1,166 @@
+# File: backend/profiles/coverage.py
+# Materialize each profile's service area as a geometry plus bounding box,
+# recomputed only when the fields it is derived from change
+
+import hashlib
+import json
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .geo import (
+    cells_for_box, circle_polygon, geometry_bbox, point_in_geometry, spatial_backend
+)
+from .models import AdminBoundary, BusinessProfile, CoverageCell, ServiceCoverage
+
+logger = logging.getLogger(__name__)
+
+# Profile fields a coverage is built from
+COVERAGE_FIELDS = (
+    'service_area_type', 'latitude', 'longitude', 'service_radius',
+    'city', 'state', 'zip_code', 'service_area_polygon',
+)
+
+
+def _fingerprint_value(value):
+    # Coordinates assigned in code and read back from the DB must hash the same
+    if isinstance(value, (Decimal, float)):
+        return round(float(value), 6)
+    return value
+
+
+def coverage_fingerprint(profile):
+    data = {field: _fingerprint_value(getattr(profile, field)) for field in COVERAGE_FIELDS}
+    encoded = json.dumps(data, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _location(profile):
+    if profile.latitude is None or profile.longitude is None:
+        return None
+    return float(profile.latitude), float(profile.longitude)
+
+
+def find_boundary(profile, kind):
+    """AdminBoundary of the given kind for a profile's address, or None"""
+    boundaries = AdminBoundary.objects.filter(kind=kind)
+
+    if kind == 'state' and profile.state:
+        match = boundaries.filter(
+            Q(state__iexact=profile.state) | Q(name__iexact=profile.state)
+        ).first()
+        if match:
+            return match
+
+    if kind == 'town' and profile.city:
+        match = boundaries.filter(name__iexact=profile.city, state__iexact=profile.state).first()
+        if match:
+            return match
+
+    # Counties, or names that didn't match: the outline containing the address
+    location = _location(profile)
+    if location is None:
+        return None
+    lat, lng = location
+    containing = boundaries.filter(
+        min_lat__lte=lat, max_lat__gte=lat, min_lng__lte=lng, max_lng__gte=lng
+    )
+    for boundary in containing:
+        if point_in_geometry(lat, lng, boundary.geometry):
+            return boundary
+    return None
+
+
+def resolve_coverage(profile):
+    """
+    (kind, geometry, boundary) describing a profile's service area, or None
+    if it can't be placed. Areas that can't be resolved fall back to radius.
+    """
+    area = profile.service_area_type
+
+    if area == 'custom_draw' and profile.service_area_polygon:
+        return 'custom_draw', profile.service_area_polygon, None
+
+    if area in ('town', 'county', 'state'):
+        boundary = find_boundary(profile, area)
+        if boundary is not None:
+            return area, None, boundary
+        logger.info(f'No {area} boundary for profile {profile.pk}, using radius coverage')
+
+    location = _location(profile)
+    if location is None or not profile.service_radius:
+        return None
+    return 'radius', circle_polygon(*location, profile.service_radius), None
+
+
+def materialize_coverage(profile, force=False):
+    """
+    Bring a profile's ServiceCoverage up to date.
+    Returns True if anything was written.
+    """
+    fingerprint = coverage_fingerprint(profile)
+    if not force:
+        if hasattr(profile, 'current_fingerprint'):
+            current = profile.current_fingerprint
+        else:
+            current = ServiceCoverage.objects.filter(profile_id=profile.pk).values_list(
+                'fingerprint', flat=True
+            ).first()
+        if current == fingerprint:
+            return False
+
+    resolved = resolve_coverage(profile)
+    use_grid = spatial_backend() == 'grid'
+
+    with transaction.atomic():
+        if use_grid:
+            CoverageCell.objects.filter(profile_id=profile.pk).delete()
+
+        if resolved is None:
+            ServiceCoverage.objects.filter(profile_id=profile.pk).delete()
+            return True
+
+        kind, geometry, boundary = resolved
+        if boundary is not None:
+            bbox = (boundary.min_lat, boundary.min_lng, boundary.max_lat, boundary.max_lng)
+        else:
+            bbox = geometry_bbox(geometry)
+
+        ServiceCoverage.objects.update_or_create(
+            profile_id=profile.pk,
+            defaults={
+                'kind': kind,
+                'geometry': geometry,
+                'boundary': boundary,
+                'min_lat': bbox[0],
+                'min_lng': bbox[1],
+                'max_lat': bbox[2],
+                'max_lng': bbox[3],
+                'fingerprint': fingerprint,
+            }
+        )
+
+        if use_grid:
+            CoverageCell.objects.bulk_create(
+                [CoverageCell(profile_id=profile.pk, cell=cell) for cell in cells_for_box(*bbox)]
+            )
+    return True
+
+
+def rebuild_coverage(queryset=None, force=False):
+    """Materialize coverage for many profiles; returns (checked, updated)"""
+    if queryset is None:
+        queryset = BusinessProfile.objects.all()
+    # Join the stored fingerprint so unchanged profiles cost no extra query
+    queryset = queryset.only('id', *COVERAGE_FIELDS).annotate(
+        current_fingerprint=F('coverage__fingerprint')
+    ).order_by('pk')
+
+    checked = updated = 0
+    for profile in queryset.iterator(chunk_size=1000):
+        checked += 1
+        if materialize_coverage(profile, force=force):
+            updated += 1
+    return checked, updated
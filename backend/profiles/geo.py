@@ -0,0 +1,277 @@
+# File: backend/profiles/geo.py
+# Service-area search - which profiles cover a point. Each profile's coverage
+# geometry is materialized with a bounding box (profiles.coverage); an R-tree
+# over those boxes finds candidates and an exact test on that small set
+# decides the rest.
+
+import logging
+import math
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, ExpressionWrapper, F, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+GEO_SEARCH_DEFAULTS = {
+    'CELL_DEGREES': 0.5,      # Grid cell edge for the fallback index
+    'CIRCLE_VERTICES': 48,    # Vertices used to draw radius coverage
+    'MAX_POLYGON_VERTICES': 5000,
+    'MAX_CANDIDATES': 5000,   # Nearest bounding-box hits tested exactly per search
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 100,
+}
+
+# Cell ids pack (row, col) into one integer
+CELL_ROW_FACTOR = 100000
+
+# Bounding boxes are indexed with SQLite's R*Tree module or a GiST index over
+# a PostgreSQL box; other databases fall back to grid cells (CoverageCell)
+RTREE_TABLE = 'profiles_servicecoverage_rtree'
+GIST_INDEX = 'profiles_servicecoverage_bbox_gist'
+COVERAGE_BOX_SQL = 'box(point("min_lng", "min_lat"), point("max_lng", "max_lat"))'
+
+
+def get_geo_settings():
+    conf = dict(GEO_SEARCH_DEFAULTS)
+    conf.update(getattr(settings, 'GEO_SEARCH', {}))
+    return conf
+
+
+# Geometry helpers. Geometries are GeoJSON Polygon / MultiPolygon dicts with
+# [lng, lat] positions.
+
+def haversine_miles(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def circle_polygon(lat, lng, radius_miles, vertices=None):
+    """Polygon approximating a geodesic circle"""
+    vertices = vertices or get_geo_settings()['CIRCLE_VERTICES']
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    angular = radius_miles / EARTH_RADIUS_MILES
+    ring = []
+    for step in range(vertices):
+        bearing = 2 * math.pi * step / vertices
+        lat2 = math.asin(
+            math.sin(lat1) * math.cos(angular)
+            + math.cos(lat1) * math.sin(angular) * math.cos(bearing)
+        )
+        lng2 = lng1 + math.atan2(
+            math.sin(bearing) * math.sin(angular) * math.cos(lat1),
+            math.cos(angular) - math.sin(lat1) * math.sin(lat2)
+        )
+        ring.append([round(math.degrees(lng2), 6), round(math.degrees(lat2), 6)])
+    ring.append(ring[0])
+    return {'type': 'Polygon', 'coordinates': [ring]}
+
+
+def _polygons(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    return geometry['coordinates']
+
+
+def geometry_bbox(geometry):
+    """(min_lat, min_lng, max_lat, max_lng) of a geometry's outer rings"""
+    lngs = []
+    lats = []
+    for polygon in _polygons(geometry):
+        for lng, lat in polygon[0]:
+            lngs.append(lng)
+            lats.append(lat)
+    return min(lats), min(lngs), max(lats), max(lngs)
+
+
+def _in_ring(lat, lng, ring):
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > lat) != (yj > lat):
+            if lng < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+                inside = not inside
+        j = i
+    return inside
+
+
+def point_in_geometry(lat, lng, geometry):
+    """Even-odd test; holes (inner rings) are excluded"""
+    for polygon in _polygons(geometry):
+        if _in_ring(lat, lng, polygon[0]) and not any(
+            _in_ring(lat, lng, hole) for hole in polygon[1:]
+        ):
+            return True
+    return False
+
+
+def validate_area_geometry(value, max_vertices=None):
+    """
+    Check a GeoJSON Polygon/MultiPolygon; raises ValueError.
+    max_vertices defaults to MAX_POLYGON_VERTICES, 0 disables the limit.
+    """
+    if max_vertices is None:
+        max_vertices = get_geo_settings()['MAX_POLYGON_VERTICES']
+    if not isinstance(value, dict) or value.get('type') not in ('Polygon', 'MultiPolygon'):
+        raise ValueError('Service area must be a GeoJSON Polygon or MultiPolygon')
+
+    coordinates = value.get('coordinates')
+    polygons = [coordinates] if value['type'] == 'Polygon' else coordinates
+    if not isinstance(polygons, list) or not polygons:
+        raise ValueError('Service area has no coordinates')
+
+    vertices = 0
+    for polygon in polygons:
+        if not isinstance(polygon, list) or not polygon:
+            raise ValueError('Each polygon needs at least one ring')
+        for ring in polygon:
+            if not isinstance(ring, list) or len(ring) < 4 or ring[0] != ring[-1]:
+                raise ValueError('Each ring needs at least 4 positions and must be closed')
+            for position in ring:
+                if (not isinstance(position, list) or len(position) < 2
+                        or not all(isinstance(c, (int, float)) for c in position[:2])):
+                    raise ValueError('Positions must be [longitude, latitude] numbers')
+                if not (-180 <= position[0] <= 180 and -90 <= position[1] <= 90):
+                    raise ValueError('Position out of range')
+            vertices += len(ring)
+
+    if max_vertices and vertices > max_vertices:
+        raise ValueError('Service area has too many vertices')
+    return value
+
+
+# Grid cells (fallback index)
+
+def _row_col(lat, lng, size):
+    return int((lat + 90.0) // size), int((lng + 180.0) // size)
+
+
+def cell_for(lat, lng, size=None):
+    size = size or get_geo_settings()['CELL_DEGREES']
+    row, col = _row_col(lat, lng, size)
+    return row * CELL_ROW_FACTOR + col
+
+
+def cells_for_box(min_lat, min_lng, max_lat, max_lng, size=None):
+    """Every grid cell a bounding box touches"""
+    size = size or get_geo_settings()['CELL_DEGREES']
+    row_lo, col_lo = _row_col(min_lat, min_lng, size)
+    row_hi, col_hi = _row_col(max_lat, max_lng, size)
+    return [
+        row * CELL_ROW_FACTOR + col
+        for row in range(row_lo, row_hi + 1)
+        for col in range(col_lo, col_hi + 1)
+    ]
+
+
+# Spatial index
+
+_spatial_backend = {}
+
+
+def spatial_backend():
+    """'rtree' (SQLite R*Tree), 'gist' (PostgreSQL box index) or 'grid'"""
+    alias = connection.alias
+    if alias not in _spatial_backend:
+        backend = 'grid'
+        if connection.vendor == 'postgresql':
+            backend = 'gist'
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [RTREE_TABLE]
+                )
+                if cursor.fetchone():
+                    backend = 'rtree'
+        _spatial_backend[alias] = backend
+    return _spatial_backend[alias]
+
+
+def filter_by_point(queryset, lat, lng):
+    """Restrict a ServiceCoverage queryset to boxes containing the point"""
+    backend = spatial_backend()
+    if backend == 'gist':
+        return queryset.filter(RawSQL(
+            f'{COVERAGE_BOX_SQL} && box(point(%s, %s), point(%s, %s))',
+            (lng, lat, lng, lat), output_field=BooleanField()
+        ))
+    if backend == 'rtree':
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT id FROM {RTREE_TABLE} '
+            f'WHERE min_lng <= %s AND max_lng >= %s AND min_lat <= %s AND max_lat >= %s',
+            (lng, lng, lat, lat)
+        ))
+    return queryset.filter(profile__coverage_cells__cell=cell_for(lat, lng))
+
+
+def covering_profiles(lat, lng):
+    """
+    Ids of searchable profiles whose coverage contains (lat, lng), as a list
+    of (profile_id, distance_miles) nearest first. Only the MAX_CANDIDATES
+    nearest bounding-box hits are tested, and each boundary or drawn shape
+    is loaded and tested once, however many profiles share it.
+    """
+    from .models import AdminBoundary, ServiceCoverage
+
+    max_candidates = get_geo_settings()['MAX_CANDIDATES']
+    # Squared equirectangular distance: cheap in SQL and ranks like the
+    # real one, so the cap drops the farthest candidates, not the newest
+    d_lat = Cast('profile__latitude', FloatField()) - Value(lat)
+    d_lng = (Cast('profile__longitude', FloatField()) - Value(lng)) * Value(math.cos(math.radians(lat)))
+    candidates = list(filter_by_point(
+        ServiceCoverage.objects.filter(
+            profile__is_active=True, profile__is_complete=True
+        ),
+        lat, lng
+    ).annotate(
+        approx_distance=ExpressionWrapper(d_lat * d_lat + d_lng * d_lng, output_field=FloatField())
+    ).order_by(F('approx_distance').asc(nulls_last=True), 'profile_id').values_list(
+        'profile_id', 'kind', 'boundary_id',
+        'profile__latitude', 'profile__longitude', 'profile__service_radius',
+    )[:max_candidates])
+    if len(candidates) == max_candidates:
+        logger.warning(f'Coverage search at ({lat}, {lng}) hit MAX_CANDIDATES ({max_candidates})')
+
+    # Radius rows are decided by distance, so only boundaries and drawn
+    # polygons need their geometry
+    boundary_ids = {row[2] for row in candidates if row[2] is not None}
+    drawn_ids = [row[0] for row in candidates if row[1] != 'radius' and row[2] is None]
+    boundaries = dict(
+        AdminBoundary.objects.filter(pk__in=boundary_ids).values_list('pk', 'geometry')
+    ) if boundary_ids else {}
+    drawn = dict(
+        ServiceCoverage.objects.filter(pk__in=drawn_ids).values_list('pk', 'geometry')
+    ) if drawn_ids else {}
+
+    boundary_covers = {}
+    matches = []
+    for profile_id, kind, boundary_id, p_lat, p_lng, radius in candidates:
+        distance = (
+            haversine_miles(lat, lng, float(p_lat), float(p_lng))
+            if p_lat is not None and p_lng is not None else None
+        )
+        if kind == 'radius':
+            covered = distance is not None and distance <= radius
+        elif boundary_id is not None:
+            if boundary_id not in boundary_covers:
+                shape = boundaries.get(boundary_id)
+                boundary_covers[boundary_id] = shape is not None and point_in_geometry(lat, lng, shape)
+            covered = boundary_covers[boundary_id]
+        else:
+            shape = drawn.get(profile_id)
+            covered = shape is not None and point_in_geometry(lat, lng, shape)
+        if covered:
+            matches.append((profile_id, distance))
+
+    matches.sort(key=lambda match: (match[1] is None, match[1] or 0, match[0]))
+    return matches
@@ -0,0 +1,361 @@
+# File: backend/profiles/geocoding.py
+# Address geocoding - saves only enqueue (profile.geocode_status), the
+# geocode_profiles worker resolves pending profiles in batches, one lookup per
+# distinct address, through a persistent on-disk cache
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Avg
+from django.utils.module_loading import import_string
+
+from .coverage import COVERAGE_FIELDS, materialize_coverage
+from .models import BusinessProfile, ZipCentroid
+
+logger = logging.getLogger(__name__)
+
+GEOCODING_DEFAULTS = {
+    'PROVIDER': 'profiles.geocoding.ZipCentroidProvider',
+    'CACHE_PATH': os.path.join(settings.BASE_DIR, 'geocode_cache.sqlite3'),  # None disables
+    'NEGATIVE_TTL': 86400,     # Seconds an address the provider couldn't find stays cached
+    'BATCH_SIZE': 200,         # Pending profiles per worker batch
+    'POLL_INTERVAL': 30,       # Worker sleep when nothing is pending
+}
+
+# Fields an address key is built from (address_line2 doesn't move the point)
+ADDRESS_FIELDS = ('address_line1', 'city', 'state', 'zip_code')
+
+
+def get_geocoding_settings():
+    conf = dict(GEOCODING_DEFAULTS)
+    conf.update(getattr(settings, 'GEOCODING', {}))
+    return conf
+
+
+def _normalize(value):
+    return re.sub(r'[^a-z0-9]+', ' ', str(value or '').lower()).strip()
+
+
+def zip5(value):
+    digits = re.sub(r'\D', '', str(value or ''))
+    return digits[:5] if len(digits) >= 5 else ''
+
+
+def address_key(profile):
+    """Normalized address; '' when there is nothing to geocode"""
+    parts = [
+        _normalize(profile.address_line1),
+        _normalize(profile.city),
+        _normalize(profile.state),
+        zip5(profile.zip_code),
+    ]
+    if not any(parts[1:]):
+        return ''
+    return '|'.join(parts)
+
+
+# Providers
+
+class GeocodingProvider:
+    """
+    Base class for providers. geocode_batch() receives profiles with unique
+    cache_key()s and returns {cache_key: (lat, lng) or None}.
+    """
+    name = 'base'
+
+    def cache_key(self, profile):
+        """Addresses with equal keys share one lookup and one cache entry"""
+        return address_key(profile)
+
+    def geocode_batch(self, profiles):
+        raise NotImplementedError
+
+
+class ZipCentroidProvider(GeocodingProvider):
+    """
+    Offline provider - the centroid of the profile's ZIP code, or of all
+    ZIP codes in its city when the ZIP is missing or unknown.
+    """
+    name = 'zip'
+
+    def cache_key(self, profile):
+        code = zip5(profile.zip_code)
+        city = _normalize(profile.city)
+        state = _normalize(profile.state)
+        if not code and not (city and state):
+            return ''
+        return f'{code}|{city}|{state}'
+
+    def geocode_batch(self, profiles):
+        codes = {zip5(profile.zip_code) for profile in profiles} - {''}
+        centroids = {
+            zip_code: (float(lat), float(lng))
+            for zip_code, lat, lng in ZipCentroid.objects.filter(zip_code__in=codes).values_list(
+                'zip_code', 'latitude', 'longitude'
+            )
+        } if codes else {}
+
+        results = {}
+        for profile in profiles:
+            key = self.cache_key(profile)
+            location = centroids.get(zip5(profile.zip_code))
+            if location is None and profile.city and profile.state:
+                center = ZipCentroid.objects.filter(
+                    city__iexact=profile.city.strip(), state__iexact=profile.state.strip()
+                ).aggregate(lat=Avg('latitude'), lng=Avg('longitude'))
+                if center['lat'] is not None:
+                    location = (float(center['lat']), float(center['lng']))
+            results[key] = location
+        return results
+
+
+_provider = None
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        _provider = import_string(get_geocoding_settings()['PROVIDER'])()
+    return _provider
+
+
+# Cache
+
+class GeocodeCache:
+    """
+    Persistent key -> (lat, lng) store in a local SQLite file, shared by web
+    and worker processes. Misses are stored too and expire after NEGATIVE_TTL.
+    """
+    CHUNK = 500  # Stay under SQLite's bound-parameter limit
+
+    def __init__(self, path, negative_ttl):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS geocode '
+                '(key TEXT PRIMARY KEY, lat REAL, lng REAL, stored_at REAL NOT NULL)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get_many(self, keys):
+        """{key: (lat, lng) or None} for keys with a fresh entry"""
+        keys = list(keys)
+        found = {}
+        expired_before = time.time() - self.negative_ttl
+        connection = self._connection()
+        for start in range(0, len(keys), self.CHUNK):
+            chunk = keys[start:start + self.CHUNK]
+            rows = connection.execute(
+                f'SELECT key, lat, lng, stored_at FROM geocode '
+                f'WHERE key IN ({",".join("?" * len(chunk))})',
+                chunk
+            )
+            for key, lat, lng, stored_at in rows:
+                if lat is None:
+                    if stored_at >= expired_before:
+                        found[key] = None
+                else:
+                    found[key] = (lat, lng)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key, False)
+
+    def set_many(self, results):
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO geocode (key, lat, lng, stored_at) VALUES (?, ?, ?, ?)',
+                [
+                    (key, *(location if location else (None, None)), now)
+                    for key, location in results.items()
+                ]
+            )
+
+    def clear_misses(self):
+        connection = self._connection()
+        with connection:
+            return connection.execute('DELETE FROM geocode WHERE lat IS NULL').rowcount
+
+
+class _NullCache:
+    def get_many(self, keys):
+        return {}
+
+    def get(self, key):
+        return False
+
+    def set_many(self, results):
+        pass
+
+    def clear_misses(self):
+        return 0
+
+
+_cache = None
+
+
+def get_geocode_cache():
+    global _cache
+    if _cache is None:
+        conf = get_geocoding_settings()
+        if conf['CACHE_PATH']:
+            _cache = GeocodeCache(conf['CACHE_PATH'], conf['NEGATIVE_TTL'])
+        else:
+            _cache = _NullCache()
+    return _cache
+
+
+def _cache_key(provider, profile):
+    key = provider.cache_key(profile)
+    return f'{provider.name}:{key}' if key else ''
+
+
+# Pipeline
+
+def _coordinates(lat, lng):
+    if lat is None or lng is None:
+        return None
+    return round(float(lat), 6), round(float(lng), 6)
+
+
+def prepare_profile(profile):
+    """
+    Called before a profile is saved. Resolves the address from the cache
+    when possible, otherwise marks the profile pending for the worker.
+    Coordinates sent by the client along with a new address are kept.
+    """
+    key = address_key(profile)
+    if key == profile.geocoded_address:
+        return
+
+    if profile.latitude is not None and profile.longitude is not None:
+        previous = None
+        if not profile._state.adding:
+            previous = BusinessProfile.objects.filter(pk=profile.pk).values_list(
+                'latitude', 'longitude'
+            ).first()
+        if previous is None or _coordinates(*previous) != _coordinates(profile.latitude, profile.longitude):
+            profile.geocode_status = 'done'
+            profile.geocoded_address = key
+            return
+
+    profile.geocode_status = 'pending'
+    if not key:
+        return
+    try:
+        cache_key = _cache_key(get_provider(), profile)
+        location = get_geocode_cache().get(cache_key) if cache_key else False
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f'Geocode cache unavailable: {e}')
+        return
+    if location:
+        profile.latitude, profile.longitude = (round(value, 6) for value in location)
+        profile.geocode_status = 'done'
+        profile.geocoded_address = key
+
+
+def _apply(profile, key, location):
+    """Store a result unless the address changed while it was being looked up"""
+    updates = {'geocoded_address': key}
+    if location:
+        lat, lng = (round(value, 6) for value in location)
+        updates.update(latitude=lat, longitude=lng, geocode_status='done')
+    else:
+        updates['geocode_status'] = 'failed'
+
+    current = {field: getattr(profile, field) for field in ADDRESS_FIELDS}
+    updated = BusinessProfile.objects.filter(
+        pk=profile.pk, geocode_status='pending', **current
+    ).update(**updates)
+    if updated and location:
+        # update() skips post_save, so refresh search coverage here
+        for field, value in updates.items():
+            setattr(profile, field, value)
+        materialize_coverage(profile)
+    return bool(updated)
+
+
+def geocode_pending(batch_size=None):
+    """
+    Geocode one batch of pending profiles.
+    Returns (geocoded, cached, failed): cached counts profiles answered
+    from the cache without a provider call.
+    """
+    conf = get_geocoding_settings()
+    profiles = list(
+        BusinessProfile.objects.filter(geocode_status='pending')
+        .only('id', *ADDRESS_FIELDS, *COVERAGE_FIELDS)
+        .order_by('updated_at')[:batch_size or conf['BATCH_SIZE']]
+    )
+    if not profiles:
+        return 0, 0, 0
+
+    provider = get_provider()
+    cache = get_geocode_cache()
+
+    # One lookup per distinct address in the batch
+    groups = {}
+    for profile in profiles:
+        groups.setdefault(_cache_key(provider, profile), []).append(profile)
+    unplaceable = groups.pop('', [])
+
+    results = cache.get_many(groups.keys())
+    cached_keys = set(results)
+    misses = [members[0] for key, members in groups.items() if key not in results]
+    if misses:
+        try:
+            found = provider.geocode_batch(misses)
+        except Exception as e:
+            # Leave the batch pending; the next pass retries it
+            logger.error(f'Geocoding provider {provider.name} failed: {e}')
+            return 0, 0, 0
+        fresh = {_cache_key(provider, profile): found.get(provider.cache_key(profile)) for profile in misses}
+        cache.set_many(fresh)
+        results.update(fresh)
+
+    geocoded = cached = failed = 0
+    for profile in unplaceable:
+        if _apply(profile, address_key(profile), None):
+            failed += 1
+    for key, members in groups.items():
+        location = results.get(key)
+        for profile in members:
+            if not _apply(profile, address_key(profile), location):
+                continue
+            if not location:
+                failed += 1
+            elif key in cached_keys:
+                cached += 1
+            else:
+                geocoded += 1
+
+    logger.info(
+        f'Geocoding batch: {geocoded} geocoded, {cached} from cache, {failed} not found '
+        f'({len(misses)} provider lookups for {len(profiles)} profiles)'
+    )
+    return geocoded, cached, failed
+
+
+def retry_failed():
+    """Re-queue profiles whose address wasn't found, e.g. after loading new data"""
+    get_geocode_cache().clear_misses()
+    return BusinessProfile.objects.filter(geocode_status='failed').update(geocode_status='pending')
@@ -0,0 +1,272 @@
+# File: backend/profiles/images.py
+# Resized image variants (thumb/card/full, WebP and JPEG, metadata stripped)
+# for gallery images, logos and profile photos - saves only mark images
+# pending, the process_images worker renders them in batches
+
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from .models import BusinessProfile, GalleryImage
+from .storage import media_storage
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANTS_DEFAULTS = {
+    'SIZES': {                # Variant name -> longest edge in pixels (never upscaled)
+        'thumb': 200,
+        'card': 600,
+        'full': 1600,
+    },
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 82,
+    'DIRECTORY': 'variants',  # Storage prefix the variants are written under
+    'BATCH_SIZE': 50,         # Pending images per worker batch
+    'POLL_INTERVAL': 10,      # Worker sleep when nothing is pending
+}
+
+# BusinessProfile image fields that get variants
+PROFILE_IMAGE_FIELDS = ('business_logo', 'profile_photo')
+
+_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+ORIENTATION_TAG = 0x0112
+
+
+def get_image_settings():
+    conf = dict(IMAGE_VARIANTS_DEFAULTS)
+    conf.update(getattr(settings, 'IMAGE_VARIANTS', {}))
+    return conf
+
+
+def _formats(conf):
+    return [
+        image_format for image_format in conf['FORMATS']
+        if image_format != 'webp' or features.check('webp')
+    ]
+
+
+# Rendering
+
+def _encode(image, image_format, quality):
+    buffer = BytesIO()
+    if image_format == 'jpeg':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+        image.save(buffer, 'WEBP', quality=quality, method=4)
+    # Nothing is passed as exif/icc_profile, so no metadata is carried over
+    return buffer.getvalue()
+
+
+def _variant_name(conf, source, size, image_format):
+    stem = os.path.splitext(source)[0]
+    return f'{conf["DIRECTORY"]}/{stem}_{size}.{_EXTENSIONS[image_format]}'
+
+
+def variant_names(source):
+    """Names the variants of source are stored under with the current settings"""
+    conf = get_image_settings()
+    return [
+        _variant_name(conf, source, size, image_format)
+        for size in conf['SIZES'] for image_format in _EXTENSIONS
+    ]
+
+
+def delete_variants(source):
+    for name in variant_names(source):
+        default_storage.delete(name)
+
+
+def render_variants(source):
+    """
+    Write the variants of a stored image (variants go to the default
+    storage, named after the source); returns the entry kept in the
+    database: {'source', 'width', 'height', 'sizes': {size: {'width',
+    'height', <format>: storage name}}}. Raises ValueError for files that
+    aren't usable images.
+    """
+    conf = get_image_settings()
+    formats = _formats(conf)
+    largest = max(conf['SIZES'].values())
+
+    try:
+        with media_storage().open(source, 'rb') as fh:
+            with Image.open(fh) as original:
+                width, height = original.size
+                if original.getexif().get(ORIENTATION_TAG) in (5, 6, 7, 8):
+                    width, height = height, width
+                # JPEG decodes straight to a reduced scale when that's big enough
+                original.draft('RGB', (largest, largest))
+                image = ImageOps.exif_transpose(original)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+        raise ValueError(f'{source}: {e}')
+
+    sizes = {}
+    for size, edge in sorted(conf['SIZES'].items(), key=lambda item: -item[1]):
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+        entry = {'width': resized.width, 'height': resized.height}
+        for image_format in formats:
+            name = _variant_name(conf, source, size, image_format)
+            # Replace in place; storage.save would pick a new name instead
+            default_storage.delete(name)
+            entry[image_format] = default_storage.save(
+                name, ContentFile(_encode(resized, image_format, conf['QUALITY']))
+            )
+        sizes[size] = entry
+        # Each smaller size is resized from the previous one
+        image = resized
+
+    return {'source': source, 'width': width, 'height': height, 'sizes': sizes}
+
+
+def variant_urls(entry, source, request=None):
+    """
+    {size: {'width', 'height', <format>: url}} for an entry, or None when
+    it isn't for the current file (source) yet
+    """
+    if not entry or not source or entry.get('source') != source:
+        return None
+    urls = {}
+    for size, variant in entry.get('sizes', {}).items():
+        urls[size] = {'width': variant['width'], 'height': variant['height']}
+        for image_format in _EXTENSIONS:
+            if image_format in variant:
+                url = default_storage.url(variant[image_format])
+                urls[size][image_format] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+# Queue
+
+def prepare_gallery_image(image):
+    """Called before a gallery image is saved: queue a new or replaced file"""
+    if (image.variants or {}).get('source') != (image.image.name or ''):
+        image.variants_status = 'pending'
+
+
+def prepare_profile_images(profile):
+    """Called before a profile is saved: queue a new or replaced logo/photo"""
+    stored = profile.image_variants or {}
+    for field in PROFILE_IMAGE_FIELDS:
+        name = getattr(profile, field).name or ''
+        if (stored.get(field) or {}).get('source', '') != name:
+            profile.image_variants_status = 'pending'
+            return
+
+
+def _process_gallery_image(image):
+    """Status written ('done' or 'failed'), None if the image changed meanwhile"""
+    source = image.image.name
+    updates = {'variants_status': 'failed'}
+    # Content-addressed sources are shared by identical uploads
+    entry = GalleryImage.objects.filter(image=source, variants_status='done').exclude(
+        pk=image.pk
+    ).values_list('variants', flat=True).first() if source else None
+    if entry and entry.get('source') == source:
+        updates = {
+            'variants': entry,
+            'width': entry['width'],
+            'height': entry['height'],
+            'variants_status': 'done',
+        }
+    elif source:
+        try:
+            entry = render_variants(source)
+        except ValueError as e:
+            logger.warning(f'Gallery image {image.pk}: {e}')
+        else:
+            updates = {
+                'variants': entry,
+                'width': entry['width'],
+                'height': entry['height'],
+                'variants_status': 'done',
+            }
+    # Skip the write if the image was replaced while rendering
+    updated = GalleryImage.objects.filter(
+        pk=image.pk, image=source, variants_status='pending'
+    ).update(**updates)
+    return updates['variants_status'] if updated else None
+
+
+def _process_profile(profile):
+    """Like _process_gallery_image, for a profile's logo and photo"""
+    entries = {}
+    failed = False
+    for field in PROFILE_IMAGE_FIELDS:
+        source = getattr(profile, field).name
+        if not source:
+            continue
+        try:
+            entries[field] = render_variants(source)
+        except ValueError as e:
+            logger.warning(f'Profile {profile.pk} {field}: {e}')
+            entries[field] = {'source': source, 'sizes': {}}
+            failed = True
+
+    status = 'failed' if failed else 'done'
+    current = {field: getattr(profile, field).name for field in PROFILE_IMAGE_FIELDS}
+    updated = BusinessProfile.objects.filter(
+        pk=profile.pk, image_variants_status='pending', **current
+    ).update(image_variants=entries, image_variants_status=status)
+    return status if updated else None
+
+
+def process_pending_images(batch_size=None):
+    """
+    Render one batch of pending gallery images and profile logos/photos.
+    Returns (processed, failed).
+    """
+    batch_size = batch_size or get_image_settings()['BATCH_SIZE']
+    processed = failed = 0
+
+    pending = [
+        (_process_gallery_image, GalleryImage.objects.filter(variants_status='pending').only('id', 'image')),
+        (_process_profile, BusinessProfile.objects.filter(image_variants_status='pending').only(
+            'id', *PROFILE_IMAGE_FIELDS
+        )),
+    ]
+    for process, queryset in pending:
+        for instance in queryset.order_by('pk')[:batch_size - processed]:
+            status = process(instance)
+            if status is not None:
+                processed += 1
+                failed += status == 'failed'
+        if processed >= batch_size:
+            break
+
+    if processed:
+        logger.info(f'Image variants: {processed} images processed, {failed} failed')
+    return processed, failed
+
+
+def retry_failed():
+    """Re-queue images that couldn't be rendered"""
+    return (
+        GalleryImage.objects.filter(variants_status='failed').update(variants_status='pending') +
+        BusinessProfile.objects.filter(image_variants_status='failed').update(image_variants_status='pending')
+    )
+
+
+def requeue_all():
+    """Re-render everything, e.g. after changing IMAGE_VARIANTS['SIZES']"""
+    return (
+        GalleryImage.objects.update(variants_status='pending') +
+        BusinessProfile.objects.filter(
+            Q(business_logo__gt='') | Q(profile_photo__gt='')
+        ).update(image_variants_status='pending')
+    )
@@ -0,0 +1,82 @@
+# File: backend/profiles/management/commands/collect_media.py
+# Delete profile images no gallery image, logo or photo references any more
+
+from django.core.management.base import BaseCommand, CommandError
+from profiles.media import collect_garbage, get_media_gc_settings
+from profiles.orphans import collect_orphans, purge_quarantine
+
+
+class Command(BaseCommand):
+    help = 'Delete unreferenced profile image files (MediaBlob.ref_count = 0) and their variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-period',
+            type=int,
+            default=None,
+            help='Seconds a file must have been unreferenced (default: MEDIA_GC["GRACE_PERIOD"])'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Files per batch (default: MEDIA_GC["BATCH_SIZE"])'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be deleted without deleting anything'
+        )
+        parser.add_argument(
+            '--orphans',
+            action='store_true',
+            help='Also scan the image directories for files no row or MediaBlob refers to'
+        )
+        parser.add_argument(
+            '--quarantine',
+            action='store_true',
+            help='Move orphans to MEDIA_GC["QUARANTINE_DIR"] instead of deleting them'
+        )
+        parser.add_argument(
+            '--purge-quarantine',
+            action='store_true',
+            help='Delete quarantined files older than MEDIA_GC["QUARANTINE_DAYS"]'
+        )
+
+    def handle(self, *args, **options):
+        conf = get_media_gc_settings()
+        dry_run = options['dry_run']
+        batch_size = options['batch_size'] or conf['BATCH_SIZE']
+        prefix = 'DRY RUN: ' if dry_run else ''
+        if options['quarantine'] and not options['orphans']:
+            raise CommandError('--quarantine applies to --orphans')
+
+        files, size = collect_garbage(
+            dry_run=dry_run,
+            grace_period=options['grace_period'],
+            batch_size=batch_size,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'{prefix}{files} unreferenced files, {size / (1024 * 1024):.1f} MB')
+        )
+
+        if options['orphans']:
+            try:
+                files, size = collect_orphans(
+                    dry_run=dry_run,
+                    quarantine=options['quarantine'],
+                    grace_period=options['grace_period'],
+                    batch_size=batch_size,
+                )
+            except NotImplementedError:
+                raise CommandError('--quarantine needs storage with local paths')
+            action = 'quarantined' if options['quarantine'] else 'orphaned'
+            self.stdout.write(
+                self.style.SUCCESS(f'{prefix}{files} {action} files, {size / (1024 * 1024):.1f} MB')
+            )
+
+        if options['purge_quarantine']:
+            files, size = purge_quarantine(dry_run=dry_run)
+            self.stdout.write(
+                self.style.SUCCESS(f'{prefix}{files} quarantined files purged, {size / (1024 * 1024):.1f} MB')
+            )
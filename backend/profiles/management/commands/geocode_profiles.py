@@ -0,0 +1,72 @@
+# File: backend/profiles/management/commands/geocode_profiles.py
+# Drain the profile geocoding queue
+
+import time
+
+from django.core.management.base import BaseCommand
+from profiles.geocoding import geocode_pending, get_geocoding_settings, retry_failed
+
+
+class Command(BaseCommand):
+    help = 'Geocode pending profile addresses in batches, one lookup per distinct address'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Profiles per batch (default: GEOCODING["BATCH_SIZE"])'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll for newly saved profiles'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Seconds to sleep when nothing is pending (default: GEOCODING["POLL_INTERVAL"])'
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Re-queue addresses that were not found (e.g. after load_zip_centroids)'
+        )
+
+    def handle(self, *args, **options):
+        conf = get_geocoding_settings()
+        batch_size = options['batch_size'] or conf['BATCH_SIZE']
+        interval = options['interval'] or conf['POLL_INTERVAL']
+
+        if options['retry_failed']:
+            self.stdout.write(f'Re-queued {retry_failed()} profiles')
+
+        total_geocoded = total_cached = total_failed = 0
+        try:
+            while True:
+                geocoded, cached, failed = geocode_pending(batch_size)
+                total_geocoded += geocoded
+                total_cached += cached
+                total_failed += failed
+
+                done = geocoded + cached + failed
+                if done:
+                    self.stdout.write(
+                        f'Batch: {geocoded} geocoded, {cached} from cache, {failed} not found'
+                    )
+                    # Full batch means there is likely more waiting
+                    if done >= batch_size:
+                        continue
+
+                if not options['loop']:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping geocoding worker...')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Geocoded: {total_geocoded}, From cache: {total_cached}, Not found: {total_failed}'
+            )
+        )
@@ -0,0 +1,106 @@
+# File: backend/profiles/management/commands/load_service_boundaries.py
+# Load town/county/state outlines from a local GeoJSON file
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from profiles.coverage import rebuild_coverage
+from profiles.geo import geometry_bbox, validate_area_geometry
+from profiles.models import AdminBoundary, BusinessProfile
+
+
+class Command(BaseCommand):
+    help = (
+        'Load AdminBoundary outlines from a GeoJSON FeatureCollection '
+        '(convert shapefiles first, e.g. ogr2ogr -f GeoJSON -t_srs EPSG:4326 out.geojson in.shp)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='GeoJSON FeatureCollection file')
+        parser.add_argument(
+            '--kind',
+            required=True,
+            choices=[choice for choice, _ in AdminBoundary.KIND_CHOICES],
+            help='Kind of boundary in the file'
+        )
+        parser.add_argument(
+            '--name-property',
+            default='NAME',
+            help='Feature property holding the boundary name (default: NAME)'
+        )
+        parser.add_argument(
+            '--state-property',
+            default='STATE',
+            help='Feature property holding the state (default: STATE)'
+        )
+        parser.add_argument(
+            '--state',
+            help='State for every feature, instead of --state-property'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without saving anything'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8') as fh:
+                collection = json.load(fh)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read {options["path"]}: {e}')
+
+        if collection.get('type') != 'FeatureCollection':
+            raise CommandError('Expected a GeoJSON FeatureCollection')
+
+        kind = options['kind']
+        loaded = skipped = 0
+
+        with transaction.atomic():
+            for feature in collection.get('features', []):
+                properties = feature.get('properties') or {}
+                name = str(properties.get(options['name_property']) or '').strip()
+                state = options['state'] or str(properties.get(options['state_property']) or '').strip()
+                geometry = feature.get('geometry')
+
+                try:
+                    validate_area_geometry(geometry, max_vertices=0)
+                except ValueError as e:
+                    self.stdout.write(self.style.WARNING(f'Skipping "{name}": {e}'))
+                    skipped += 1
+                    continue
+                if not name:
+                    skipped += 1
+                    continue
+
+                min_lat, min_lng, max_lat, max_lng = geometry_bbox(geometry)
+                if not options['dry_run']:
+                    AdminBoundary.objects.update_or_create(
+                        kind=kind, state=state[:50], name=name[:100],
+                        defaults={
+                            'geometry': geometry,
+                            'min_lat': min_lat,
+                            'min_lng': min_lng,
+                            'max_lat': max_lat,
+                            'max_lng': max_lng,
+                        }
+                    )
+                loaded += 1
+
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.SUCCESS(f'DRY RUN: {loaded} boundaries valid, {skipped} skipped')
+            )
+            return
+
+        # Boundaries changed under existing coverage, so recompute regardless of fingerprints
+        checked, updated = rebuild_coverage(
+            BusinessProfile.objects.filter(service_area_type=kind), force=True
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Loaded {loaded} {kind} boundaries ({skipped} skipped); '
+                f'recomputed coverage for {updated} of {checked} profiles'
+            )
+        )
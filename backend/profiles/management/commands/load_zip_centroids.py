@@ -0,0 +1,86 @@
+# File: backend/profiles/management/commands/load_zip_centroids.py
+# Load ZIP code centroids for the offline geocoder
+
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from profiles.geocoding import zip5
+from profiles.models import ZipCentroid
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        'Load ZipCentroid rows from a CSV/TSV file, e.g. the Census ZCTA gazetteer '
+        '(GEOID, INTPTLAT, INTPTLONG)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Delimited text file with a header row')
+        parser.add_argument('--zip-column', default='GEOID', help='ZIP code column (default: GEOID)')
+        parser.add_argument('--lat-column', default='INTPTLAT', help='Latitude column (default: INTPTLAT)')
+        parser.add_argument('--lng-column', default='INTPTLONG', help='Longitude column (default: INTPTLONG)')
+        parser.add_argument('--city-column', help='Optional city column, enables city fallback')
+        parser.add_argument('--state-column', help='Optional state column, enables city fallback')
+
+    def _save(self, rows):
+        ZipCentroid.objects.bulk_create(
+            list(rows.values()),
+            update_conflicts=True,
+            unique_fields=['zip_code'],
+            update_fields=['latitude', 'longitude', 'city', 'state'],
+        )
+
+    def handle(self, *args, **options):
+        try:
+            fh = open(options['path'], encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f'Could not read {options["path"]}: {e}')
+
+        loaded = skipped = 0
+        with fh:
+            dialect = csv.Sniffer().sniff(fh.read(4096), delimiters=',\t|;')
+            fh.seek(0)
+            reader = csv.DictReader(fh, dialect=dialect)
+            # Gazetteer headers carry trailing whitespace
+            reader.fieldnames = [name.strip() for name in reader.fieldnames or []]
+            for column in ('zip_column', 'lat_column', 'lng_column'):
+                if options[column] not in reader.fieldnames:
+                    raise CommandError(f'Column "{options[column]}" not found in {reader.fieldnames}')
+
+            # Keyed by ZIP: an upsert can't touch the same row twice
+            batch = {}
+            for row in reader:
+                code = zip5(row[options['zip_column']])
+                try:
+                    lat = round(float(row[options['lat_column']]), 6)
+                    lng = round(float(row[options['lng_column']]), 6)
+                except (TypeError, ValueError):
+                    skipped += 1
+                    continue
+                if not code or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                    skipped += 1
+                    continue
+
+                batch[code] = ZipCentroid(
+                    zip_code=code,
+                    latitude=lat,
+                    longitude=lng,
+                    city=(row.get(options['city_column']) or '').strip()[:100] if options['city_column'] else '',
+                    state=(row.get(options['state_column']) or '').strip()[:50] if options['state_column'] else '',
+                )
+                if len(batch) >= BATCH_SIZE:
+                    self._save(batch)
+                    loaded += len(batch)
+                    batch = {}
+            if batch:
+                self._save(batch)
+                loaded += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Loaded {loaded} ZIP centroids ({skipped} skipped). '
+                f'Run `manage.py geocode_profiles --retry-failed` to place profiles that were not found.'
+            )
+        )
@@ -0,0 +1,73 @@
+# File: backend/profiles/management/commands/process_images.py
+# Render resized variants of uploaded gallery images, logos and profile photos
+
+import time
+
+from django.core.management.base import BaseCommand
+from profiles.images import get_image_settings, process_pending_images, requeue_all, retry_failed
+
+
+class Command(BaseCommand):
+    help = 'Render thumb/card/full variants of pending images in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Images per batch (default: IMAGE_VARIANTS["BATCH_SIZE"])'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll for new uploads'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Seconds to sleep when nothing is pending (default: IMAGE_VARIANTS["POLL_INTERVAL"])'
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Re-queue images that could not be rendered'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-render every image (after changing IMAGE_VARIANTS["SIZES"] or FORMATS)'
+        )
+
+    def handle(self, *args, **options):
+        conf = get_image_settings()
+        batch_size = options['batch_size'] or conf['BATCH_SIZE']
+        interval = options['interval'] or conf['POLL_INTERVAL']
+
+        if options['all']:
+            self.stdout.write(f'Re-queued {requeue_all()} images')
+        elif options['retry_failed']:
+            self.stdout.write(f'Re-queued {retry_failed()} images')
+
+        total_processed = total_failed = 0
+        try:
+            while True:
+                processed, failed = process_pending_images(batch_size)
+                total_processed += processed
+                total_failed += failed
+
+                if processed:
+                    self.stdout.write(f'Batch: {processed} processed, {failed} failed')
+                    # Full batch means there is likely more waiting
+                    if processed >= batch_size:
+                        continue
+
+                if not options['loop']:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping image worker...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Processed: {total_processed}, Failed: {total_failed}')
+        )
@@ -0,0 +1,16 @@
+# File: backend/profiles/management/commands/rebuild_availability_index.py
+# Recompile availability schedules into the slot bitmap index
+
+from django.core.management.base import BaseCommand
+from profiles.availability import rebuild_availability_index
+from profiles.models import BusinessProfile
+
+
+class Command(BaseCommand):
+    help = 'Rebuild availability slot bitmaps (after bulk imports or raw SQL updates)'
+
+    def handle(self, *args, **options):
+        checked, updated = rebuild_availability_index(BusinessProfile.objects.all())
+        self.stdout.write(
+            self.style.SUCCESS(f'Availability index rebuilt: {checked} profiles checked, {updated} updated')
+        )
@@ -0,0 +1,35 @@
+# File: backend/profiles/management/commands/rebuild_coverage_index.py
+# Recompute materialized service-area coverage for business profiles
+
+from django.core.management.base import BaseCommand
+from profiles.coverage import rebuild_coverage
+from profiles.geo import spatial_backend
+from profiles.models import BusinessProfile
+
+
+class Command(BaseCommand):
+    help = 'Rebuild service-area coverage for profile search (after bulk imports or boundary loads)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=[choice for choice, _ in BusinessProfile.SERVICE_AREA_CHOICES],
+            help='Only profiles with this service area type'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recompute even when the stored fingerprint matches (e.g. boundaries changed)'
+        )
+
+    def handle(self, *args, **options):
+        queryset = BusinessProfile.objects.all()
+        if options['kind']:
+            queryset = queryset.filter(service_area_type=options['kind'])
+
+        self.stdout.write(f'Rebuilding service coverage (spatial index: {spatial_backend()})...')
+        checked, updated = rebuild_coverage(queryset, force=options['force'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Coverage rebuilt: {checked} profiles checked, {updated} updated')
+        )
@@ -0,0 +1,17 @@
+# File: backend/profiles/management/commands/rebuild_search_index.py
+# Recompute full-text search documents for business profiles
+
+from django.core.management.base import BaseCommand
+from profiles.models import BusinessProfile
+from profiles.search import rebuild_search_index, search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild profile search documents (after bulk imports or raw SQL updates)'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Rebuilding search documents (index: {search_backend()})...')
+        checked, updated = rebuild_search_index(BusinessProfile.objects.all())
+        self.stdout.write(
+            self.style.SUCCESS(f'Search index rebuilt: {checked} profiles checked, {updated} updated')
+        )
@@ -0,0 +1,56 @@
+# File: backend/profiles/management/commands/recompute_profile_completion.py
+# Recompute the stored completion columns of business profiles
+
+from django.core.management.base import BaseCommand
+from profiles.models import DERIVED_FIELDS, SCORE_FIELDS, BusinessProfile
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute is_complete, completion_percentage and missing_fields in chunks '
+        '(after raw SQL updates, imports or a change to the completion rules)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Profiles per chunk (default: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count stale profiles without saving anything'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fields = ['id', 'user_id', *SCORE_FIELDS, *DERIVED_FIELDS]
+        checked = updated = 0
+        last_id = 0
+
+        while True:
+            chunk = list(
+                BusinessProfile.objects.filter(pk__gt=last_id).only(*fields).order_by('pk')[:batch_size]
+            )
+            if not chunk:
+                break
+            last_id = chunk[-1].pk
+            checked += len(chunk)
+
+            stale = []
+            for profile in chunk:
+                stored = (profile.is_complete, profile.completion_percentage, profile.missing_fields)
+                profile.update_completion()
+                if stored != (profile.is_complete, profile.completion_percentage, profile.missing_fields):
+                    stale.append(profile)
+            if stale and not options['dry_run']:
+                # Also brings User.profile_completed in line for these profiles
+                BusinessProfile.objects.bulk_update(stale, list(DERIVED_FIELDS))
+            updated += len(stale)
+
+        prefix = 'DRY RUN: ' if options['dry_run'] else ''
+        self.stdout.write(
+            self.style.SUCCESS(f'{prefix}{checked} profiles checked, {updated} out of date')
+        )
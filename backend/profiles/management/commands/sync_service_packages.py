@@ -0,0 +1,24 @@
+# File: backend/profiles/management/commands/sync_service_packages.py
+# Rebuild ServicePackage rows from BusinessProfile.quote_packages
+
+from django.core.management.base import BaseCommand
+from profiles.models import BusinessProfile
+from profiles.packages import sync_all_packages
+
+
+class Command(BaseCommand):
+    help = 'Sync service packages from quote_packages (after bulk imports or raw SQL updates)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Profiles loaded per query'
+        )
+
+    def handle(self, *args, **options):
+        checked, changed = sync_all_packages(BusinessProfile.objects.all(), options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Service packages synced: {checked} profiles checked, {changed} changed')
+        )
@@ -0,0 +1,165 @@
+# File: backend/profiles/media.py
+# Reference counts for stored profile images (MediaBlob) and collection of
+# files nothing points at any more
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from .images import delete_variants
+from .models import MEDIA_FIELDS, MediaBlob
+from .storage import media_storage
+
+MEDIA_GC_DEFAULTS = {
+    'GRACE_PERIOD': 3600,    # Seconds an unreferenced file is kept (uploads in flight)
+    'BATCH_SIZE': 500,       # Blobs deleted per transaction / orphans checked per query
+    'QUARANTINE_DIR': None,  # Where orphans are moved with --quarantine (default: <MEDIA_ROOT>_quarantine)
+    'QUARANTINE_DAYS': 30,   # Quarantined files older than this are purged
+}
+
+
+def get_media_gc_settings():
+    conf = dict(MEDIA_GC_DEFAULTS)
+    conf.update(getattr(settings, 'MEDIA_GC', {}))
+    if not conf['QUARANTINE_DIR']:
+        conf['QUARANTINE_DIR'] = f"{str(settings.MEDIA_ROOT).rstrip('/')}_quarantine"
+    return conf
+
+
+def _file_name(value):
+    if isinstance(value, FieldFile):
+        value = value.name
+    return value or ''
+
+
+def add_references(names):
+    """Count one more reference per name (repeats count several times)"""
+    now = timezone.now()
+    storage = media_storage()
+    for name, count in Counter(name for name in names if name).items():
+        updated = MediaBlob.objects.filter(name=name).update(
+            ref_count=F('ref_count') + count, updated_at=now
+        )
+        if updated:
+            continue
+        try:
+            size = storage.size(name)
+        except (OSError, NotImplementedError):
+            size = None
+        try:
+            with transaction.atomic():
+                MediaBlob.objects.create(name=name, size=size, ref_count=count)
+        except IntegrityError:
+            # Created concurrently
+            MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + count, updated_at=now)
+
+
+def release_references(names):
+    now = timezone.now()
+    for name, count in Counter(name for name in names if name).items():
+        updated = MediaBlob.objects.filter(name=name, ref_count__gte=count).update(
+            ref_count=F('ref_count') - count, updated_at=now
+        )
+        if not updated:
+            MediaBlob.objects.filter(name=name).update(ref_count=0, updated_at=now)
+
+
+def _current_media(instance):
+    return {
+        field: _file_name(instance.__dict__[field])
+        for field in MEDIA_FIELDS[type(instance).__name__] if field in instance.__dict__
+    }
+
+
+def media_saved(instance, created):
+    """
+    post_save hook: move references from the files the instance was loaded
+    with to the ones it was saved with
+    """
+    loaded = {} if created else getattr(instance, '_loaded_media', None)
+    if loaded is None:
+        # Not loaded from the database, so what it replaced is unknown
+        return
+    current = _current_media(instance)
+    added = []
+    released = []
+    for field, name in current.items():
+        if not created and field not in loaded:
+            continue
+        previous = loaded.get(field, '')
+        if name != previous:
+            added.append(name)
+            released.append(previous)
+    add_references(added)
+    release_references(released)
+    instance._loaded_media = {**loaded, **current}
+
+
+def media_deleted(instance):
+    loaded = getattr(instance, '_loaded_media', None)
+    if loaded is None:
+        loaded = _current_media(instance)
+    release_references(loaded.values())
+
+
+def collect_garbage(dry_run=False, grace_period=None, batch_size=None):
+    """
+    Delete files no row has referenced for GRACE_PERIOD, with their image
+    variants. Returns (files, bytes) deleted, or that would be.
+    """
+    conf = get_media_gc_settings()
+    grace_period = conf['GRACE_PERIOD'] if grace_period is None else grace_period
+    batch_size = batch_size or conf['BATCH_SIZE']
+    cutoff = timezone.now() - timedelta(seconds=grace_period)
+    storage = media_storage()
+    modified_since = getattr(storage, 'modified_since', None)
+
+    collected = collected_bytes = 0
+    last_name = ''
+    while True:
+        candidates = list(
+            MediaBlob.objects.filter(ref_count=0, updated_at__lt=cutoff, name__gt=last_name)
+            .order_by('name').values_list('name', 'size')[:batch_size]
+        )
+        if not candidates:
+            break
+        last_name = candidates[-1][0]
+        # A content-addressed file saved again is about to be referenced
+        if modified_since is not None:
+            candidates = [
+                (name, size) for name, size in candidates if not modified_since(name, grace_period)
+            ]
+
+        if dry_run:
+            doomed = candidates
+        else:
+            with transaction.atomic():
+                doomed = list(
+                    MediaBlob.objects.select_for_update()
+                    .filter(name__in=[name for name, _ in candidates], ref_count=0)
+                    .values_list('name', 'size')
+                )
+                MediaBlob.objects.filter(name__in=[name for name, _ in doomed]).delete()
+            # An upload of the same content may have re-saved the file and
+            # counted a new reference since the rows were locked
+            revived = set(
+                MediaBlob.objects.filter(name__in=[name for name, _ in doomed]).values_list('name', flat=True)
+            )
+            deleted = []
+            for name, size in doomed:
+                # Checked per file, right before its delete
+                if name in revived or (modified_since is not None and modified_since(name, grace_period)):
+                    continue
+                storage.delete(name)
+                delete_variants(name)
+                deleted.append((name, size))
+            doomed = deleted
+
+        collected += len(doomed)
+        collected_bytes += sum(size or 0 for _, size in doomed)
+    return collected, collected_bytes
@@ -0,0 +1,112 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+import math
+
+# Frozen copies of the profiles.geo helpers this migration was written against
+CELL_DEGREES = 0.5
+CELL_ROW_FACTOR = 100000
+POSTGIS_INDEX_NAME = "profiles_bp_coverage_gist"
+POSTGIS_COVERAGE_BOX = (
+    'ST_Expand(ST_SetSRID(ST_MakePoint("longitude"::float8, "latitude"::float8), 4326), '
+    '"service_radius" / 69.0 / GREATEST(cos(radians("latitude"::float8)), 0.01))'
+)
+
+
+def coverage_cells(profile):
+    if profile.latitude is None or profile.longitude is None or not profile.service_radius:
+        return []
+    lat, lng = float(profile.latitude), float(profile.longitude)
+    dlat = profile.service_radius / 69.0
+    dlng = profile.service_radius / (69.0 * max(math.cos(math.radians(lat)), 0.01))
+    row_lo = int((max(lat - dlat, -90.0) + 90.0) // CELL_DEGREES)
+    row_hi = int((min(lat + dlat, 90.0) + 90.0) // CELL_DEGREES)
+    col_lo = int((max(lng - dlng, -180.0) + 180.0) // CELL_DEGREES)
+    col_hi = int((min(lng + dlng, 180.0) + 180.0) // CELL_DEGREES)
+    return [
+        row * CELL_ROW_FACTOR + col
+        for row in range(row_lo, row_hi + 1)
+        for col in range(col_lo, col_hi + 1)
+    ]
+
+
+def index_existing_profiles(apps, schema_editor):
+    """Fill coverage cells for profiles that already have coordinates"""
+    BusinessProfile = apps.get_model("profiles", "BusinessProfile")
+    CoverageCell = apps.get_model("profiles", "CoverageCell")
+
+    batch = []
+    profiles = BusinessProfile.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).only("id", "latitude", "longitude", "service_radius")
+    for profile in profiles.iterator(chunk_size=1000):
+        batch.extend(
+            CoverageCell(profile_id=profile.pk, cell=cell)
+            for cell in coverage_cells(profile)
+        )
+        if len(batch) >= 5000:
+            CoverageCell.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        CoverageCell.objects.bulk_create(batch)
+
+
+def create_postgis_index(apps, schema_editor):
+    """GiST index over each profile's coverage box, only if PostGIS is installed"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {POSTGIS_INDEX_NAME} ON profiles_businessprofile "
+        f"USING gist (({POSTGIS_COVERAGE_BOX})) "
+        f"WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    )
+
+
+def drop_postgis_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGIS_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0003_add_missing_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CoverageCell",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cell", models.BigIntegerField()),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="coverage_cells",
+                        to="profiles.businessprofile",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="coveragecell",
+            constraint=models.UniqueConstraint(
+                fields=("cell", "profile"), name="profiles_coveragecell_unique"
+            ),
+        ),
+        migrations.RunPython(index_existing_profiles, migrations.RunPython.noop),
+        migrations.RunPython(create_postgis_index, drop_postgis_index),
+    ]
@@ -0,0 +1,219 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+import hashlib
+import json
+import math
+
+RTREE_TABLE = "profiles_servicecoverage_rtree"
+GIST_INDEX = "profiles_servicecoverage_bbox_gist"
+OLD_POSTGIS_INDEX = "profiles_bp_coverage_gist"
+COVERAGE_FIELDS = (
+    "service_area_type", "latitude", "longitude", "service_radius",
+    "city", "state", "zip_code", "service_area_polygon",
+)
+
+
+def create_spatial_index(apps, schema_editor):
+    """R-tree over coverage bounding boxes: R*Tree on SQLite, GiST on PostgreSQL"""
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        # The profile-level PostGIS index is superseded by the coverage boxes
+        schema_editor.execute(f"DROP INDEX IF EXISTS {OLD_POSTGIS_INDEX}")
+        schema_editor.execute(
+            f"CREATE INDEX {GIST_INDEX} ON profiles_servicecoverage USING gist "
+            f'((box(point("min_lng", "min_lat"), point("max_lng", "max_lat"))))'
+        )
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_RTREE'"
+            )
+            if cursor.fetchone() is None:
+                return
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {RTREE_TABLE} USING rtree(id, min_lng, max_lng, min_lat, max_lat)"
+        )
+        row = "NEW.profile_id, NEW.min_lng, NEW.max_lng, NEW.min_lat, NEW.max_lat"
+        schema_editor.execute(
+            f"CREATE TRIGGER {RTREE_TABLE}_ins AFTER INSERT ON profiles_servicecoverage "
+            f"BEGIN INSERT INTO {RTREE_TABLE} VALUES ({row}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {RTREE_TABLE}_upd AFTER UPDATE ON profiles_servicecoverage "
+            f"BEGIN DELETE FROM {RTREE_TABLE} WHERE id = OLD.profile_id; "
+            f"INSERT INTO {RTREE_TABLE} VALUES ({row}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {RTREE_TABLE}_del AFTER DELETE ON profiles_servicecoverage "
+            f"BEGIN DELETE FROM {RTREE_TABLE} WHERE id = OLD.profile_id; END"
+        )
+
+
+def drop_spatial_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {GIST_INDEX}")
+    elif connection.vendor == "sqlite":
+        for suffix in ("ins", "upd", "del"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {RTREE_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {RTREE_TABLE}")
+
+
+def _circle(lat, lng, radius_miles, vertices=48):
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    angular = radius_miles / 3958.8
+    ring = []
+    for step in range(vertices):
+        bearing = 2 * math.pi * step / vertices
+        lat2 = math.asin(
+            math.sin(lat1) * math.cos(angular)
+            + math.cos(lat1) * math.sin(angular) * math.cos(bearing)
+        )
+        lng2 = lng1 + math.atan2(
+            math.sin(bearing) * math.sin(angular) * math.cos(lat1),
+            math.cos(angular) - math.sin(lat1) * math.sin(lat2)
+        )
+        ring.append([round(math.degrees(lng2), 6), round(math.degrees(lat2), 6)])
+    ring.append(ring[0])
+    return ring
+
+
+def materialize_existing(apps, schema_editor):
+    """
+    Radius coverage for existing profiles (no boundaries or drawn areas exist
+    yet); the grid cells from 0004 are dropped where an R-tree replaces them.
+    """
+    BusinessProfile = apps.get_model("profiles", "BusinessProfile")
+    ServiceCoverage = apps.get_model("profiles", "ServiceCoverage")
+    CoverageCell = apps.get_model("profiles", "CoverageCell")
+
+    batch = []
+    profiles = BusinessProfile.objects.filter(
+        latitude__isnull=False, longitude__isnull=False, service_radius__gt=0
+    ).only("id", *COVERAGE_FIELDS)
+    for profile in profiles.iterator(chunk_size=1000):
+        ring = _circle(float(profile.latitude), float(profile.longitude), profile.service_radius)
+        lngs = [position[0] for position in ring]
+        lats = [position[1] for position in ring]
+        data = {field: getattr(profile, field) for field in COVERAGE_FIELDS}
+        for field in ("latitude", "longitude"):
+            data[field] = round(float(data[field]), 6)
+        batch.append(ServiceCoverage(
+            profile_id=profile.pk,
+            kind="radius",
+            geometry={"type": "Polygon", "coordinates": [ring]},
+            min_lat=min(lats), min_lng=min(lngs), max_lat=max(lats), max_lng=max(lngs),
+            # Non-radius areas get a fingerprint that never matches, so their
+            # first save or a rebuild resolves the real boundary
+            fingerprint=(
+                hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+                if profile.service_area_type == "radius" else ""
+            ),
+        ))
+        if len(batch) >= 1000:
+            ServiceCoverage.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ServiceCoverage.objects.bulk_create(batch)
+
+    connection = schema_editor.connection
+    indexed = connection.vendor == "postgresql"
+    if connection.vendor == "sqlite":
+        indexed = RTREE_TABLE in connection.introspection.table_names()
+    if indexed:
+        CoverageCell.objects.all().delete()
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0004_coveragecell"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdminBoundary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("town", "Town/city"),
+                            ("county", "County"),
+                            ("state", "State"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("state", models.CharField(blank=True, max_length=50)),
+                ("geometry", models.JSONField()),
+                ("min_lat", models.FloatField()),
+                ("min_lng", models.FloatField()),
+                ("max_lat", models.FloatField()),
+                ("max_lng", models.FloatField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="businessprofile",
+            name="service_area_polygon",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="ServiceCoverage",
+            fields=[
+                (
+                    "profile",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="coverage",
+                        serialize=False,
+                        to="profiles.businessprofile",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=20)),
+                ("geometry", models.JSONField(blank=True, null=True)),
+                ("min_lat", models.FloatField()),
+                ("min_lng", models.FloatField()),
+                ("max_lat", models.FloatField()),
+                ("max_lng", models.FloatField()),
+                ("fingerprint", models.CharField(max_length=64)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "boundary",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="coverages",
+                        to="profiles.adminboundary",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="adminboundary",
+            index=models.Index(
+                fields=["kind", "min_lat", "max_lat"], name="profiles_boundary_bbox_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="adminboundary",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "state", "name"), name="profiles_adminboundary_unique"
+            ),
+        ),
+        migrations.RunPython(create_spatial_index, drop_spatial_index),
+        migrations.RunPython(materialize_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:02
+
+from django.db import migrations, models
+import re
+
+
+def _normalize(value):
+    return re.sub(r"[^a-z0-9]+", " ", str(value or "").lower()).strip()
+
+
+def _address_key(profile):
+    # Frozen copy of profiles.geocoding.address_key
+    digits = re.sub(r"\D", "", str(profile.zip_code or ""))
+    parts = [
+        _normalize(profile.address_line1),
+        _normalize(profile.city),
+        _normalize(profile.state),
+        digits[:5] if len(digits) >= 5 else "",
+    ]
+    if not any(parts[1:]):
+        return ""
+    return "|".join(parts)
+
+
+def mark_located_profiles(apps, schema_editor):
+    """Profiles that already have coordinates don't need geocoding"""
+    BusinessProfile = apps.get_model("profiles", "BusinessProfile")
+    located = BusinessProfile.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).only("id", "address_line1", "city", "state", "zip_code")
+
+    batch = []
+    for profile in located.iterator(chunk_size=1000):
+        profile.geocode_status = "done"
+        profile.geocoded_address = _address_key(profile)
+        batch.append(profile)
+        if len(batch) >= 1000:
+            BusinessProfile.objects.bulk_update(batch, ["geocode_status", "geocoded_address"])
+            batch = []
+    if batch:
+        BusinessProfile.objects.bulk_update(batch, ["geocode_status", "geocoded_address"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0005_service_coverage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="businessprofile",
+            name="geocode_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("done", "Geocoded"),
+                    ("failed", "Not found"),
+                ],
+                db_index=True,
+                default="pending",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="businessprofile",
+            name="geocoded_address",
+            field=models.CharField(blank=True, max_length=400),
+        ),
+        migrations.CreateModel(
+            name="ZipCentroid",
+            fields=[
+                (
+                    "zip_code",
+                    models.CharField(max_length=5, primary_key=True, serialize=False),
+                ),
+                ("latitude", models.DecimalField(decimal_places=6, max_digits=9)),
+                ("longitude", models.DecimalField(decimal_places=6, max_digits=9)),
+                ("city", models.CharField(blank=True, max_length=100)),
+                ("state", models.CharField(blank=True, max_length=50)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["state", "city"], name="profiles_zip_city_idx")
+                ],
+            },
+        ),
+        migrations.RunPython(mark_located_profiles, migrations.RunPython.noop),
+    ]
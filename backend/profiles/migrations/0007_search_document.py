@@ -0,0 +1,132 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FTS_TABLE = "profiles_search_fts"
+GIN_INDEX = "profiles_search_vector_gin"
+
+
+def create_search_index(apps, schema_editor):
+    """Generated tsvector + GIN on PostgreSQL, an FTS5 table on SQLite"""
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        # 'simple' (unstemmed) so prefix queries match partially typed words
+        schema_editor.execute(
+            "ALTER TABLE profiles_profilesearchdocument ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(services, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(details, '')), 'C')"
+            ") STORED"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {GIN_INDEX} ON profiles_profilesearchdocument USING gin (search_vector)"
+        )
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_FTS5'"
+            )
+            if cursor.fetchone() is None:
+                return
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "title, services, details, "
+            "content='profiles_profilesearchdocument', content_rowid='profile_id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        new = "NEW.profile_id, NEW.title, NEW.services, NEW.details"
+        old = "'delete', OLD.profile_id, OLD.title, OLD.services, OLD.details"
+        columns = f"{FTS_TABLE}(rowid, title, services, details)"
+        delete_columns = f"{FTS_TABLE}({FTS_TABLE}, rowid, title, services, details)"
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ins AFTER INSERT ON profiles_profilesearchdocument "
+            f"BEGIN INSERT INTO {columns} VALUES ({new}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_upd AFTER UPDATE ON profiles_profilesearchdocument "
+            f"BEGIN INSERT INTO {delete_columns} VALUES ({old}); "
+            f"INSERT INTO {columns} VALUES ({new}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_del AFTER DELETE ON profiles_profilesearchdocument "
+            f"BEGIN INSERT INTO {delete_columns} VALUES ({old}); END"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {GIN_INDEX}")
+        schema_editor.execute(
+            "ALTER TABLE profiles_profilesearchdocument DROP COLUMN IF EXISTS search_vector"
+        )
+    elif connection.vendor == "sqlite":
+        for suffix in ("ins", "upd", "del"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def index_existing_profiles(apps, schema_editor):
+    """Frozen copy of profiles.search.build_document for existing rows"""
+    BusinessProfile = apps.get_model("profiles", "BusinessProfile")
+    ServicePackage = apps.get_model("profiles", "ServicePackage")
+    ProfileSearchDocument = apps.get_model("profiles", "ProfileSearchDocument")
+
+    packages = {}
+    for profile_id, name, description in ServicePackage.objects.filter(
+        is_active=True
+    ).values_list("profile_id", "name", "description").iterator():
+        packages.setdefault(profile_id, []).append(f"{name} {description}")
+
+    batch = []
+    profiles = BusinessProfile.objects.only(
+        "id", "business_name", "certifications", "city", "state", "quote_packages"
+    )
+    for profile in profiles.iterator(chunk_size=1000):
+        quoted = " ".join(
+            f'{package.get("name", "")} {package.get("description", "")}'
+            for package in profile.quote_packages or [] if isinstance(package, dict)
+        )
+        batch.append(ProfileSearchDocument(
+            profile_id=profile.pk,
+            title=profile.business_name or "",
+            services=f'{" ".join(packages.get(profile.pk, []))} {quoted}'.strip(),
+            details=" ".join(filter(None, [profile.certifications, profile.city, profile.state])),
+        ))
+        if len(batch) >= 1000:
+            ProfileSearchDocument.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ProfileSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0006_geocoding"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProfileSearchDocument",
+            fields=[
+                (
+                    "profile",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="profiles.businessprofile",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("services", models.TextField(blank=True)),
+                ("details", models.TextField(blank=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_profiles, migrations.RunPython.noop),
+    ]
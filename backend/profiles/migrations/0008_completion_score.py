@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:12
+
+from django.db import migrations, models
+
+# Frozen copy of BusinessProfile's completion rules (bits must not move)
+REQUIRED = [
+    "business_name", "business_phone", "business_email",
+    "address_line1", "city", "state", "zip_code",
+    "service_radius", "pricing_mode",
+]
+HOURLY_RATE_BIT = 1 << 9
+QUOTE_PACKAGES_BIT = 1 << 10
+
+
+def _completion(profile):
+    mask = 0
+    for bit, field in enumerate(REQUIRED):
+        if not getattr(profile, field):
+            mask |= 1 << bit
+    hourly = profile.pricing_mode == "hourly"
+    quoted = profile.pricing_mode == "quoted"
+    if hourly and not profile.hourly_rate:
+        mask |= HOURLY_RATE_BIT
+    elif quoted and not profile.quote_packages:
+        mask |= QUOTE_PACKAGES_BIT
+
+    checks = [
+        profile.business_name, profile.business_phone, profile.business_email, profile.business_logo,
+        profile.address_line1, profile.city, profile.state, profile.zip_code,
+        profile.service_radius,
+        profile.pricing_mode,
+        (hourly and profile.hourly_rate) or (quoted and profile.quote_packages),
+        profile.certifications, profile.profile_photo,
+        profile.availability_schedule,
+        profile.available_immediately or profile.start_date,
+    ]
+    return int(sum(1 for value in checks if value) / 15 * 100), mask
+
+
+def backfill_completion(apps, schema_editor):
+    BusinessProfile = apps.get_model("profiles", "BusinessProfile")
+    batch = []
+    for profile in BusinessProfile.objects.order_by("pk").iterator(chunk_size=1000):
+        profile.completion_percentage, profile.missing_fields = _completion(profile)
+        batch.append(profile)
+        if len(batch) >= 1000:
+            BusinessProfile.objects.bulk_update(batch, ["completion_percentage", "missing_fields"])
+            batch = []
+    if batch:
+        BusinessProfile.objects.bulk_update(batch, ["completion_percentage", "missing_fields"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0007_search_document"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="businessprofile",
+            name="completion_percentage",
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="businessprofile",
+            name="missing_fields",
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_completion, migrations.RunPython.noop),
+    ]
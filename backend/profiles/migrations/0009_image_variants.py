@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:15
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def queue_profile_images(apps, schema_editor):
+    """Existing logos and photos need variants (gallery images default to pending)"""
+    BusinessProfile = apps.get_model("profiles", "BusinessProfile")
+    BusinessProfile.objects.filter(
+        Q(business_logo__gt="") | Q(profile_photo__gt="")
+    ).update(image_variants_status="pending")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0008_completion_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="businessprofile",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="businessprofile",
+            name="image_variants_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("done", "Done"),
+                    ("failed", "Failed"),
+                ],
+                db_index=True,
+                default="done",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="galleryimage",
+            name="height",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="galleryimage",
+            name="variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="galleryimage",
+            name="variants_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("done", "Done"),
+                    ("failed", "Failed"),
+                ],
+                db_index=True,
+                default="pending",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="galleryimage",
+            name="width",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(queue_profile_images, migrations.RunPython.noop),
+    ]
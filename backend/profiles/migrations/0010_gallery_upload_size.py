@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:18
+
+from django.db import migrations, models
+
+
+def record_file_sizes(apps, schema_editor):
+    """Sizes of existing images, so they count towards the gallery quota"""
+    GalleryImage = apps.get_model("profiles", "GalleryImage")
+    storage = GalleryImage._meta.get_field("image").storage
+    batch = []
+    for image in GalleryImage.objects.only("id", "image").iterator(chunk_size=1000):
+        try:
+            image.file_size = storage.size(image.image.name)
+        except (OSError, NotImplementedError):
+            continue
+        batch.append(image)
+        if len(batch) >= 1000:
+            GalleryImage.objects.bulk_update(batch, ["file_size"])
+            batch = []
+    if batch:
+        GalleryImage.objects.bulk_update(batch, ["file_size"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0009_image_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="galleryimage",
+            name="file_size",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="galleryimage",
+            name="sha256",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.RunPython(record_file_sizes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:21
+
+from collections import Counter
+
+from django.db import migrations, models
+import profiles.storage
+
+
+def count_references(apps, schema_editor):
+    """MediaBlob rows for the files existing profiles and gallery images use"""
+    BusinessProfile = apps.get_model("profiles", "BusinessProfile")
+    GalleryImage = apps.get_model("profiles", "GalleryImage")
+    MediaBlob = apps.get_model("profiles", "MediaBlob")
+    counts = Counter()
+    for name in GalleryImage.objects.values_list("image", flat=True).iterator(chunk_size=1000):
+        counts[name] += 1
+    for fields in BusinessProfile.objects.values_list(
+        "business_logo", "profile_photo"
+    ).iterator(chunk_size=1000):
+        counts.update(fields)
+    storage = GalleryImage._meta.get_field("image").storage
+    blobs = []
+    for name, count in counts.items():
+        if not name:
+            continue
+        try:
+            size = storage.size(name)
+        except (OSError, NotImplementedError):
+            size = None
+        blobs.append(MediaBlob(name=name, size=size, ref_count=count))
+    MediaBlob.objects.bulk_create(blobs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0010_gallery_upload_size"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaBlob",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("size", models.PositiveBigIntegerField(blank=True, null=True)),
+                ("ref_count", models.PositiveIntegerField(db_index=True, default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="businessprofile",
+            name="business_logo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=profiles.storage.media_storage,
+                upload_to="business_logos/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="businessprofile",
+            name="profile_photo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=profiles.storage.media_storage,
+                upload_to="profile_photos/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="galleryimage",
+            name="image",
+            field=models.ImageField(
+                storage=profiles.storage.media_storage, upload_to="gallery/"
+            ),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:40
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+# Frozen copy of profiles.packages.package_rows
+CENTS = Decimal("0.01")
+MAX_PRICE = Decimal("999999.99")
+QUOTED_MODES = ("quoted", "both")
+
+
+def _price(value):
+    try:
+        price = Decimal(str(value)).quantize(CENTS)
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+    if not price.is_finite() or price < 0 or price > MAX_PRICE:
+        return None
+    return price
+
+
+def _package_rows(quote_packages, pricing_mode):
+    rows = {}
+    for position, package in enumerate(quote_packages or []):
+        if not isinstance(package, dict):
+            continue
+        price = _price(package.get("price"))
+        if price is None:
+            continue
+        rows[position] = {
+            "name": str(package.get("name") or "")[:100],
+            "description": str(package.get("description") or ""),
+            "price": price,
+            "duration": str(package.get("duration") or "")[:50],
+            "is_active": pricing_mode in QUOTED_MODES and bool(package.get("is_active", True)),
+        }
+    return rows
+
+
+def create_synced_packages(apps, schema_editor):
+    """ServicePackage rows for the quote_packages existing profiles have"""
+    BusinessProfile = apps.get_model("profiles", "BusinessProfile")
+    ServicePackage = apps.get_model("profiles", "ServicePackage")
+    batch = []
+    for profile_id, quote_packages, pricing_mode in BusinessProfile.objects.exclude(
+        quote_packages=[]
+    ).values_list("id", "quote_packages", "pricing_mode").iterator(chunk_size=1000):
+        for position, columns in _package_rows(quote_packages, pricing_mode).items():
+            batch.append(ServicePackage(profile_id=profile_id, position=position, **columns))
+        if len(batch) >= 1000:
+            ServicePackage.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ServicePackage.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0011_media_blobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="servicepackage",
+            name="position",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="servicepackage",
+            index=models.Index(
+                fields=["is_active", "price", "profile"],
+                name="profiles_package_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="servicepackage",
+            index=models.Index(
+                fields=["profile", "position"], name="profiles_package_position_idx"
+            ),
+        ),
+        migrations.RunPython(create_synced_packages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:55
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copy of profiles.availability.compile_schedule (slot layout must not move)
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 96
+SLOTS_PER_COLUMN = 48
+TIME_PATTERN = re.compile(r"^(\d{1,2}):(\d{2})(?::\d{2})?$")
+
+
+def _minutes(value):
+    match = TIME_PATTERN.match(str(value).strip()) if value is not None else None
+    if match is None:
+        return None
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    if minutes >= 60 or hours > 24 or (hours == 24 and minutes):
+        return None
+    return hours * 60 + minutes
+
+
+def _compile_schedule(schedule):
+    bitmaps = {f"{day}_{half}": 0 for day in DAYS for half in ("am", "pm")}
+    for day, hours in (schedule or {}).items():
+        if day not in DAYS or not isinstance(hours, dict) or not hours.get("enabled"):
+            continue
+        start = _minutes(hours.get("start_time"))
+        end = _minutes(hours.get("end_time"))
+        if start is None or end is None:
+            continue
+        if end <= start:
+            end += 24 * 60
+        # Whole slots only; hours past midnight continue into the next day
+        for slot in range(-(-start // SLOT_MINUTES), end // SLOT_MINUTES):
+            column_day = DAYS[(DAYS.index(day) + slot // SLOTS_PER_DAY) % len(DAYS)]
+            day_slot = slot % SLOTS_PER_DAY
+            half = "am" if day_slot < SLOTS_PER_COLUMN else "pm"
+            bitmaps[f"{column_day}_{half}"] |= 1 << (day_slot % SLOTS_PER_COLUMN)
+    return bitmaps
+
+
+def index_existing_profiles(apps, schema_editor):
+    """Slot bitmaps for the availability schedules existing profiles have"""
+    BusinessProfile = apps.get_model("profiles", "BusinessProfile")
+    AvailabilityIndex = apps.get_model("profiles", "AvailabilityIndex")
+    batch = []
+    for profile_id, schedule in BusinessProfile.objects.exclude(
+        availability_schedule={}
+    ).values_list("id", "availability_schedule").iterator(chunk_size=1000):
+        bitmaps = _compile_schedule(schedule)
+        if any(bitmaps.values()):
+            batch.append(AvailabilityIndex(profile_id=profile_id, **bitmaps))
+        if len(batch) >= 1000:
+            AvailabilityIndex.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        AvailabilityIndex.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0012_service_package_sync"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvailabilityIndex",
+            fields=[
+                (
+                    "profile",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="availability_index",
+                        serialize=False,
+                        to="profiles.businessprofile",
+                    ),
+                ),
+                ("monday_am", models.BigIntegerField(default=0)),
+                ("monday_pm", models.BigIntegerField(default=0)),
+                ("tuesday_am", models.BigIntegerField(default=0)),
+                ("tuesday_pm", models.BigIntegerField(default=0)),
+                ("wednesday_am", models.BigIntegerField(default=0)),
+                ("wednesday_pm", models.BigIntegerField(default=0)),
+                ("thursday_am", models.BigIntegerField(default=0)),
+                ("thursday_pm", models.BigIntegerField(default=0)),
+                ("friday_am", models.BigIntegerField(default=0)),
+                ("friday_pm", models.BigIntegerField(default=0)),
+                ("saturday_am", models.BigIntegerField(default=0)),
+                ("saturday_pm", models.BigIntegerField(default=0)),
+                ("sunday_am", models.BigIntegerField(default=0)),
+                ("sunday_pm", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(index_existing_profiles, migrations.RunPython.noop),
+    ]
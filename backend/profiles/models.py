@@ -1,11 +1,112 @@
 # --------------------------------
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
 from django.contrib.auth import get_user_model
 from django.conf import settings
 import json
 
+from users.auth_status import invalidate_auth_status
+
+from .storage import media_storage
+
 User = get_user_model()
 
+# Required fields, one bit each in BusinessProfile.missing_fields, with the
+# label shown to the user. The bit positions are stored: only append.
+REQUIRED_FIELDS = [
+    ('business_name', 'Business Name'),
+    ('business_phone', 'Business Phone'),
+    ('business_email', 'Business Email'),
+    ('address_line1', 'Street Address'),
+    ('city', 'City'),
+    ('state', 'State'),
+    ('zip_code', 'ZIP Code'),
+    ('service_radius', 'Service Radius'),
+    ('pricing_mode', 'Pricing Mode'),
+    ('hourly_rate', 'Hourly Rate'),         # pricing_mode 'hourly' only
+    ('quote_packages', 'Quote Packages'),   # pricing_mode 'quoted' only
+]
+MISSING_FIELD_BITS = {field: 1 << bit for bit, (field, _) in enumerate(REQUIRED_FIELDS)}
+
+# Fields BusinessProfile.is_complete is derived from
+COMPLETION_FIELDS = frozenset(MISSING_FIELD_BITS)
+
+# Fields the completion score is derived from
+SCORE_FIELDS = COMPLETION_FIELDS | {
+    'business_logo', 'certifications', 'profile_photo',
+    'availability_schedule', 'available_immediately', 'start_date',
+}
+
+# Stored columns recomputed from SCORE_FIELDS on every save
+DERIVED_FIELDS = frozenset(['is_complete', 'completion_percentage', 'missing_fields'])
+
+# Columns the pre_save hooks in profiles.signals may change when a save
+# touches a field, so update_fields saves write them too
+SIGNAL_UPDATED_FIELDS = {
+    **{
+        field: {'geocode_status', 'geocoded_address', 'latitude', 'longitude'}
+        for field in ('address_line1', 'city', 'state', 'zip_code')  # geocoding.ADDRESS_FIELDS
+    },
+    'business_logo': {'image_variants_status'},
+    'profile_photo': {'image_variants_status'},
+}
+
+
+# Image fields whose files are reference counted by MediaBlob
+MEDIA_FIELDS = {
+    'BusinessProfile': ('business_logo', 'profile_photo'),
+    'GalleryImage': ('image',),
+}
+
+
+def _loaded_media(instance, fields):
+    """{field: stored file name} for the fields that were loaded"""
+    return {
+        field: instance.__dict__[field] or ''
+        for field in fields if field in instance.__dict__
+    }
+
+
+def sync_profile_completed(user_ids, using='default'):
+    """
+    Copy BusinessProfile.is_complete to User.profile_completed for these
+    users in one UPDATE, touching only rows that differ.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    completion = Subquery(
+        BusinessProfile.objects.using(using).filter(user_id=OuterRef('pk')).values('is_complete')[:1]
+    )
+    updated = User.objects.using(using).filter(pk__in=user_ids).exclude(
+        profile_completed=completion
+    ).update(profile_completed=completion)
+    if updated:
+        # update() skips the User post_save hook that drops cached auth status
+        transaction.on_commit(lambda: invalidate_auth_status(*user_ids), using=using)
+    return updated
+
+
+class BusinessProfileQuerySet(models.QuerySet):
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        """bulk_update that keeps the completion columns and User.profile_completed in step"""
+        fields = list(fields)
+        if not SCORE_FIELDS.intersection(fields) and not DERIVED_FIELDS.intersection(fields):
+            return super().bulk_update(objs, fields, batch_size=batch_size)
+
+        objs = list(objs)
+        for obj in objs:
+            obj.update_completion()
+        fields.extend(sorted(DERIVED_FIELDS.difference(fields)))
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = super().bulk_update(objs, fields, batch_size=batch_size)
+            sync_profile_completed([obj.user_id for obj in objs], using=self.db)
+        for obj in objs:
+            obj._loaded_is_complete = obj.is_complete
+        return rows
+
+
 class BusinessProfile(models.Model):
     """
     Enhanced business profile model for tradespeople
@@ -21,7 +122,7 @@ class BusinessProfile(models.Model):
     business_name = models.CharField(max_length=255)
     business_phone = models.CharField(max_length=20)
     business_email = models.EmailField()
-    business_logo = models.ImageField(upload_to='business_logos/', null=True, blank=True)
+    business_logo = models.ImageField(upload_to='business_logos/', storage=media_storage, null=True, blank=True)
     
     # Address Information
     address_line1 = models.CharField(max_length=255)
@@ -31,6 +132,20 @@ class BusinessProfile(models.Model):
     zip_code = models.CharField(max_length=10)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    # Set by profiles.geocoding; geocoded_address is the normalized address
+    # the coordinates belong to, so unchanged addresses are never re-geocoded
+    GEOCODE_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Geocoded'),
+        ('failed', 'Not found'),
+    ]
+    geocode_status = models.CharField(
+        max_length=10,
+        choices=GEOCODE_STATUS_CHOICES,
+        default='pending',
+        db_index=True
+    )
+    geocoded_address = models.CharField(max_length=400, blank=True)
     
     # Service Area Information
     SERVICE_AREA_CHOICES = [
@@ -46,6 +161,8 @@ class BusinessProfile(models.Model):
         default='radius'
     )
     service_radius = models.IntegerField(default=25)  # in miles
+    # GeoJSON Polygon/MultiPolygon drawn by the user for 'custom_draw'
+    service_area_polygon = models.JSONField(null=True, blank=True)
     willing_to_travel_outside = models.BooleanField(default=False)
     
     # Pricing Information
@@ -77,7 +194,21 @@ class BusinessProfile(models.Model):
     
     # Media and Certifications
     certifications = models.TextField(blank=True)
-    profile_photo = models.ImageField(upload_to='profile_photos/', null=True, blank=True)
+    profile_photo = models.ImageField(upload_to='profile_photos/', storage=media_storage, null=True, blank=True)
+    # Resized copies of business_logo and profile_photo (see profiles.images),
+    # {field: variants entry}; rendered by the process_images worker
+    IMAGE_VARIANTS_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    image_variants = models.JSONField(default=dict, blank=True)
+    image_variants_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_VARIANTS_STATUS_CHOICES,
+        default='done',
+        db_index=True
+    )
     
     # Availability Information
     availability_schedule = models.JSONField(default=dict, blank=True)
@@ -86,86 +217,118 @@ class BusinessProfile(models.Model):
     
     # Profile Status
     is_complete = models.BooleanField(default=False)
+    # Maintained by save() from SCORE_FIELDS (see update_completion) so lists
+    # can filter and sort on them; backfill with recompute_profile_completion
+    completion_percentage = models.PositiveSmallIntegerField(default=0, db_index=True)
+    missing_fields = models.PositiveIntegerField(default=0, db_index=True)  # MISSING_FIELD_BITS
     is_active = models.BooleanField(default=True)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BusinessProfileQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Business Profile"
         verbose_name_plural = "Business Profiles"
 
     def __str__(self):
         return f"{self.business_name} - {self.user.username}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Completion state as stored, so save() can tell when it flips
+        instance._loaded_is_complete = instance.__dict__.get('is_complete')
+        # Image files as stored, for the reference counts in profiles.media
+        instance._loaded_media = _loaded_media(instance, MEDIA_FIELDS['BusinessProfile'])
+        return instance
     
     def save(self, *args, **kwargs):
-        """Auto-check if profile is complete"""
-        self.is_complete = self._check_profile_complete()
-        super().save(*args, **kwargs)
-        
-        # Update user's profile_completed status
-        if hasattr(self.user, 'profile_completed'):
-            self.user.profile_completed = self.is_complete
-            self.user.save(update_fields=['profile_completed'])
+        """Refresh the completion columns; sync the user's flag only when it flips"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            for field in list(update_fields):
+                update_fields |= SIGNAL_UPDATED_FIELDS.get(field, set())
+            kwargs['update_fields'] = update_fields
+            if not SCORE_FIELDS.intersection(update_fields) and not DERIVED_FIELDS.intersection(update_fields):
+                super().save(*args, **kwargs)
+                return
+            kwargs['update_fields'] = update_fields | DERIVED_FIELDS
+
+        self.update_completion()
+        if self.is_complete == getattr(self, '_loaded_is_complete', None):
+            super().save(*args, **kwargs)
+            return
+
+        using = kwargs.get('using') or self._state.db or 'default'
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+            updated = User.objects.using(using).filter(pk=self.user_id).exclude(
+                profile_completed=self.is_complete
+            ).update(profile_completed=self.is_complete)
+        self._loaded_is_complete = self.is_complete
+
+        if updated:
+            if BusinessProfile.user.is_cached(self):
+                self.user.profile_completed = self.is_complete
+            # update() skips the User post_save hook that drops cached auth status
+            transaction.on_commit(lambda: invalidate_auth_status(self.user_id), using=using)
     
-    def _check_profile_complete(self):
-        """Check if all required fields are filled"""
-        required_fields = [
-            'business_name', 'business_phone', 'business_email',
-            'address_line1', 'city', 'state', 'zip_code',
-            'service_radius', 'pricing_mode'
-        ]
-        
-        for field in required_fields:
+    def _missing_fields_mask(self):
+        mask = 0
+        for field in ('business_name', 'business_phone', 'business_email',
+                      'address_line1', 'city', 'state', 'zip_code',
+                      'service_radius', 'pricing_mode'):
             if not getattr(self, field):
-                return False
-        
-        # Check pricing-specific requirements
+                mask |= MISSING_FIELD_BITS[field]
+
+        # Pricing-specific requirements
         if self.pricing_mode == 'hourly' and not self.hourly_rate:
-            return False
+            mask |= MISSING_FIELD_BITS['hourly_rate']
         elif self.pricing_mode == 'quoted' and not self.quote_packages:
-            return False
-            
-        return True
-
-    @property
-    def completion_percentage(self):
-        """Calculate profile completion percentage"""
-        total_fields = 15  # Adjust based on your requirements
-        completed_fields = 0
-        
-        # Basic info
-        if self.business_name: completed_fields += 1
-        if self.business_phone: completed_fields += 1
-        if self.business_email: completed_fields += 1
-        if self.business_logo: completed_fields += 1
-        
-        # Address
-        if self.address_line1: completed_fields += 1
-        if self.city: completed_fields += 1
-        if self.state: completed_fields += 1
-        if self.zip_code: completed_fields += 1
-        
-        # Service area
-        if self.service_radius: completed_fields += 1
-        
-        # Pricing
-        if self.pricing_mode: completed_fields += 1
-        if (self.pricing_mode == 'hourly' and self.hourly_rate) or \
-           (self.pricing_mode == 'quoted' and self.quote_packages):
-            completed_fields += 1
-        
-        # Media
-        if self.certifications: completed_fields += 1
-        if self.profile_photo: completed_fields += 1
-        
-        # Availability
-        if self.availability_schedule: completed_fields += 1
-        if self.available_immediately or self.start_date: completed_fields += 1
-        
+            mask |= MISSING_FIELD_BITS['quote_packages']
+        return mask
+
+    def _check_profile_complete(self):
+        """Check if all required fields are filled"""
+        return not self._missing_fields_mask()
+
+    def _completion_score(self):
+        """Percentage of the 15 scored items that are filled in"""
+        total_fields = 15
+        checks = [
+            # Basic info
+            self.business_name, self.business_phone, self.business_email, self.business_logo,
+            # Address
+            self.address_line1, self.city, self.state, self.zip_code,
+            # Service area
+            self.service_radius,
+            # Pricing
+            self.pricing_mode,
+            (self.pricing_mode == 'hourly' and self.hourly_rate) or
+            (self.pricing_mode == 'quoted' and self.quote_packages),
+            # Media
+            self.certifications, self.profile_photo,
+            # Availability
+            self.availability_schedule,
+            self.available_immediately or self.start_date,
+        ]
+        completed_fields = sum(1 for value in checks if value)
         return int((completed_fields / total_fields) * 100)
 
+    def update_completion(self):
+        """Recompute is_complete, completion_percentage and missing_fields (not saved)"""
+        self.missing_fields = self._missing_fields_mask()
+        self.is_complete = not self.missing_fields
+        self.completion_percentage = self._completion_score()
+
+    def get_missing_field_labels(self):
+        """Labels of the required fields missing_fields says are empty"""
+        return [label for field, label in REQUIRED_FIELDS if self.missing_fields & MISSING_FIELD_BITS[field]]
+
 
 class GalleryImage(models.Model):
     """
@@ -176,9 +339,23 @@ class GalleryImage(models.Model):
         related_name='gallery_images',
         on_delete=models.CASCADE
     )
-    image = models.ImageField(upload_to='gallery/')
+    image = models.ImageField(upload_to='gallery/', storage=media_storage)
     caption = models.CharField(max_length=255, blank=True)
     order = models.PositiveIntegerField(default=0)
+    # Recorded at upload (profiles.uploads): quotas are summed from file_size,
+    # sha256 catches the same file being uploaded twice
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    # Filled in with the resized variants by the process_images worker
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    variants = models.JSONField(default=dict, blank=True)
+    variants_status = models.CharField(
+        max_length=10,
+        choices=BusinessProfile.IMAGE_VARIANTS_STATUS_CHOICES,
+        default='pending',
+        db_index=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -187,6 +364,19 @@ class GalleryImage(models.Model):
     def __str__(self):
         return f"Gallery image for {self.profile.business_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_media = _loaded_media(instance, MEDIA_FIELDS['GalleryImage'])
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'image' in update_fields:
+            # A replaced file is re-queued by profiles.signals.queue_gallery_image
+            kwargs['update_fields'] = {*update_fields, 'variants_status'}
+        super().save(*args, **kwargs)
+
 
 class ServicePackage(models.Model):
     """
@@ -202,10 +392,197 @@ class ServicePackage(models.Model):
     price = models.DecimalField(max_digits=8, decimal_places=2)
     duration = models.CharField(max_length=50, blank=True)  # e.g., "2-3 hours"
     is_active = models.BooleanField(default=True)
+    # Index of the quote_packages entry this row is synced from (see
+    # profiles.packages); NULL for packages created some other way
+    position = models.PositiveIntegerField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['price']
+        indexes = [
+            # "Profiles with an active package between $X and $Y" from the index alone
+            models.Index(fields=['is_active', 'price', 'profile'], name='profiles_package_price_idx'),
+            models.Index(fields=['profile', 'position'], name='profiles_package_position_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} - ${self.price}"
+
+
+class ProfileSearchDocument(models.Model):
+    """
+    Text a profile is found by (see profiles.search). The full-text index
+    over it is database specific: a generated tsvector column with a GIN
+    index on PostgreSQL, an FTS5 table on SQLite.
+    """
+    profile = models.OneToOneField(
+        BusinessProfile,
+        primary_key=True,
+        related_name='search_document',
+        on_delete=models.CASCADE
+    )
+    title = models.CharField(max_length=255)       # business name, ranked highest
+    services = models.TextField(blank=True)        # package names and descriptions
+    details = models.TextField(blank=True)         # certifications and location
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for profile {self.profile_id}"
+
+
+class AvailabilityIndex(models.Model):
+    """
+    A profile's weekly availability_schedule compiled to 15-minute slots
+    (see profiles.availability): one bit per slot, each day split into an
+    AM and a PM column of 48 bits, so "available Saturday 9-11am" is a
+    bitwise test on two integers instead of parsing JSON. Profiles with no
+    available slot have no row.
+    """
+    profile = models.OneToOneField(
+        BusinessProfile,
+        primary_key=True,
+        related_name='availability_index',
+        on_delete=models.CASCADE
+    )
+    monday_am = models.BigIntegerField(default=0)
+    monday_pm = models.BigIntegerField(default=0)
+    tuesday_am = models.BigIntegerField(default=0)
+    tuesday_pm = models.BigIntegerField(default=0)
+    wednesday_am = models.BigIntegerField(default=0)
+    wednesday_pm = models.BigIntegerField(default=0)
+    thursday_am = models.BigIntegerField(default=0)
+    thursday_pm = models.BigIntegerField(default=0)
+    friday_am = models.BigIntegerField(default=0)
+    friday_pm = models.BigIntegerField(default=0)
+    saturday_am = models.BigIntegerField(default=0)
+    saturday_pm = models.BigIntegerField(default=0)
+    sunday_am = models.BigIntegerField(default=0)
+    sunday_pm = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Availability index for profile {self.profile_id}"
+
+
+class ZipCentroid(models.Model):
+    """
+    ZIP code centroid used by the offline geocoder.
+    Loaded from CSV with `manage.py load_zip_centroids`.
+    """
+    zip_code = models.CharField(max_length=5, primary_key=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    city = models.CharField(max_length=100, blank=True)
+    state = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'city'], name='profiles_zip_city_idx'),
+        ]
+
+    def __str__(self):
+        return self.zip_code
+
+
+class AdminBoundary(models.Model):
+    """
+    Town, county or state outline used for non-radius service areas.
+    Loaded from GeoJSON with `manage.py load_service_boundaries`.
+    """
+    KIND_CHOICES = [
+        ('town', 'Town/city'),
+        ('county', 'County'),
+        ('state', 'State'),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    name = models.CharField(max_length=100)
+    state = models.CharField(max_length=50, blank=True)
+    geometry = models.JSONField()  # GeoJSON Polygon/MultiPolygon, [lng, lat]
+    min_lat = models.FloatField()
+    min_lng = models.FloatField()
+    max_lat = models.FloatField()
+    max_lng = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'state', 'name'], name='profiles_adminboundary_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'min_lat', 'max_lat'], name='profiles_boundary_bbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.name}, {self.state}" if self.state else self.name
+
+
+class ServiceCoverage(models.Model):
+    """
+    Materialized service area of a profile (see profiles.coverage).
+    Radius areas are stored as a circle polygon, town/county/state areas
+    point at an AdminBoundary, custom areas copy the drawn polygon. The
+    bounding box is indexed by an R-tree for point lookups.
+    """
+    profile = models.OneToOneField(
+        BusinessProfile,
+        primary_key=True,
+        related_name='coverage',
+        on_delete=models.CASCADE
+    )
+    kind = models.CharField(max_length=20)
+    geometry = models.JSONField(null=True, blank=True)
+    boundary = models.ForeignKey(
+        AdminBoundary,
+        null=True,
+        blank=True,
+        related_name='coverages',
+        on_delete=models.SET_NULL
+    )
+    min_lat = models.FloatField()
+    min_lng = models.FloatField()
+    max_lat = models.FloatField()
+    max_lng = models.FloatField()
+    # Hash of the inputs the coverage was built from; unchanged means skip
+    fingerprint = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} coverage for profile {self.profile_id}"
+
+
+class CoverageCell(models.Model):
+    """
+    Grid cells a profile's coverage box touches (see profiles.geo).
+    Only maintained on databases without an R-tree index.
+    """
+    profile = models.ForeignKey(
+        BusinessProfile,
+        related_name='coverage_cells',
+        on_delete=models.CASCADE
+    )
+    cell = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cell', 'profile'], name='profiles_coveragecell_unique'),
+        ]
+
+    def __str__(self):
+        return f"Cell {self.cell} for profile {self.profile_id}"
+
+
+class MediaBlob(models.Model):
+    """
+    A stored image file and how many GalleryImage/BusinessProfile fields
+    point at it (see profiles.media). Content-addressed names make equal
+    uploads share one blob; `manage.py collect_media` deletes the ones no
+    longer referenced.
+    """
+    name = models.CharField(max_length=255, primary_key=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    ref_count = models.PositiveIntegerField(default=0, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.name} - ${self.price}"
\ No newline at end of file
+        return f"{self.name} ({self.ref_count} references)"
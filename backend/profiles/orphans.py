@@ -0,0 +1,257 @@
+# File: backend/profiles/orphans.py
+# Files under the profile image directories that nothing in the database
+# knows about (written before reference counting, left by crashed uploads,
+# variants of sizes no longer configured) - found by streaming the media
+# tree against a Bloom filter of the referenced names
+
+import hashlib
+import math
+import os
+import shutil
+import time
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .images import get_image_settings, variant_names
+from .media import get_media_gc_settings
+from .models import MEDIA_FIELDS, BusinessProfile, GalleryImage, MediaBlob
+from .storage import media_storage
+
+INCOMING_DIR = '.incoming'
+FALSE_POSITIVE_RATE = 0.001
+
+
+class ReferenceFilter:
+    """
+    Bloom filter over storage names: a fixed-size bit array, so memory
+    doesn't grow with the number of files. A false positive only keeps an
+    orphan for another run; a name that was added is always found.
+    """
+
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1000)
+        self.size = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(self.size // 8 + 1)
+
+    def _positions(self, name):
+        digest = hashlib.blake2b(name.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, name):
+        for position in self._positions(name):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, name):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(name))
+
+
+def _field_names(model, field):
+    return (
+        model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+        .values_list(field, flat=True).iterator(chunk_size=2000)
+    )
+
+
+def _entry_names(entry):
+    """Storage names listed in a variants entry"""
+    for variant in (entry or {}).get('sizes', {}).values():
+        for value in variant.values():
+            if isinstance(value, str):
+                yield value
+
+
+def referenced_names():
+    """
+    Every name the database refers to: image fields, MediaBlob rows (left
+    to collect_media) and the variants of each image, current and rendered
+    """
+    yield from MediaBlob.objects.values_list('name', flat=True).iterator(chunk_size=2000)
+    for model in (GalleryImage, BusinessProfile):
+        for field in MEDIA_FIELDS[model.__name__]:
+            for name in _field_names(model, field):
+                yield name
+                yield from variant_names(name)
+    for entry in GalleryImage.objects.exclude(variants={}).values_list('variants', flat=True).iterator(chunk_size=500):
+        yield from _entry_names(entry)
+    for entries in BusinessProfile.objects.exclude(image_variants={}).values_list(
+        'image_variants', flat=True
+    ).iterator(chunk_size=500):
+        for entry in (entries or {}).values():
+            yield from _entry_names(entry)
+
+
+def _reference_estimate():
+    variants_per_image = len(variant_names('x')) * 2
+    images = GalleryImage.objects.count() + BusinessProfile.objects.count() * len(MEDIA_FIELDS['BusinessProfile'])
+    return MediaBlob.objects.count() + images * (variants_per_image + 1)
+
+
+def build_reference_filter():
+    references = ReferenceFilter(_reference_estimate())
+    for name in referenced_names():
+        references.add(name)
+    return references
+
+
+def _managed_trees():
+    """(storage, directory) pairs the profile images and their variants live in"""
+    storage = media_storage()
+    trees = [
+        (storage, field.upload_to.rstrip('/'))
+        for model in (GalleryImage, BusinessProfile)
+        for field in (model._meta.get_field(name) for name in MEDIA_FIELDS[model.__name__])
+    ]
+    trees.append((default_storage, get_image_settings()['DIRECTORY']))
+    if hasattr(storage, 'incoming_dir'):
+        trees.append((storage, INCOMING_DIR))
+    unique = []
+    for tree in trees:
+        if tree not in unique:
+            unique.append(tree)
+    return unique
+
+
+def _scan(root, prefix):
+    """(name, mtime, size) for the files below a local directory, depth first"""
+    stack = [prefix]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, directory))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = f'{directory}/{entry.name}'
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    yield name, stat.st_mtime, stat.st_size
+
+
+def _list(storage, prefix):
+    """_scan for storages without local paths"""
+    stack = [prefix]
+    while stack:
+        directory = stack.pop()
+        directories, files = storage.listdir(directory)
+        stack.extend(f'{directory}/{name}' for name in directories)
+        for name in files:
+            name = f'{directory}/{name}'
+            yield name, storage.get_modified_time(name).timestamp(), storage.size(name)
+
+
+def walk_media(storage, prefix):
+    try:
+        root = storage.path('')
+    except NotImplementedError:
+        return _list(storage, prefix)
+    return _scan(root, prefix)
+
+
+def _still_unreferenced(names):
+    """Exact check of a batch the filter let through, against rows written since"""
+    referenced = set(MediaBlob.objects.filter(name__in=names).values_list('name', flat=True))
+    for model in (GalleryImage, BusinessProfile):
+        for field in MEDIA_FIELDS[model.__name__]:
+            referenced.update(
+                model.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True)
+            )
+    return [name for name in names if name not in referenced]
+
+
+def quarantine_path(name):
+    return os.path.join(get_media_gc_settings()['QUARANTINE_DIR'], name)
+
+
+def _quarantine(storage, name):
+    target = quarantine_path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(storage.path(name), target)
+    # The mtime records when it was quarantined, for purge_quarantine
+    os.utime(target)
+
+
+def _remove(storage, batch, quarantine):
+    for name in batch:
+        try:
+            if quarantine:
+                _quarantine(storage, name)
+            else:
+                storage.delete(name)
+        except FileNotFoundError:
+            pass
+
+
+def collect_orphans(dry_run=False, quarantine=False, grace_period=None, batch_size=None):
+    """
+    Delete, or move to MEDIA_GC['QUARANTINE_DIR'], image files older than
+    the grace period that no row refers to. Returns (files, bytes).
+    """
+    conf = get_media_gc_settings()
+    grace_period = conf['GRACE_PERIOD'] if grace_period is None else grace_period
+    batch_size = batch_size or conf['BATCH_SIZE']
+    cutoff = time.time() - grace_period
+
+    # Built before walking, so files referenced later are newer than the cutoff
+    # or caught by _still_unreferenced
+    references = build_reference_filter()
+    collected = collected_bytes = 0
+
+    for storage, prefix in _managed_trees():
+        if quarantine:
+            storage.path('')  # Raises NotImplementedError for remote storages
+
+        batch = {}
+        for name, mtime, size in walk_media(storage, prefix):
+            if mtime >= cutoff or name in references:
+                continue
+            batch[name] = size
+            if len(batch) >= batch_size:
+                files, size = _collect_batch(storage, batch, dry_run, quarantine)
+                collected += files
+                collected_bytes += size
+                batch = {}
+        if batch:
+            files, size = _collect_batch(storage, batch, dry_run, quarantine)
+            collected += files
+            collected_bytes += size
+    return collected, collected_bytes
+
+
+def _collect_batch(storage, batch, dry_run, quarantine):
+    orphans = _still_unreferenced(list(batch))
+    if not dry_run:
+        _remove(storage, orphans, quarantine)
+    return len(orphans), sum(batch[name] for name in orphans)
+
+
+def purge_quarantine(days=None, dry_run=False):
+    """Delete quarantined files older than MEDIA_GC['QUARANTINE_DAYS']; returns (files, bytes)"""
+    conf = get_media_gc_settings()
+    days = conf['QUARANTINE_DAYS'] if days is None else days
+    cutoff = (timezone.now() - timedelta(days=days)).timestamp()
+    root = conf['QUARANTINE_DIR']
+    purged = purged_bytes = 0
+    for directory, _, files in os.walk(root, topdown=False):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            stat = os.stat(path)
+            if stat.st_mtime >= cutoff:
+                continue
+            if not dry_run:
+                os.unlink(path)
+            purged += 1
+            purged_bytes += stat.st_size
+        if not dry_run and directory != root:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass  # Not empty
+    return purged, purged_bytes
@@ -0,0 +1,136 @@
+# File: backend/profiles/packages.py
+# ServicePackage rows kept in step with BusinessProfile.quote_packages, so
+# package prices can be queried through an index instead of the JSON
+
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Min
+
+from .models import BusinessProfile, ServicePackage
+
+logger = logging.getLogger(__name__)
+
+# Profile fields the package rows are built from
+PACKAGE_FIELDS = ('quote_packages', 'pricing_mode')
+
+# Columns copied from each quote_packages entry
+SYNCED_COLUMNS = ('name', 'description', 'price', 'duration', 'is_active')
+
+# Pricing modes in which a profile's quote packages are offered
+QUOTED_MODES = ('quoted', 'both')
+
+CENTS = Decimal('0.01')
+MAX_PRICE = Decimal('999999.99')   # ServicePackage.price is DecimalField(max_digits=8, decimal_places=2)
+
+
+def parse_price(value):
+    """Decimal price rounded to cents; raises ValueError if it isn't one"""
+    try:
+        price = Decimal(str(value)).quantize(CENTS)
+    except (InvalidOperation, ValueError, TypeError):
+        raise ValueError(f'Invalid price: {value!r}')
+    if not price.is_finite() or price < 0 or price > MAX_PRICE:
+        raise ValueError(f'Price out of range: {value!r}')
+    return price
+
+
+def package_rows(quote_packages, pricing_mode):
+    """
+    {position: column values} for the entries of quote_packages. Packages
+    only count as active while the profile quotes (QUOTED_MODES).
+    """
+    rows = {}
+    for position, package in enumerate(quote_packages or []):
+        if not isinstance(package, dict):
+            continue
+        try:
+            price = parse_price(package.get('price'))
+        except ValueError as e:
+            logger.warning(f'Skipping quote package {position}: {e}')
+            continue
+        rows[position] = {
+            'name': str(package.get('name') or '')[:100],
+            'description': str(package.get('description') or ''),
+            'price': price,
+            'duration': str(package.get('duration') or '')[:50],
+            'is_active': pricing_mode in QUOTED_MODES and bool(package.get('is_active', True)),
+        }
+    return rows
+
+
+def sync_packages(profile):
+    """
+    Bring the profile's ServicePackage rows (the ones with a position) in
+    line with quote_packages using bulk inserts, updates and deletes.
+    Rows created some other way (position NULL) are left alone.
+    Returns (created, updated, deleted).
+    """
+    wanted = package_rows(profile.quote_packages, profile.pricing_mode)
+    existing = {
+        row['position']: row
+        for row in ServicePackage.objects.filter(profile_id=profile.pk, position__isnull=False)
+        .values('id', 'position', *SYNCED_COLUMNS)
+    }
+
+    to_create = [
+        ServicePackage(profile_id=profile.pk, position=position, **columns)
+        for position, columns in wanted.items() if position not in existing
+    ]
+    to_update = [
+        ServicePackage(id=existing[position]['id'], **columns)
+        for position, columns in wanted.items()
+        if position in existing and any(existing[position][column] != value for column, value in columns.items())
+    ]
+    to_delete = [row['id'] for position, row in existing.items() if position not in wanted]
+    if not (to_create or to_update or to_delete):
+        return 0, 0, 0
+
+    with transaction.atomic():
+        if to_delete:
+            ServicePackage.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            ServicePackage.objects.bulk_update(to_update, SYNCED_COLUMNS)
+        if to_create:
+            ServicePackage.objects.bulk_create(to_create)
+    return len(to_create), len(to_update), len(to_delete)
+
+
+def sync_all_packages(queryset=None, batch_size=500):
+    """Sync many profiles; returns (checked, changed)"""
+    if queryset is None:
+        queryset = BusinessProfile.objects.all()
+    queryset = queryset.only('id', *PACKAGE_FIELDS).order_by('pk')
+
+    checked = changed = 0
+    for profile in queryset.iterator(chunk_size=batch_size):
+        checked += 1
+        changed += any(sync_packages(profile))
+    return checked, changed
+
+
+# Queries
+
+def packages_in_price_range(min_price=None, max_price=None):
+    """Active packages priced within the range (either end optional)"""
+    packages = ServicePackage.objects.filter(is_active=True)
+    if min_price is not None:
+        packages = packages.filter(price__gte=min_price)
+    if max_price is not None:
+        packages = packages.filter(price__lte=max_price)
+    return packages
+
+
+def profiles_by_package_price(min_price=None, max_price=None, limit=None):
+    """[(profile_id, lowest matching price)] of searchable profiles, cheapest first"""
+    ranked = (
+        packages_in_price_range(min_price, max_price)
+        # Before the LIMIT, so hidden profiles can't use up the results
+        .filter(profile__is_active=True, profile__is_complete=True)
+        .values('profile_id').annotate(lowest=Min('price')).order_by('lowest', 'profile_id')
+        .values_list('profile_id', 'lowest')
+    )
+    if limit:
+        ranked = ranked[:limit]
+    return list(ranked)
@@ -0,0 +1,119 @@
+# File: backend/profiles/querysets.py
+# Queryset loading driven by the serializer in use, and a query budget check
+# so endpoints stay at a constant number of queries
+
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+
+def _relation(model, path):
+    """
+    ('single' | 'many', related model) for a '__' path of relations,
+    or None if any step isn't a relation
+    """
+    kind = 'single'
+    for name in path.split('__'):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.is_relation or field.related_model is None:
+            return None
+        if field.many_to_many or field.one_to_many:
+            kind = 'many'
+        model = field.related_model
+    return kind, model
+
+
+def _collect(serializer, model, prefix, under_prefetch, select, prefetch):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        path = field.source.replace('.', '__')
+
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+            relation = _relation(model, path)
+            if relation is None:
+                continue
+            prefetch.add(prefix + path)
+            if isinstance(child, serializers.ModelSerializer):
+                _collect(child, relation[1], f'{prefix}{path}__', True, select, prefetch)
+        elif isinstance(field, serializers.ManyRelatedField):
+            if _relation(model, path) is not None:
+                prefetch.add(prefix + path)
+        elif isinstance(field, serializers.ModelSerializer):
+            relation = _relation(model, path)
+            if relation is None:
+                continue
+            many = under_prefetch or relation[0] == 'many'
+            (prefetch if many else select).add(prefix + path)
+            _collect(field, relation[1], f'{prefix}{path}__', many, select, prefetch)
+        elif '__' in path:
+            # Dotted source such as 'user.username'
+            relation_path = path.rsplit('__', 1)[0]
+            relation = _relation(model, relation_path)
+            if relation is None:
+                continue
+            many = under_prefetch or relation[0] == 'many'
+            (prefetch if many else select).add(prefix + relation_path)
+
+
+@lru_cache(maxsize=None)
+def related_lookups(serializer_class):
+    """
+    (select_related, prefetch_related) paths for what serializer_class reads:
+    nested serializers, many-related fields and dotted sources. Nested
+    single relations are joined, anything reached through a to-many
+    relation is prefetched.
+    """
+    select = set()
+    prefetch = set()
+    meta = getattr(serializer_class, 'Meta', None)
+    if meta is not None and getattr(meta, 'model', None) is not None:
+        _collect(serializer_class(), meta.model, '', False, select, prefetch)
+    return tuple(sorted(select)), tuple(sorted(prefetch))
+
+
+def load_related(queryset, serializer_class):
+    select, prefetch = related_lookups(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class SerializerRelatedMixin:
+    """
+    Viewset mixin: list/retrieve/get_object querysets select and prefetch
+    whatever get_serializer_class() is going to read.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return load_related(queryset, self.get_serializer_class())
+
+
+@contextmanager
+def assert_max_queries(limit, using=DEFAULT_DB_ALIAS):
+    """
+    For tests: fail if the block runs more than `limit` queries, listing them.
+
+        with assert_max_queries(4):
+            client.get('/api/v1/profiles/')
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    executed = len(context.captured_queries)
+    if executed > limit:
+        queries = '\n'.join(
+            f'{number}. {query["sql"]}'
+            for number, query in enumerate(context.captured_queries, start=1)
+        )
+        raise AssertionError(f'{executed} queries executed, budget is {limit}:\n{queries}')
@@ -0,0 +1,175 @@
+# File: backend/profiles/search.py
+# Full-text profile search - one ProfileSearchDocument per profile, indexed
+# by PostgreSQL full-text search or SQLite FTS5, queried with prefix terms
+
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import BusinessProfile, ProfileSearchDocument, ServicePackage
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SEARCH_DEFAULTS = {
+    'MAX_RESULTS': 1000,   # Ranked matches returned for a text-only search
+    'MAX_TERMS': 8,        # Extra words in a query are ignored
+}
+
+# Profile fields the search document is built from
+SEARCH_FIELDS = ('business_name', 'certifications', 'city', 'state', 'quote_packages')
+
+FTS_TABLE = 'profiles_search_fts'
+GIN_INDEX = 'profiles_search_vector_gin'
+# Relative weight of title, services and details matches in SQLite's bm25()
+FTS_WEIGHTS = (10.0, 4.0, 1.0)
+
+
+def get_search_settings():
+    conf = dict(PROFILE_SEARCH_DEFAULTS)
+    conf.update(getattr(settings, 'PROFILE_SEARCH', {}))
+    return conf
+
+
+# Documents
+
+def _package_text(packages):
+    return ' '.join(
+        f'{package.get("name", "")} {package.get("description", "")}'
+        for package in packages or [] if isinstance(package, dict)
+    )
+
+
+def build_document(profile):
+    """(title, services, details) text for a profile"""
+    # Packages synced from quote_packages are indexed through the JSON below
+    packages = ServicePackage.objects.filter(
+        profile_id=profile.pk, is_active=True, position__isnull=True
+    ).values_list('name', 'description')
+    services = ' '.join(f'{name} {description}' for name, description in packages)
+    quoted = _package_text(profile.quote_packages)
+    return (
+        profile.business_name or '',
+        f'{services} {quoted}'.strip(),
+        ' '.join(filter(None, [profile.certifications, profile.city, profile.state])),
+    )
+
+
+def index_profile(profile):
+    """Bring a profile's search document up to date; returns True if written"""
+    title, services, details = build_document(profile)
+    current = ProfileSearchDocument.objects.filter(profile_id=profile.pk).values_list(
+        'title', 'services', 'details'
+    ).first()
+    if current == (title, services, details):
+        return False
+    ProfileSearchDocument.objects.update_or_create(
+        profile_id=profile.pk,
+        defaults={'title': title, 'services': services, 'details': details},
+    )
+    return True
+
+
+def rebuild_search_index(queryset=None):
+    """Index many profiles; returns (checked, updated)"""
+    if queryset is None:
+        queryset = BusinessProfile.objects.all()
+    queryset = queryset.only('id', *SEARCH_FIELDS).order_by('pk')
+
+    checked = updated = 0
+    for profile in queryset.iterator(chunk_size=1000):
+        checked += 1
+        if index_profile(profile):
+            updated += 1
+    return checked, updated
+
+
+# Queries
+
+_search_backend = {}
+
+
+def search_backend():
+    """'postgres' (tsvector + GIN), 'fts5' (SQLite) or 'basic' (icontains)"""
+    alias = connection.alias
+    if alias not in _search_backend:
+        backend = 'basic'
+        if connection.vendor == 'postgresql':
+            backend = 'postgres'
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [FTS_TABLE]
+                )
+                if cursor.fetchone():
+                    backend = 'fts5'
+        _search_backend[alias] = backend
+    return _search_backend[alias]
+
+
+def query_terms(query):
+    """Lowercased words of a query, capped at MAX_TERMS"""
+    terms = re.findall(r'\w+', (query or '').lower())
+    return terms[:get_search_settings()['MAX_TERMS']]
+
+
+def search_profiles(query, limit=None, active_only=True):
+    """
+    Profiles matching every word of query, each as a prefix
+    ('plumb' finds 'plumbing'). Returns [(profile_id, rank)] best first.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    backend = search_backend()
+    if backend == 'basic':
+        return _search_basic(terms, limit, active_only)
+
+    params = []
+    if backend == 'postgres':
+        select = (
+            "SELECT d.profile_id, ts_rank(d.search_vector, q.query) AS rank "
+            "FROM profiles_profilesearchdocument d CROSS JOIN to_tsquery('simple', %s) AS q(query) "
+        )
+        match = 'd.search_vector @@ q.query'
+        params.append(' & '.join(f'{term}:*' for term in terms))
+        id_column = 'd.profile_id'
+    else:
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        select = f'SELECT f.rowid, -bm25({FTS_TABLE}, {weights}) AS rank FROM {FTS_TABLE} f '
+        match = f'{FTS_TABLE} MATCH %s'
+        params.append(' '.join(f'"{term}"*' for term in terms))
+        id_column = 'f.rowid'
+
+    sql = select
+    if active_only:
+        sql += f'JOIN profiles_businessprofile p ON p.id = {id_column} '
+    sql += f'WHERE {match} '
+    if active_only:
+        sql += 'AND p.is_active AND p.is_complete '
+    sql += f'ORDER BY rank DESC, {id_column}'
+    if limit:
+        sql += ' LIMIT %s'
+        params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(profile_id, rank) for profile_id, rank in cursor.fetchall()]
+
+
+def _search_basic(terms, limit, active_only):
+    documents = ProfileSearchDocument.objects.all()
+    if active_only:
+        documents = documents.filter(profile__is_active=True, profile__is_complete=True)
+    for term in terms:
+        documents = documents.filter(
+            Q(title__icontains=term) | Q(services__icontains=term) | Q(details__icontains=term)
+        )
+    ids = documents.order_by('profile_id').values_list('profile_id', flat=True)
+    if limit:
+        ids = ids[:limit]
+    return [(profile_id, 0.0) for profile_id in ids]
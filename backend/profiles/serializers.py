@@ -1,11 +1,43 @@
 # --------------------------------------
 from rest_framework import serializers
+from .availability import parse_time
+from .geo import validate_area_geometry
+from .images import PROFILE_IMAGE_FIELDS, variant_urls
+from .uploads import add_gallery_images, check_gallery_quota, get_upload_settings
 from .models import BusinessProfile, GalleryImage, ServicePackage
+from .packages import MAX_PRICE, parse_price
+
+
+def _validate_area(value):
+    if value is None:
+        return value
+    try:
+        return validate_area_geometry(value)
+    except ValueError as e:
+        raise serializers.ValidationError(str(e))
+
+
+def _profile_image_variants(serializer, profile):
+    variants = profile.image_variants or {}
+    return {
+        field: variant_urls(
+            variants.get(field), getattr(profile, field).name, serializer.context.get('request')
+        )
+        for field in PROFILE_IMAGE_FIELDS
+    }
+
 
 class GalleryImageSerializer(serializers.ModelSerializer):
+    # {size: {width, height, webp, jpeg}}; null until the variants are rendered
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = GalleryImage
-        fields = ['id', 'image', 'caption', 'order', 'created_at']
+        fields = ['id', 'image', 'caption', 'order', 'width', 'height', 'variants', 'created_at']
+        read_only_fields = ['width', 'height']
+
+    def get_variants(self, obj):
+        return variant_urls(obj.variants, obj.image.name, self.context.get('request'))
 
 class ServicePackageSerializer(serializers.ModelSerializer):
     class Meta:
@@ -20,6 +52,7 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
     # File upload fields
     business_logo = serializers.ImageField(required=False, allow_null=True)
     profile_photo = serializers.ImageField(required=False, allow_null=True)
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = BusinessProfile
@@ -29,13 +62,14 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
             'business_name', 'business_phone', 'business_email', 'business_logo',
             # Address
             'address_line1', 'address_line2', 'city', 'state', 'zip_code',
-            'latitude', 'longitude',
+            'latitude', 'longitude', 'geocode_status',
             # Service area
-            'service_area_type', 'service_radius', 'willing_to_travel_outside',
+            'service_area_type', 'service_radius', 'service_area_polygon',
+            'willing_to_travel_outside',
             # Pricing
             'pricing_mode', 'hourly_rate', 'minimum_charge', 'quote_packages',
             # Media
-            'certifications', 'profile_photo',
+            'certifications', 'profile_photo', 'image_variants',
             # Availability
             'availability_schedule', 'available_immediately', 'start_date',
             # Status
@@ -45,7 +79,13 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
             # Timestamps
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'is_complete', 'completion_percentage', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'user', 'geocode_status', 'is_complete', 'completion_percentage',
+            'created_at', 'updated_at'
+        ]
+
+    def get_image_variants(self, obj):
+        return _profile_image_variants(self, obj)
 
     def validate_quote_packages(self, value):
         """Validate quote packages structure"""
@@ -62,12 +102,21 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError(f"Package missing required field: {field}")
             
             try:
-                float(package['price'])
-            except (ValueError, TypeError):
-                raise serializers.ValidationError("Package price must be a valid number")
+                parse_price(package['price'])
+            except ValueError:
+                raise serializers.ValidationError(
+                    f"Package price must be a number between 0 and {MAX_PRICE}"
+                )
+            
+            if len(str(package['name'])) > 100:
+                raise serializers.ValidationError("Package name must be at most 100 characters")
         
         return value
 
+    def validate_service_area_polygon(self, value):
+        """Validate a drawn service area (GeoJSON Polygon/MultiPolygon)"""
+        return _validate_area(value)
+
     def validate_availability_schedule(self, value):
         """Validate availability schedule structure"""
         if not isinstance(value, dict):
@@ -85,6 +134,11 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
             if 'enabled' in schedule and schedule['enabled']:
                 if 'start_time' not in schedule or 'end_time' not in schedule:
                     raise serializers.ValidationError(f"Enabled day {day} must have start_time and end_time")
+                try:
+                    parse_time(schedule['start_time'])
+                    parse_time(schedule['end_time'])
+                except ValueError:
+                    raise serializers.ValidationError(f"Times for {day} must be HH:MM")
         
         return value
 
@@ -107,6 +161,31 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ProfileSearchResultSerializer(serializers.ModelSerializer):
+    """Public listing of a profile returned by service-area search"""
+    distance_miles = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BusinessProfile
+        fields = [
+            'id', 'business_name', 'business_logo', 'profile_photo', 'image_variants',
+            'city', 'state', 'zip_code',
+            'service_area_type', 'service_radius', 'willing_to_travel_outside',
+            'pricing_mode', 'hourly_rate', 'minimum_charge',
+            'available_immediately', 'start_date', 'completion_percentage',
+            'distance_miles',
+        ]
+        read_only_fields = fields
+
+    def get_distance_miles(self, obj):
+        distance = getattr(obj, 'distance_miles', None)
+        return round(distance, 1) if distance is not None else None
+
+    def get_image_variants(self, obj):
+        return _profile_image_variants(self, obj)
+
+
 class BusinessProfileCreateSerializer(serializers.ModelSerializer):
     """Simplified serializer for profile creation"""
     
@@ -120,8 +199,7 @@ class BusinessProfileCreateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Create profile with user from request"""
-        user = self.context['request'].user
-        validated_data['user'] = user
+        validated_data['user_id'] = self.context['request'].user.pk
         return super().create(validated_data)
 
 
@@ -138,7 +216,28 @@ class BusinessProfileUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = BusinessProfile
         fields = '__all__'
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'user', 'geocode_status', 'geocoded_address',
+            'is_complete', 'completion_percentage', 'missing_fields',
+            'image_variants', 'image_variants_status',
+            'created_at', 'updated_at'
+        ]
+
+    def validate_service_area_polygon(self, value):
+        return _validate_area(value)
+
+    def validate_uploaded_gallery_images(self, value):
+        conf = get_upload_settings()
+        for image in value:
+            if image.size > conf['MAX_FILE_SIZE']:
+                raise serializers.ValidationError(
+                    f'{image.name} is larger than {conf["MAX_FILE_SIZE"] // (1024 * 1024)} MB.'
+                )
+        if self.instance is not None:
+            error = check_gallery_quota(self.instance, len(value), sum(image.size for image in value))
+            if error:
+                raise serializers.ValidationError(error)
+        return value
 
     def update(self, instance, validated_data):
         # Handle gallery images if provided
@@ -147,12 +246,8 @@ class BusinessProfileUpdateSerializer(serializers.ModelSerializer):
         # Update the profile
         profile = super().update(instance, validated_data)
         
-        # Add new gallery images
-        for image in gallery_images:
-            GalleryImage.objects.create(
-                profile=profile,
-                image=image
-            )
+        # Add new gallery images in one insert
+        add_gallery_images(profile, gallery_images)
         
         return profile
 
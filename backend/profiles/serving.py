@@ -0,0 +1,204 @@
+# File: backend/profiles/serving.py
+# Serving MEDIA_URL: strong content-hash ETags, conditional GET, single byte
+# ranges, and X-Accel-Redirect / X-Sendfile offload to the front server
+
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .storage import hash_from_name
+
+MEDIA_SERVING_DEFAULTS = {
+    'OFFLOAD': None,                      # None, 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache)
+    'ACCEL_PREFIX': '/protected-media/',  # Internal nginx location aliased to MEDIA_ROOT
+    'MAX_AGE': 3600,                      # Seconds, for names that can be overwritten
+    'IMMUTABLE_MAX_AGE': 31536000,        # Seconds, for content-addressed names
+    'CACHE_ALIAS': 'default',             # Content hashes of other files, keyed by mtime and size
+    'CHUNK_SIZE': 64 * 1024,              # Bytes read per chunk for hashing and ranges
+}
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_media_serving_settings():
+    conf = dict(MEDIA_SERVING_DEFAULTS)
+    conf.update(getattr(settings, 'MEDIA_SERVING', {}))
+    return conf
+
+
+def is_immutable(name):
+    """
+    Content-addressed names only. Variants are named after their source but
+    re-rendered in place when the image settings change, so they revalidate.
+    """
+    return hash_from_name(name) is not None
+
+
+def _file_hash(path, chunk_size):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_etag(name, path, stat_result, conf):
+    """
+    Strong ETag from the SHA-256 of the content: read from a content-addressed
+    name, otherwise hashed once per (mtime, size) and cached
+    """
+    sha256 = hash_from_name(name)
+    if sha256 is None:
+        # Includes variants: re-rendering with other settings keeps their names
+        cache = caches[conf['CACHE_ALIAS']]
+        key = f'media_etag:v1:{hashlib.md5(name.encode()).hexdigest()}:{stat_result.st_mtime_ns}:{stat_result.st_size}'
+        sha256 = cache.get(key)
+        if sha256 is None:
+            sha256 = _file_hash(path, conf['CHUNK_SIZE'])
+            cache.set(key, sha256, None)
+    return f'"{sha256[:32]}"'
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single 'bytes=' range, None to send the
+    whole file (no header, multiple ranges, other units); raises ValueError
+    when the range can't be satisfied
+    """
+    match = RANGE_PATTERN.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError(header)
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    """A Range applies only if If-Range (when sent) still names this version"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Strong comparison: weak validators never match
+        return parse_etags(if_range) == [etag]
+    date = parse_http_date_safe(if_range)
+    return date is not None and date == int(last_modified)
+
+
+def _read_range(path, start, end, chunk_size):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fh.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _offload(name, path, content_type, conf):
+    response = HttpResponse(content_type=content_type)
+    if conf['OFFLOAD'] == 'x-accel-redirect':
+        # nginx serves the body, Range requests included
+        response['X-Accel-Redirect'] = conf['ACCEL_PREFIX'].rstrip('/') + '/' + quote(name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    GET/HEAD MEDIA_URL<path>
+    Files under MEDIA_ROOT (dot-directories such as .incoming excluded)
+    """
+    conf = get_media_serving_settings()
+    name = path.replace('\\', '/')
+    if any(part.startswith('.') for part in name.split('/')):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, FileNotFoundError, NotADirectoryError, ValueError):
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+
+    etag = content_etag(name, full_path, stat_result, conf)
+    last_modified = stat_result.st_mtime
+    if is_immutable(name):
+        cache_control = f'public, max-age={conf["IMMUTABLE_MAX_AGE"]}, immutable'
+    else:
+        cache_control = f'public, max-age={conf["MAX_AGE"]}'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+    }
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if response is not None:
+        # 304 Not Modified / 412 Precondition Failed
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    size = stat_result.st_size
+
+    if conf['OFFLOAD']:
+        response = _offload(name, full_path, content_type, conf)
+    else:
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        if byte_range is not None and _if_range_matches(request, etag, last_modified):
+            start, end = byte_range
+            body = () if request.method == 'HEAD' else _read_range(full_path, start, end, conf['CHUNK_SIZE'])
+            response = StreamingHttpResponse(body, status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+            response['Content-Length'] = str(size)
+        else:
+            # The WSGI server's file wrapper (sendfile) streams the body
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for header, value in headers.items():
+        response[header] = value
+    return response
@@ -0,0 +1,136 @@
+# File: backend/profiles/signals.py
+# Keep geocoding, image variants and reference counts, materialized
+# service-area coverage, synced service packages, the availability index
+# and the search index in step with profile changes
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .availability import AVAILABILITY_FIELDS, index_availability
+from .coverage import COVERAGE_FIELDS, materialize_coverage
+from .geocoding import ADDRESS_FIELDS, prepare_profile
+from .images import PROFILE_IMAGE_FIELDS, prepare_gallery_image, prepare_profile_images
+from .media import media_deleted, media_saved
+from .models import BusinessProfile, GalleryImage, ServicePackage
+from .packages import PACKAGE_FIELDS, sync_packages
+from .search import SEARCH_FIELDS, index_profile
+from . import suggest
+
+
+@receiver(pre_save, sender=BusinessProfile)
+def queue_geocoding(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(ADDRESS_FIELDS).intersection(update_fields):
+        return
+    # Cache hits fill in the coordinates now; misses wait for geocode_profiles
+    prepare_profile(instance)
+
+
+@receiver(pre_save, sender=BusinessProfile)
+def queue_profile_images(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(PROFILE_IMAGE_FIELDS).intersection(update_fields):
+        return
+    prepare_profile_images(instance)
+
+
+@receiver(pre_save, sender=GalleryImage)
+def queue_gallery_image(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    prepare_gallery_image(instance)
+
+
+@receiver(post_save, sender=BusinessProfile)
+def update_service_coverage(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(COVERAGE_FIELDS).intersection(update_fields):
+        return
+    # Cheap when nothing relevant changed: the stored fingerprint matches
+    materialize_coverage(instance)
+
+
+@receiver(post_save, sender=BusinessProfile)
+def update_service_packages(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(PACKAGE_FIELDS).intersection(update_fields):
+        return
+    # Diffed against the stored rows; no writes when nothing changed
+    sync_packages(instance)
+
+
+@receiver(post_save, sender=BusinessProfile)
+def update_availability_index(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(AVAILABILITY_FIELDS).intersection(update_fields):
+        return
+    index_availability(instance)
+
+
+@receiver(post_save, sender=BusinessProfile)
+def update_search_document(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(SEARCH_FIELDS).intersection(update_fields):
+        return
+    index_profile(instance)
+
+
+@receiver(post_save, sender=BusinessProfile)
+def update_suggestions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    suggest.profile_changed(instance)
+
+
+@receiver(post_delete, sender=BusinessProfile)
+def remove_suggestions(sender, instance, **kwargs):
+    suggest.profile_deleted(instance.pk)
+
+
+@receiver(post_save, sender=BusinessProfile)
+@receiver(post_save, sender=GalleryImage)
+def count_media_references(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    media_saved(instance, created)
+
+
+@receiver(post_delete, sender=BusinessProfile)
+@receiver(post_delete, sender=GalleryImage)
+def release_media_references(sender, instance, **kwargs):
+    media_deleted(instance)
+
+
+def _reindex_package_profile(package):
+    if package.position is not None:
+        # Synced from quote_packages, which the document is built from
+        return
+    profile = BusinessProfile.objects.filter(pk=package.profile_id).only('id', *SEARCH_FIELDS).first()
+    if profile is not None:
+        index_profile(profile)
+
+
+@receiver(post_save, sender=ServicePackage)
+def reindex_saved_package(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _reindex_package_profile(instance)
+
+
+@receiver(post_delete, sender=ServicePackage)
+def reindex_deleted_package(sender, instance, origin=None, **kwargs):
+    # Skip cascades from deleting the profile (or its user); the profile
+    # row is still there at this point and would be re-indexed
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is not ServicePackage:
+        return
+    _reindex_package_profile(instance)
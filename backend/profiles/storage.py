@@ -0,0 +1,93 @@
+# File: backend/profiles/storage.py
+# Content-addressed storage for profile images - files are named by their
+# SHA-256, so the same bytes uploaded again are stored once
+
+import hashlib
+import os
+import re
+import time
+
+from django.core.files.storage import FileSystemStorage, InvalidStorageError, default_storage, storages
+
+MEDIA_STORAGE_ALIAS = 'media'
+
+HASHED_NAME_PATTERN = re.compile(r'(?:^|/)[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(?:\.\w+)?$')
+
+
+def media_storage():
+    """Storage of the profile image fields: STORAGES['media'], else the default"""
+    try:
+        return storages[MEDIA_STORAGE_ALIAS]
+    except InvalidStorageError:
+        return default_storage
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+    return digest.hexdigest()
+
+
+def hash_from_name(name):
+    """The SHA-256 a content-addressed name was built from, or None"""
+    match = HASHED_NAME_PATTERN.search(name or '')
+    return match.group(1) if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Saves 'gallery/photo.JPG' as 'gallery/3f/a2/3fa2...e1.jpg'. Content that
+    is already stored is not written again (its mtime is refreshed so the
+    collector leaves it alone); the upload_to directory and extension of
+    the original name are kept.
+    Deleting is left to profiles.media, which knows how many rows use a file.
+    """
+
+    def hashed_name(self, name, sha256):
+        directory = name.replace('\\', '/').split('/', 1)[0] if '/' in name else ''
+        extension = os.path.splitext(name)[1].lower()
+        path = f'{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}'
+        return f'{directory}/{path}' if directory else path
+
+    def _existing(self, name):
+        """Refresh and return name if it is stored, else None"""
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return None
+        return name
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content_hash(content))
+        return self._existing(name) or super()._save(name, content)
+
+    def save_local_file(self, name, path, sha256):
+        """
+        Move an already hashed file on the same filesystem into place,
+        e.g. a streamed upload; returns the stored name
+        """
+        name = self.hashed_name(self.generate_filename(name), sha256)
+        if self._existing(name):
+            os.unlink(path)
+            return name
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        # Same content under the same name, so a concurrent writer can't corrupt it
+        os.replace(path, full_path)
+        return name
+
+    def incoming_dir(self):
+        """Where streamed uploads are written before save_local_file"""
+        path = self.path('.incoming')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def modified_since(self, name, seconds):
+        """True if name was written or re-saved within the last seconds"""
+        try:
+            return os.path.getmtime(self.path(name)) > time.time() - seconds
+        except FileNotFoundError:
+            return False
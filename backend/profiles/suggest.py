@@ -0,0 +1,247 @@
+# File: backend/profiles/suggest.py
+# Typeahead suggestions - an in-process sorted array of normalized prefixes
+# (business names and "City, ST" labels) searched with bisect, so a keystroke
+# never reaches the database
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+
+from .models import BusinessProfile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUGGEST_DEFAULTS = {
+    'LIMIT': 8,               # Suggestions returned by default
+    'MAX_LIMIT': 20,
+    'MAX_ENTRIES': 200000,    # Index size cap; past it new names aren't added
+    'MAX_AGE': 300,           # Seconds before a background rebuild picks up other processes' changes
+    'SCAN': 64,               # Prefix matches considered before ranking
+    'NAME_WORDS': 4,          # A name is also found by its 2nd..Nth word
+}
+
+BUSINESS = 'business'
+CITY = 'city'
+
+
+def get_suggest_settings():
+    conf = dict(PROFILE_SUGGEST_DEFAULTS)
+    conf.update(getattr(settings, 'PROFILE_SUGGEST', {}))
+    return conf
+
+
+def normalize(text):
+    """Lowercase, accents stripped, punctuation collapsed to single spaces"""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r'[\W_]+', ' ', text.casefold()).strip()
+
+
+def _city_label(city, state):
+    city = (city or '').strip()
+    state = (state or '').strip()
+    if not city:
+        return ''
+    return f'{city}, {state}' if state else city
+
+
+class SuggestionIndex:
+    """
+    Sorted list of (key, label, kind, word) tuples, word being the position
+    the key starts at in the label. A lookup is one bisect plus a short
+    forward scan; insert/remove keep the list sorted in place.
+    Each label carries a reference count (how many profiles produced it),
+    which also ranks suggestions.
+    """
+
+    def __init__(self, max_entries, name_words):
+        self.max_entries = max_entries
+        self.name_words = name_words
+        self.built_at = 0.0
+        self._entries = []
+        self._counts = {}      # (label, kind) -> profiles using it
+        self._profiles = {}    # profile id -> (name, city label) it was indexed with
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _keys(self, label, kind):
+        """[(key, word)] a label is found by"""
+        key = normalize(label)
+        if not key:
+            return []
+        if kind == CITY:
+            return [(key, 0)]
+        words = key.split(' ')
+        return [(' '.join(words[i:]), i) for i in range(min(len(words), self.name_words))]
+
+    def _add(self, label, kind):
+        if not label:
+            return
+        ref = (label, kind)
+        if ref in self._counts:
+            self._counts[ref] += 1
+            return
+        keys = self._keys(label, kind)
+        if not keys or len(self._entries) + len(keys) > self.max_entries:
+            return
+        self._counts[ref] = 1
+        for key, word in keys:
+            insort(self._entries, (key, label, kind, word))
+
+    def _remove(self, label, kind):
+        ref = (label, kind)
+        count = self._counts.get(ref)
+        if count is None:
+            return
+        if count > 1:
+            self._counts[ref] = count - 1
+            return
+        del self._counts[ref]
+        for key, word in self._keys(label, kind):
+            entry = (key, label, kind, word)
+            index = bisect_left(self._entries, entry)
+            if index < len(self._entries) and self._entries[index] == entry:
+                del self._entries[index]
+
+    def update(self, profile_id, name, city_label):
+        """Index or re-index one profile; pass name=None to drop it"""
+        with self._lock:
+            previous = self._profiles.pop(profile_id, None)
+            if previous is not None:
+                self._remove(previous[0], BUSINESS)
+                self._remove(previous[1], CITY)
+            if name is not None:
+                self._add(name, BUSINESS)
+                self._add(city_label, CITY)
+                self._profiles[profile_id] = (name, city_label)
+
+    def remove(self, profile_id):
+        self.update(profile_id, None, None)
+
+    def load(self, rows):
+        """Replace the contents with (profile_id, name, city, state) rows"""
+        entries = set()
+        counts = {}
+        profiles = {}
+        truncated = False
+        for profile_id, name, city, state in rows:
+            name = (name or '').strip()
+            city_label = _city_label(city, state)
+            profiles[profile_id] = (name, city_label)
+            for label, kind in ((name, BUSINESS), (city_label, CITY)):
+                if not label:
+                    continue
+                ref = (label, kind)
+                if ref in counts:
+                    counts[ref] += 1
+                    continue
+                keys = self._keys(label, kind)
+                if len(entries) + len(keys) > self.max_entries:
+                    truncated = True
+                    continue
+                counts[ref] = 1
+                entries.update((key, label, kind, word) for key, word in keys)
+        if truncated:
+            logger.warning(f'Suggestion index capped at {self.max_entries} entries')
+
+        entries = sorted(entries)
+        with self._lock:
+            self._entries = entries
+            self._counts = counts
+            self._profiles = profiles
+            self.built_at = time.monotonic()
+
+    def lookup(self, prefix, limit, scan):
+        """Labels whose key (or a later word of a name) starts with prefix"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        entries = self._entries
+        counts = self._counts
+        index = bisect_left(entries, (prefix,))
+
+        seen = set()
+        candidates = []
+        for key, label, kind, word in entries[index:index + scan]:
+            if not key.startswith(prefix):
+                break
+            if (label, kind) in seen:
+                continue
+            seen.add((label, kind))
+            # Matches on the first word before later words, then popularity
+            candidates.append((word > 0, -counts.get((label, kind), 0), key, label, kind))
+        candidates.sort()
+        return [{'label': label, 'type': kind} for _, _, _, label, kind in candidates[:limit]]
+
+
+def _active_rows():
+    return BusinessProfile.objects.filter(is_active=True, is_complete=True).values_list(
+        'id', 'business_name', 'city', 'state'
+    ).iterator(chunk_size=2000)
+
+
+_index = None
+_index_lock = threading.Lock()
+_rebuilding = threading.Event()
+
+
+def _rebuild(index):
+    try:
+        index.load(_active_rows())
+    except Exception:
+        logger.exception('Rebuilding the suggestion index failed')
+        # Back off for another MAX_AGE rather than retrying on every lookup
+        index.built_at = time.monotonic()
+    finally:
+        _rebuilding.clear()
+        # This thread's database connection isn't managed by a request
+        connection.close()
+
+
+def get_suggestion_index():
+    """
+    The process-wide index, built on first use. Saves in this process update
+    it immediately; after MAX_AGE a background rebuild picks up the rest while
+    lookups keep using the current copy.
+    """
+    global _index
+    conf = get_suggest_settings()
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = SuggestionIndex(conf['MAX_ENTRIES'], conf['NAME_WORDS'])
+                index.load(_active_rows())
+                _index = index
+    elif time.monotonic() - _index.built_at > conf['MAX_AGE'] and not _rebuilding.is_set():
+        _rebuilding.set()
+        threading.Thread(target=_rebuild, args=(_index,), name='suggest-rebuild', daemon=True).start()
+    return _index
+
+
+def suggest(prefix, limit=None):
+    conf = get_suggest_settings()
+    limit = min(limit or conf['LIMIT'], conf['MAX_LIMIT'])
+    return get_suggestion_index().lookup(prefix, limit, conf['SCAN'])
+
+
+def profile_changed(profile):
+    """Signal hook - only touches an index that has already been built"""
+    if _index is None:
+        return
+    if profile.is_active and profile.is_complete:
+        _index.update(profile.pk, (profile.business_name or '').strip(), _city_label(profile.city, profile.state))
+    else:
+        _index.remove(profile.pk)
+
+
+def profile_deleted(profile_id):
+    if _index is not None:
+        _index.remove(profile_id)
@@ -0,0 +1,90 @@
+# File: backend/profiles/tests/base.py
+# Fixtures shared by the profiles test modules
+
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..models import BusinessProfile
+
+User = get_user_model()
+
+
+def make_profile(name='Ace Plumbing', **fields):
+    """A complete, searchable profile; fields override the defaults"""
+    username = fields.pop('username', name.lower().replace(' ', '-'))
+    user = User.objects.create_user(
+        email=f'{username}@example.com', username=username, password='Str0ng!pass'
+    )
+    values = {
+        'business_name': name,
+        'business_phone': '555-0100',
+        'business_email': f'{username}@example.com',
+        'address_line1': '1 Main St',
+        'city': 'Springfield',
+        'state': 'IL',
+        'zip_code': '62701',
+        'latitude': Decimal('39.800000'),
+        'longitude': Decimal('-89.650000'),
+        'service_radius': 25,
+        'pricing_mode': 'hourly',
+        'hourly_rate': Decimal('80.00'),
+    }
+    values.update(fields)
+    return BusinessProfile.objects.create(user=user, **values)
+
+
+def quoted(*prices):
+    """Fields for a quoted-pricing profile with one package per price"""
+    return {
+        'pricing_mode': 'quoted',
+        'quote_packages': [
+            {'name': f'Package {n}', 'description': '', 'price': str(price)}
+            for n, price in enumerate(prices, start=1)
+        ],
+    }
+
+
+def image_file(name='photo.png', color=(200, 40, 40), image_format='PNG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+class MediaRootMixin:
+    """Point MEDIA_ROOT at a temporary directory for each test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+def square(min_lng, min_lat, max_lng, max_lat):
+    return {'type': 'Polygon', 'coordinates': [[
+        [min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat],
+        [min_lng, max_lat], [min_lng, min_lat],
+    ]]}
+
+
+def open_on(day, start, end):
+    return {'availability_schedule': {day: {'enabled': True, 'start_time': start, 'end_time': end}}}
+
+
+class ProfileSearchTestCase(TestCase):
+    """Runs public searches through the API"""
+
+    def search(self, **params):
+        """Result ids in response order"""
+        response = self.client.get('/api/v1/profiles/search/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [result['id'] for result in response.json()['results']]
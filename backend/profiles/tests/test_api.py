@@ -0,0 +1,94 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.utils.crypto import get_random_string
+from rest_framework.test import APIClient
+
+from ..models import GalleryImage
+from ..querysets import assert_max_queries
+from .base import MediaRootMixin, image_file, make_profile
+
+
+class ProfileEndpointQueryTests(TestCase):
+    # Pagination count, profiles, gallery images, service packages
+    LIST_BUDGET = 4
+    # Profile, gallery images, service packages
+    DETAIL_BUDGET = 3
+
+    def setUp(self):
+        self.profile = make_profile()
+        self.client = APIClient()
+        self.client.force_authenticate(self.profile.user)
+
+    def _add_images(self, count):
+        for order in range(count):
+            GalleryImage.objects.create(
+                profile=self.profile, image=f'gallery/{self.profile.pk}-{order}.jpg', order=order
+            )
+
+    def _assert_budgets(self, images):
+        with assert_max_queries(self.LIST_BUDGET):
+            response = self.client.get('/api/v1/profiles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results'][0]['gallery_images']), images)
+
+        with assert_max_queries(self.DETAIL_BUDGET):
+            response = self.client.get(f'/api/v1/profiles/{self.profile.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['gallery_images']), images)
+
+    def test_one_gallery_image(self):
+        self._add_images(1)
+        self._assert_budgets(1)
+
+    def test_many_gallery_images(self):
+        self._add_images(6)
+        self._assert_budgets(6)
+
+
+class GalleryUploadTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile = make_profile()
+        self.url = f'/api/v1/profiles/{self.profile.pk}/upload-images/'
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.force_login(self.profile.user)
+
+    def _post(self, files, csrf=True):
+        headers = {}
+        if csrf:
+            token = get_random_string(32)
+            self.client.cookies['csrftoken'] = token
+            headers['HTTP_X_CSRFTOKEN'] = token
+        return self.client.post(self.url, {'images': files}, **headers)
+
+    def test_session_upload_is_csrf_checked_after_the_handler_is_installed(self):
+        response = self._post([image_file()])
+        self.assertEqual(response.status_code, 201, response.content)
+        image = GalleryImage.objects.get(profile=self.profile)
+        self.assertEqual(response.json()['files'][0]['id'], image.pk)
+        self.assertIn(image.sha256, image.image.name)
+        self.assertTrue(image.image.storage.exists(image.image.name))
+
+    def test_missing_csrf_token_is_refused(self):
+        response = self._post([image_file()], csrf=False)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(GalleryImage.objects.exists())
+
+    def test_invalid_and_duplicate_files_are_rejected_per_file(self):
+        not_an_image = SimpleUploadedFile('notes.png', b'plain text', content_type='image/png')
+        response = self._post([image_file(), image_file('copy.png'), not_an_image])
+        self.assertEqual(response.status_code, 201)
+        statuses = [(entry['name'], entry['status'], entry.get('error')) for entry in response.json()['files']]
+        self.assertEqual(statuses, [
+            ('photo.png', 'created', None),
+            ('copy.png', 'rejected', 'Already in the gallery.'),
+            ('notes.png', 'rejected', 'Not a valid image.'),
+        ])
+        self.assertEqual(GalleryImage.objects.filter(profile=self.profile).count(), 1)
+
+    @override_settings(GALLERY_UPLOADS={'MAX_IMAGES': 1})
+    def test_gallery_quota_is_applied_while_streaming(self):
+        response = self._post([image_file(), image_file('blue.png', color=(0, 0, 200))])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['files'][1]['error'], 'Gallery image limit reached.')
+        self.assertEqual(GalleryImage.objects.filter(profile=self.profile).count(), 1)
@@ -0,0 +1,61 @@
+from importlib import import_module
+
+from django.test import TestCase
+
+from ..availability import available_profile_ids, compile_schedule
+from ..models import AvailabilityIndex
+from .base import ProfileSearchTestCase, make_profile, open_on
+
+
+class AvailabilityIndexTests(TestCase):
+    def test_schedule_compiles_to_whole_slots(self):
+        bitmaps = compile_schedule({'monday': {'enabled': True, 'start_time': '09:10', 'end_time': '10:00'}})
+        # 09:15-10:00: three 15-minute slots from slot 37
+        self.assertEqual(bitmaps['monday_am'], 0b111 << 37)
+        self.assertEqual(sum(1 for value in bitmaps.values() if value), 1)
+
+    def test_overnight_hours_continue_into_the_next_day(self):
+        bitmaps = compile_schedule({'sunday': {'enabled': True, 'start_time': '23:30', 'end_time': '00:30'}})
+        self.assertEqual(bitmaps['sunday_pm'], 0b11 << 46)
+        self.assertEqual(bitmaps['monday_am'], 0b11)
+
+    def test_migration_backfill_slots(self):
+        migration = import_module('profiles.migrations.0013_availability_index')
+        bitmaps = migration._compile_schedule({
+            'monday': {'enabled': True, 'start_time': '09:10', 'end_time': '10:00'},
+            'sunday': {'enabled': True, 'start_time': '23:30', 'end_time': '00:30'},
+            'tuesday': {'enabled': True, 'start_time': 'noon', 'end_time': '13:00'},
+            'friday': {'enabled': False, 'start_time': '09:00', 'end_time': '17:00'},
+        })
+        self.assertEqual(bitmaps['monday_am'], 0b111 << 37 | 0b11)
+        self.assertEqual(bitmaps['sunday_pm'], 0b11 << 46)
+        self.assertEqual(sum(1 for value in bitmaps.values() if value), 2)
+
+    def test_index_follows_the_profile(self):
+        profile = make_profile(**open_on('monday', '09:00', '17:00'))
+        self.assertTrue(AvailabilityIndex.objects.filter(profile=profile).exists())
+        profile.availability_schedule = {}
+        profile.save()
+        self.assertFalse(AvailabilityIndex.objects.filter(profile=profile).exists())
+
+
+class AvailabilitySearchTests(ProfileSearchTestCase):
+    def test_window_must_be_fully_free(self):
+        morning = make_profile('Ace Plumbing', **open_on('monday', '09:00', '11:00'))
+        self.assertEqual(self.search(available_day='monday', available_from='09:00', available_until='10:30'), [morning.pk])
+        self.assertEqual(self.search(available_day='monday', available_from='08:00', available_until='10:00'), [])
+        self.assertEqual(self.search(available_day='tuesday', available_from='09:00'), [])
+
+    def test_day_only_matches_any_free_time_that_day(self):
+        morning = make_profile('Ace Plumbing', **open_on('monday', '09:00', '11:00'))
+        evening = make_profile('Best Electric', **open_on('monday', '18:00', '20:00'))
+        make_profile('Cool Air', **open_on('tuesday', '09:00', '17:00'))
+        self.assertCountEqual(self.search(available_day='monday'), [morning.pk, evening.pk])
+
+    def test_hidden_profiles_are_not_available(self):
+        shown = make_profile('Ace Plumbing', **open_on('monday', '09:00', '17:00'))
+        make_profile('Best Electric', is_active=False, **open_on('monday', '09:00', '17:00'))
+        make_profile('Cool Air', hourly_rate=None, **open_on('monday', '09:00', '17:00'))
+        self.assertEqual(AvailabilityIndex.objects.count(), 3)
+        self.assertEqual(list(available_profile_ids('monday', '10:00').values_list('profile_id', flat=True)), [shown.pk])
+        self.assertEqual(self.search(available_day='monday'), [shown.pk])
@@ -0,0 +1,140 @@
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import models as profile_models
+from ..models import BusinessProfile
+from .base import make_profile
+
+
+class CompletionSyncTests(TestCase):
+    def setUp(self):
+        self.profile = make_profile()
+        self.user = self.profile.user
+
+    def _user_writes(self, queries):
+        return [q['sql'] for q in queries if q['sql'].startswith('UPDATE "users_user"')]
+
+    def _completed(self):
+        self.user.refresh_from_db(fields=['profile_completed'])
+        return self.user.profile_completed
+
+    def test_user_row_is_written_only_when_completion_flips(self):
+        self.assertTrue(self._completed())
+
+        self.profile.certifications = 'Licensed'
+        with CaptureQueriesContext(connection) as queries:
+            self.profile.save()
+        self.assertEqual(self._user_writes(queries), [])
+
+        self.profile.business_phone = ''
+        with mock.patch.object(profile_models, 'invalidate_auth_status') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+                self.profile.save()
+        self.assertEqual(len(self._user_writes(queries)), 1)
+        invalidate.assert_called_once_with(self.user.pk)
+        self.assertFalse(self._completed())
+
+    def test_update_fields_save_of_an_unscored_field_leaves_completion_alone(self):
+        self.profile.address_line2 = 'Suite 4'
+        with CaptureQueriesContext(connection) as queries:
+            self.profile.save(update_fields=['address_line2'])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('completion_percentage', queries[0]['sql'])
+
+        self.profile.business_phone = ''
+        self.profile.save(update_fields=['business_phone'])
+        stored = BusinessProfile.objects.get(pk=self.profile.pk)
+        self.assertFalse(stored.is_complete)
+        self.assertFalse(self._completed())
+
+    def test_bulk_update_recomputes_completion_and_syncs_users(self):
+        other = make_profile('Best Electric')
+        for profile in (self.profile, other):
+            profile.business_phone = ''
+        BusinessProfile.objects.bulk_update([self.profile, other], ['business_phone'])
+
+        stored = BusinessProfile.objects.filter(pk__in=[self.profile.pk, other.pk])
+        self.assertEqual({profile.is_complete for profile in stored}, {False})
+        self.assertEqual(
+            set(type(self.user).objects.filter(pk__in=[self.user.pk, other.user_id])
+                .values_list('profile_completed', flat=True)),
+            {False}
+        )
+        # Flip tracking follows the bulk write, so a later save doesn't resync
+        self.profile.certifications = 'Licensed'
+        with CaptureQueriesContext(connection) as queries:
+            self.profile.save()
+        self.assertEqual(self._user_writes(queries), [])
+
+    def test_bulk_update_of_unscored_fields_is_untouched(self):
+        self.profile.address_line2 = 'Suite 4'
+        with CaptureQueriesContext(connection) as queries:
+            BusinessProfile.objects.bulk_update([self.profile], ['address_line2'])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('is_complete', queries[0]['sql'])
+
+
+class CompletionBackfillTests(TestCase):
+    def _stale(self, *profiles):
+        BusinessProfile.objects.filter(pk__in=[p.pk for p in profiles]).update(
+            completion_percentage=0, missing_fields=0
+        )
+
+    def _stored(self, profile):
+        return BusinessProfile.objects.filter(pk=profile.pk).values_list(
+            'is_complete', 'completion_percentage', 'missing_fields'
+        ).get()
+
+    def test_missing_fields_bitmask(self):
+        profile = make_profile(business_phone='', hourly_rate=None)
+        self.assertEqual(
+            profile.missing_fields,
+            profile_models.MISSING_FIELD_BITS['business_phone'] | profile_models.MISSING_FIELD_BITS['hourly_rate']
+        )
+        self.assertEqual(profile.get_missing_field_labels(), ['Business Phone', 'Hourly Rate'])
+        self.assertEqual(
+            list(BusinessProfile.objects.filter(
+                missing_fields=profile_models.MISSING_FIELD_BITS['business_phone']
+                | profile_models.MISSING_FIELD_BITS['hourly_rate']
+            ).values_list('pk', flat=True)),
+            [profile.pk]
+        )
+
+    def test_migration_backfill_matches_the_model_rules(self):
+        migration = import_module('profiles.migrations.0008_completion_score')
+        profiles = [
+            make_profile('Ace Plumbing'),
+            make_profile('Best Electric', business_phone='', certifications='Licensed'),
+            make_profile('Cool Air', pricing_mode='quoted', quote_packages=[]),
+            make_profile('Dry Roofing', available_immediately=True, zip_code=''),
+        ]
+        expected = [self._stored(profile) for profile in profiles]
+        self._stale(*profiles)
+
+        migration.backfill_completion(apps, None)
+        self.assertEqual([self._stored(profile) for profile in profiles], expected)
+
+    def test_command_fixes_stale_rows_and_user_flags(self):
+        current = make_profile('Ace Plumbing')
+        stale = make_profile('Best Electric')
+        self._stale(stale)
+        # As after a raw SQL import
+        BusinessProfile.objects.filter(pk=current.pk).update(is_complete=False)
+        type(current.user).objects.filter(pk=current.user_id).update(profile_completed=False)
+
+        out = StringIO()
+        call_command('recompute_profile_completion', '--dry-run', stdout=out)
+        self.assertIn('2 profiles checked, 2 out of date', out.getvalue())
+        self.assertEqual(self._stored(stale)[1:], (0, 0))
+
+        call_command('recompute_profile_completion', '--batch-size=1', stdout=StringIO())
+        self.assertEqual(self._stored(stale), (True, stale.completion_percentage, 0))
+        self.assertTrue(self._stored(current)[0])
+        self.assertTrue(type(current.user).objects.get(pk=current.user_id).profile_completed)
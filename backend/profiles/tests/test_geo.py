@@ -0,0 +1,84 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from .. import geo
+from ..models import AdminBoundary, CoverageCell, ServiceCoverage
+from .base import make_profile, square
+
+
+class CoveringProfilesTests(TestCase):
+    def test_shared_boundary_is_tested_once(self):
+        AdminBoundary.objects.create(
+            kind='town', name='Springfield', state='IL', geometry=square(-90, 39.5, -89.5, 40),
+            min_lat=39.5, min_lng=-90, max_lat=40, max_lng=-89.5,
+        )
+        first = make_profile('Ace Plumbing', service_area_type='town')
+        second = make_profile('Best Electric', service_area_type='town')
+
+        with mock.patch.object(geo, 'point_in_geometry', wraps=geo.point_in_geometry) as tested:
+            matches = geo.covering_profiles(39.7, -89.7)
+        self.assertEqual({profile_id for profile_id, _ in matches}, {first.pk, second.pk})
+        self.assertEqual(tested.call_count, 1)
+
+    def test_only_searchable_profiles_are_returned(self):
+        shown = make_profile('Ace Plumbing')
+        make_profile('Best Electric', is_active=False)
+        make_profile('Cool Air', hourly_rate=None)
+        self.assertEqual([profile_id for profile_id, _ in geo.covering_profiles(39.8, -89.65)], [shown.pk])
+
+    @override_settings(GEO_SEARCH={'MAX_CANDIDATES': 1})
+    def test_cap_keeps_the_nearest_candidates(self):
+        make_profile('Ace Plumbing', latitude=Decimal('39.900000'))
+        near = make_profile('Best Electric', latitude=Decimal('39.810000'))
+        with self.assertLogs('profiles.geo', 'WARNING'):
+            matches = geo.covering_profiles(39.8, -89.65)
+        self.assertEqual([profile_id for profile_id, _ in matches], [near.pk])
+
+
+class GridFallbackTests(TestCase):
+    def setUp(self):
+        # As on a database without R*Tree or GiST support
+        grid = mock.patch.dict(geo._spatial_backend, {connection.alias: 'grid'})
+        grid.start()
+        self.addCleanup(grid.stop)
+
+    def test_cells_cover_the_whole_box(self):
+        cells = geo.cells_for_box(39.4, -90.1, 40.2, -89.2, size=0.5)
+        self.assertEqual(len(cells), 3 * 3)
+        self.assertIn(geo.cell_for(39.4, -90.1, size=0.5), cells)
+        self.assertIn(geo.cell_for(40.2, -89.2, size=0.5), cells)
+        self.assertNotIn(geo.cell_for(40.6, -89.2, size=0.5), cells)
+
+    def test_search_uses_coverage_cells(self):
+        profile = make_profile('Ace Plumbing', service_radius=25)
+        cells = set(CoverageCell.objects.filter(profile=profile).values_list('cell', flat=True))
+        coverage = ServiceCoverage.objects.get(profile=profile)
+        self.assertEqual(cells, set(geo.cells_for_box(
+            coverage.min_lat, coverage.min_lng, coverage.max_lat, coverage.max_lng
+        )))
+
+        # 20 miles north is in another cell but inside the radius
+        north = 39.8 + 20 / geo.MILES_PER_DEGREE_LAT
+        self.assertNotEqual(geo.cell_for(north, -89.65), geo.cell_for(39.8, -89.65))
+        self.assertEqual([match[0] for match in geo.covering_profiles(north, -89.65)], [profile.pk])
+        # In the box's cells but outside the circle
+        self.assertEqual(geo.covering_profiles(coverage.max_lat - 0.01, coverage.max_lng - 0.01), [])
+
+        CoverageCell.objects.filter(profile=profile).delete()
+        self.assertEqual(geo.covering_profiles(north, -89.65), [])
+
+    def test_moving_the_profile_replaces_its_cells(self):
+        profile = make_profile('Ace Plumbing', service_radius=5)
+        profile.latitude = Decimal('45.500000')
+        profile.longitude = Decimal('-100.250000')
+        profile.save()
+
+        self.assertEqual(geo.covering_profiles(39.8, -89.65), [])
+        self.assertEqual([match[0] for match in geo.covering_profiles(45.5, -100.25)], [profile.pk])
+        self.assertNotIn(
+            geo.cell_for(39.8, -89.65),
+            CoverageCell.objects.filter(profile=profile).values_list('cell', flat=True)
+        )
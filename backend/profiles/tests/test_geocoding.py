@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from .. import geocoding
+from ..models import BusinessProfile, ZipCentroid
+from .base import make_profile
+
+
+class GeocodeCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.cache = geocoding.GeocodeCache(os.path.join(directory, 'cache.sqlite3'), negative_ttl=60)
+
+    def test_hits_and_misses_round_trip(self):
+        self.cache.set_many({'zip:62701': (39.8, -89.65), 'zip:00000': None})
+        self.assertEqual(
+            self.cache.get_many(['zip:62701', 'zip:00000', 'zip:99999']),
+            {'zip:62701': (39.8, -89.65), 'zip:00000': None}
+        )
+        self.assertIs(self.cache.get('zip:99999'), False)
+
+    def test_misses_expire_and_can_be_cleared(self):
+        self.cache.set_many({'zip:62701': (39.8, -89.65), 'zip:00000': None})
+        with mock.patch('time.time', return_value=time.time() + 120):
+            self.assertEqual(self.cache.get_many(['zip:62701', 'zip:00000']), {'zip:62701': (39.8, -89.65)})
+
+        self.assertEqual(self.cache.clear_misses(), 1)
+        self.assertEqual(self.cache.get_many(['zip:00000']), {})
+
+
+class GeocodingPipelineTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        conf = override_settings(GEOCODING={'CACHE_PATH': os.path.join(directory, 'cache.sqlite3')})
+        conf.enable()
+        self.addCleanup(conf.disable)
+        for name in ('_cache', '_provider'):
+            patcher = mock.patch.object(geocoding, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        ZipCentroid.objects.create(
+            zip_code='62704', latitude=Decimal('39.770000'), longitude=Decimal('-89.680000'),
+            city='Springfield', state='IL',
+        )
+
+    def _pending(self, name):
+        return make_profile(name, zip_code='62704', latitude=None, longitude=None)
+
+    def test_one_provider_lookup_per_address_then_cache_hits(self):
+        first = self._pending('Ace Plumbing')
+        second = self._pending('Best Electric')
+        self.assertEqual(BusinessProfile.objects.get(pk=first.pk).geocode_status, 'pending')
+
+        provider = geocoding.get_provider()
+        with mock.patch.object(provider, 'geocode_batch', wraps=provider.geocode_batch) as lookup:
+            self.assertEqual(geocoding.geocode_pending(), (2, 0, 0))
+        self.assertEqual(lookup.call_count, 1)
+        self.assertEqual(len(lookup.call_args.args[0]), 1)
+
+        located = BusinessProfile.objects.get(pk=second.pk)
+        self.assertEqual((located.latitude, located.longitude), (Decimal('39.770000'), Decimal('-89.680000')))
+        self.assertEqual(located.geocode_status, 'done')
+
+        # The same address on a new profile is resolved on save from the cache
+        third = self._pending('Cool Air')
+        third.refresh_from_db()
+        self.assertEqual(third.geocode_status, 'done')
+        self.assertEqual(third.latitude, Decimal('39.770000'))
+
+    def test_address_changed_during_the_lookup_is_not_overwritten(self):
+        profile = self._pending('Ace Plumbing')
+        fetched = BusinessProfile.objects.get(pk=profile.pk)
+
+        BusinessProfile.objects.filter(pk=profile.pk).update(zip_code='62701')
+        self.assertFalse(geocoding._apply(fetched, geocoding.address_key(fetched), (39.77, -89.68)))
+        self.assertIsNone(BusinessProfile.objects.get(pk=profile.pk).latitude)
+        # The worker picks it up again under the new address
+        self.assertEqual(geocoding.geocode_pending(), (1, 0, 0))
+
+    def test_update_fields_save_writes_the_geocoding_columns(self):
+        geocoding.get_geocode_cache().set_many({'zip:62704|springfield|il': (39.77, -89.68)})
+        profile = make_profile('Ace Plumbing')
+
+        profile.zip_code = '62704'
+        profile.save(update_fields=['zip_code'])
+        stored = BusinessProfile.objects.get(pk=profile.pk)
+        self.assertEqual(stored.geocode_status, 'done')
+        self.assertEqual((stored.latitude, stored.longitude), (Decimal('39.770000'), Decimal('-89.680000')))
+
+        # Not cached: the new address is queued for the worker
+        profile.zip_code = '62799'
+        profile.save(update_fields=['zip_code'])
+        self.assertEqual(BusinessProfile.objects.get(pk=profile.pk).geocode_status, 'pending')
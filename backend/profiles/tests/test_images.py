@@ -0,0 +1,114 @@
+import os
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.test import TestCase
+from PIL import Image
+
+from .. import images
+from ..models import BusinessProfile, GalleryImage
+from .base import MediaRootMixin, make_profile
+
+
+class ImageVariantTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile = make_profile()
+
+    def _store(self, name, size=(1000, 500), mode='RGB', image_format='JPEG', **save_args):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.new(mode, size, (200, 40, 40)).save(path, image_format, **save_args)
+        return name
+
+    def _gallery_image(self, name):
+        return GalleryImage.objects.create(profile=self.profile, image=name)
+
+    def test_sizes_are_never_upscaled_and_metadata_is_dropped(self):
+        exif = Image.Exif()
+        exif[images.ORIENTATION_TAG] = 6  # Rotated 90 degrees
+        source = self._store('gallery/rotated.jpg', exif=exif)
+
+        entry = images.render_variants(source)
+        self.assertEqual((entry['width'], entry['height']), (500, 1000))
+        sizes = {size: (variant['width'], variant['height']) for size, variant in entry['sizes'].items()}
+        self.assertEqual(sizes, {'thumb': (100, 200), 'card': (300, 600), 'full': (500, 1000)})
+
+        with default_storage.open(entry['sizes']['thumb']['jpeg']) as fh, Image.open(fh) as thumb:
+            self.assertEqual(thumb.size, (100, 200))
+            self.assertEqual(dict(thumb.getexif()), {})
+        written = [
+            name for variant in entry['sizes'].values()
+            for key, name in variant.items() if key in ('jpeg', 'webp')
+        ]
+        stored = [name for name in images.variant_names(source) if default_storage.exists(name)]
+        self.assertCountEqual(written, stored)
+
+    def test_transparent_png_gets_a_white_jpeg_background(self):
+        source = self._store('gallery/clear.png', size=(40, 40), mode='RGBA', image_format='PNG')
+        entry = images.render_variants(source)
+        with default_storage.open(entry['sizes']['thumb']['jpeg']) as fh, Image.open(fh) as thumb:
+            self.assertEqual(thumb.mode, 'RGB')
+
+    def test_pending_images_are_rendered_or_failed(self):
+        good = self._gallery_image(self._store('gallery/good.jpg'))
+        broken = self._gallery_image('gallery/missing.jpg')
+        self.assertEqual(good.variants_status, 'pending')
+
+        self.assertEqual(images.process_pending_images(), (2, 1))
+        good.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual((good.variants_status, good.width, good.height), ('done', 1000, 500))
+        self.assertEqual(broken.variants_status, 'failed')
+        self.assertEqual(images.process_pending_images(), (0, 0))
+
+    def test_identical_sources_are_rendered_once(self):
+        source = self._store('gallery/shared.jpg')
+        first = self._gallery_image(source)
+        second = self._gallery_image(source)
+        with mock.patch.object(images, 'render_variants', wraps=images.render_variants) as render:
+            self.assertEqual(images.process_pending_images(), (2, 0))
+        self.assertEqual(render.call_count, 1)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.variants, second.variants)
+
+    def test_image_replaced_while_rendering_keeps_its_new_job(self):
+        image = self._gallery_image(self._store('gallery/old.jpg'))
+        replacement = self._store('gallery/new.jpg')
+        render = images.render_variants
+
+        def replace_then_render(source):
+            entry = render(source)
+            GalleryImage.objects.filter(pk=image.pk).update(image=replacement)
+            return entry
+
+        with mock.patch.object(images, 'render_variants', replace_then_render):
+            self.assertEqual(images.process_pending_images(), (0, 0))
+        image.refresh_from_db()
+        self.assertEqual(image.variants_status, 'pending')
+        self.assertFalse(image.variants)
+
+        self.assertEqual(images.process_pending_images(), (1, 0))
+        image.refresh_from_db()
+        self.assertEqual(image.variants['source'], replacement)
+
+    def test_profile_logo_replaced_while_rendering_is_not_overwritten(self):
+        self.profile.business_logo = self._store('logos/old.png', image_format='PNG')
+        self.profile.save()
+        self.assertEqual(self.profile.image_variants_status, 'pending')
+        replacement = self._store('logos/new.png', image_format='PNG')
+        render = images.render_variants
+
+        def replace_then_render(source):
+            entry = render(source)
+            BusinessProfile.objects.filter(pk=self.profile.pk).update(business_logo=replacement)
+            return entry
+
+        with mock.patch.object(images, 'render_variants', replace_then_render):
+            self.assertEqual(images.process_pending_images(), (0, 0))
+        self.assertEqual(BusinessProfile.objects.get(pk=self.profile.pk).image_variants_status, 'pending')
+
+        self.assertEqual(images.process_pending_images(), (1, 0))
+        stored = BusinessProfile.objects.get(pk=self.profile.pk)
+        self.assertEqual(stored.image_variants['business_logo']['source'], replacement)
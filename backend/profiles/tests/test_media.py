@@ -0,0 +1,116 @@
+import hashlib
+import os
+import tempfile
+from unittest import mock
+
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+
+from ..media import add_references, collect_garbage
+from ..models import MediaBlob
+from ..storage import media_storage
+from .base import MediaRootMixin
+
+
+class CollectGarbageTests(MediaRootMixin, TestCase):
+    NAME = 'gallery/ab/cd/' + 'abcd' * 16 + '.png'
+
+    def setUp(self):
+        super().setUp()
+        self.storage = media_storage()
+        path = self.storage.path(self.NAME)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as fh:
+            fh.write(b'png')
+        old = timezone.now().timestamp() - 7200
+        os.utime(path, (old, old))
+        MediaBlob.objects.create(name=self.NAME, size=3, ref_count=0)
+        MediaBlob.objects.filter(name=self.NAME).update(updated_at=timezone.now() - timezone.timedelta(hours=2))
+
+    def test_unreferenced_file_is_deleted(self):
+        self.assertEqual(collect_garbage(), (1, 3))
+        self.assertFalse(self.storage.exists(self.NAME))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_file_uploaded_again_after_the_rows_are_deleted_is_kept(self):
+        delete = QuerySet.delete
+
+        def delete_then_reupload(queryset):
+            result = delete(queryset)
+            # Same content saved and referenced between the commit and the file delete
+            self.storage.save_local_file(self.NAME, self._incoming_copy(), 'abcd' * 16)
+            add_references([self.NAME])
+            return result
+
+        with mock.patch.object(QuerySet, 'delete', delete_then_reupload):
+            self.assertEqual(collect_garbage(), (0, 0))
+        self.assertTrue(self.storage.exists(self.NAME))
+        self.assertEqual(MediaBlob.objects.get(name=self.NAME).ref_count, 1)
+
+    def _incoming_copy(self):
+        fd, path = tempfile.mkstemp(dir=self.storage.incoming_dir())
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(b'png')
+        return path
+
+
+class ServeMediaTests(MediaRootMixin, TestCase):
+    CONTENT = b'0123456789abcdef'
+
+    def setUp(self):
+        super().setUp()
+        sha256 = hashlib.sha256(self.CONTENT).hexdigest()
+        self.etag = f'"{sha256[:32]}"'
+        self.original = f'gallery/{sha256[:2]}/{sha256[2:4]}/{sha256}.png'
+        self.variant = f'variants/gallery/{sha256[:2]}/{sha256[2:4]}/{sha256}_thumb.webp'
+        for name in (self.original, self.variant, '.incoming/upload.png'):
+            path = os.path.join(self.media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as fh:
+                fh.write(self.CONTENT)
+
+    def _get(self, name, **headers):
+        response = self.client.get(f'/media/{name}', **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_only_content_addressed_originals_are_immutable(self):
+        response = self._get(self.original)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+
+        # Re-rendered under the same name when image settings change
+        response = self._get(self.variant)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(response['ETag'], self.etag)
+
+    def test_conditional_get(self):
+        self.assertEqual(self._get(self.original, HTTP_IF_NONE_MATCH=self.etag).status_code, 304)
+        self.assertEqual(self._get(self.original, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_byte_ranges(self):
+        response = self._get(self.original, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/16')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+        response = self._get(self.original, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'def')
+
+        response = self._get(self.original, HTTP_RANGE='bytes=16-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */16')
+
+    def test_range_is_ignored_when_if_range_names_another_version(self):
+        response = self._get(self.original, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=self.etag)
+        self.assertEqual(response.status_code, 206)
+        response = self._get(self.original, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+
+    def test_dot_directories_are_not_served(self):
+        self.assertEqual(self._get('.incoming/upload.png').status_code, 404)
+        self.assertEqual(self._get('../etc/passwd').status_code, 404)
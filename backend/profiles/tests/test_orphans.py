@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from .. import orphans
+from ..images import variant_names
+from ..models import GalleryImage
+from ..orphans import ReferenceFilter, collect_orphans, purge_quarantine
+from .base import MediaRootMixin, make_profile
+
+
+class ReferenceFilterTests(TestCase):
+    def test_added_names_are_always_found_and_false_positives_are_rare(self):
+        references = ReferenceFilter(5000)
+        added = [f'gallery/{n:064x}.jpg' for n in range(5000)]
+        for name in added:
+            references.add(name)
+        self.assertTrue(all(name in references for name in added))
+
+        unseen = [f'gallery/{n:064x}.png' for n in range(20000)]
+        false_positives = sum(1 for name in unseen if name in references)
+        self.assertLess(false_positives, 20000 * 0.005)
+
+
+class CollectOrphansTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.quarantine_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.quarantine_dir)
+        gc = override_settings(MEDIA_GC={'QUARANTINE_DIR': self.quarantine_dir, 'GRACE_PERIOD': 3600})
+        gc.enable()
+        self.addCleanup(gc.disable)
+
+        self.kept = 'gallery/kept.jpg'
+        GalleryImage.objects.create(profile=make_profile(), image=self.kept)
+        self.variant = variant_names(self.kept)[0]
+        self.orphan = 'gallery/ab/cd/orphan.jpg'
+        self.stale_variant = 'variants/gallery/gone_thumb.webp'
+        self.fresh = 'gallery/uploading.jpg'
+        for name in (self.kept, self.variant, self.orphan, self.stale_variant):
+            self._write(name, age=7200)
+        self._write(self.fresh, age=0)
+
+    def _write(self, name, age):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(b'12345')
+        then = time.time() - age
+        os.utime(path, (then, then))
+
+    def _exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def test_only_old_unreferenced_files_are_deleted(self):
+        self.assertEqual(collect_orphans(dry_run=True), (2, 10))
+        self.assertTrue(self._exists(self.orphan))
+
+        self.assertEqual(collect_orphans(batch_size=1), (2, 10))
+        self.assertFalse(self._exists(self.orphan))
+        self.assertFalse(self._exists(self.stale_variant))
+        for name in (self.kept, self.variant, self.fresh):
+            self.assertTrue(self._exists(name), name)
+
+    def test_file_referenced_after_the_filter_was_built_is_kept(self):
+        build = orphans.build_reference_filter
+
+        def build_then_reference():
+            references = build()
+            GalleryImage.objects.create(profile=GalleryImage.objects.get().profile, image=self.orphan)
+            return references
+
+        with mock.patch.object(orphans, 'build_reference_filter', build_then_reference):
+            self.assertEqual(collect_orphans(), (1, 5))
+        self.assertTrue(self._exists(self.orphan))
+        self.assertFalse(self._exists(self.stale_variant))
+
+    def test_quarantined_files_are_moved_then_purged(self):
+        self.assertEqual(collect_orphans(quarantine=True), (2, 10))
+        moved = os.path.join(self.quarantine_dir, self.orphan)
+        self.assertTrue(os.path.exists(moved))
+        self.assertFalse(self._exists(self.orphan))
+
+        self.assertEqual(purge_quarantine(days=1), (0, 0))
+        old = time.time() - 2 * 86400
+        os.utime(moved, (old, old))
+        self.assertEqual(purge_quarantine(days=1, dry_run=True), (1, 5))
+        self.assertEqual(purge_quarantine(days=1), (1, 5))
+        self.assertFalse(os.path.exists(os.path.dirname(moved)))
+        self.assertTrue(os.path.exists(os.path.join(self.quarantine_dir, self.stale_variant)))
@@ -0,0 +1,78 @@
+from decimal import Decimal
+from importlib import import_module
+
+from django.test import TestCase, override_settings
+
+from ..models import BusinessProfile, ServicePackage
+from ..packages import sync_packages
+from .base import ProfileSearchTestCase, make_profile, quoted
+
+
+class ServicePackageSyncTests(TestCase):
+    def _rows(self, profile):
+        return list(
+            ServicePackage.objects.filter(profile=profile, position__isnull=False)
+            .order_by('position').values_list('position', 'price', 'is_active')
+        )
+
+    def test_rows_follow_quote_packages(self):
+        profile = make_profile(**quoted('120', '80.5'))
+        self.assertEqual(self._rows(profile), [(0, Decimal('120.00'), True), (1, Decimal('80.50'), True)])
+
+        profile.quote_packages = [{'name': 'Package 1', 'description': '', 'price': '99'}]
+        profile.save()
+        self.assertEqual(self._rows(profile), [(0, Decimal('99.00'), True)])
+
+        # Packages only count while the profile quotes
+        profile.pricing_mode = 'hourly'
+        profile.hourly_rate = Decimal('70.00')
+        profile.save()
+        self.assertEqual(self._rows(profile), [(0, Decimal('99.00'), False)])
+
+    def test_rows_are_active_when_quoting_alongside_hourly(self):
+        profile = make_profile(**{**quoted('120'), 'pricing_mode': 'both'})
+        self.assertEqual(self._rows(profile), [(0, Decimal('120.00'), True)])
+
+    def test_unchanged_packages_write_nothing_and_manual_rows_are_kept(self):
+        profile = make_profile(**quoted('50'))
+        ServicePackage.objects.create(profile=profile, name='Manual', description='', price=Decimal('10'))
+        with self.assertNumQueries(1):
+            self.assertEqual(sync_packages(profile), (0, 0, 0))
+        profile.quote_packages = []
+        self.assertEqual(sync_packages(profile), (0, 0, 1))
+        self.assertTrue(ServicePackage.objects.filter(profile=profile, name='Manual').exists())
+
+
+class PackagePriceSearchTests(ProfileSearchTestCase):
+    def test_cheapest_matching_package_first(self):
+        pricey = make_profile('Ace Plumbing', **quoted('300', '150'))
+        cheap = make_profile('Best Electric', **quoted('90'))
+        make_profile('Cool Air', **quoted('500'))
+        self.assertEqual(self.search(min_price='80', max_price='200'), [cheap.pk, pricey.pk])
+
+    @override_settings(PROFILE_SEARCH={'MAX_RESULTS': 1})
+    def test_hidden_profiles_are_excluded_before_the_limit(self):
+        inactive = make_profile('Ace Plumbing', is_active=False, **quoted('10'))
+        incomplete = make_profile('Best Electric', business_phone='', **quoted('20'))
+        shown = make_profile('Cool Air', **quoted('30'))
+        self.assertFalse(BusinessProfile.objects.get(pk=incomplete.pk).is_complete)
+        self.assertTrue(ServicePackage.objects.filter(profile=inactive, is_active=True).exists())
+        self.assertEqual(self.search(max_price='100'), [shown.pk])
+
+
+class PackageMigrationTests(TestCase):
+    def test_backfill_rows(self):
+        migration = import_module('profiles.migrations.0012_service_package_sync')
+        packages = [
+            {'name': 'Drain', 'description': 'Clear', 'price': '80.555', 'duration': '1h'},
+            {'name': 'Free', 'price': 0, 'is_active': False},
+            {'name': 'Bad', 'price': 'call us'},
+            {'name': 'Huge', 'price': '1000000'},
+            'not a package',
+        ]
+        rows = migration._package_rows(packages, 'both')
+        self.assertEqual(rows, {
+            0: {'name': 'Drain', 'description': 'Clear', 'price': Decimal('80.56'), 'duration': '1h', 'is_active': True},
+            1: {'name': 'Free', 'description': '', 'price': Decimal('0.00'), 'duration': '', 'is_active': False},
+        })
+        self.assertFalse(migration._package_rows(packages, 'hourly')[0]['is_active'])
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from .. import search
+from ..models import BusinessProfile, ProfileSearchDocument
+from .base import make_profile, quoted
+
+
+class NativeSearchBackendTests(TestCase):
+    """FTS5 on SQLite, tsvector on PostgreSQL"""
+
+    def _ids(self, query, **kwargs):
+        return [profile_id for profile_id, _ in search.search_profiles(query, **kwargs)]
+
+    def test_every_word_matches_as_a_prefix(self):
+        plumber = make_profile('Ace Plumbing', certifications='Licensed master plumber')
+        make_profile('Best Electric', certifications='Licensed electrician')
+        self.assertEqual(self._ids('plumb'), [plumber.pk])
+        self.assertEqual(self._ids('LICENSED plumb'), [plumber.pk])
+        self.assertEqual(self._ids('licensed roofer'), [])
+        self.assertEqual(self._ids('  ?! '), [])
+
+    def test_quote_packages_and_edits_are_indexed(self):
+        profile = make_profile('Ace Plumbing', **quoted('120'))
+        profile.quote_packages[0]['name'] = 'Water heater install'
+        profile.save()
+        self.assertEqual(self._ids('heater'), [profile.pk])
+
+        profile.business_name = 'Ace Drains'
+        profile.save()
+        self.assertEqual(self._ids('plumbing'), [])
+        self.assertEqual(self._ids('drains'), [profile.pk])
+        self.assertFalse(search.index_profile(profile))
+
+    def test_hidden_profiles_only_match_when_asked(self):
+        hidden = make_profile('Ace Plumbing', is_active=False)
+        self.assertEqual(self._ids('ace'), [])
+        self.assertEqual(self._ids('ace', active_only=False), [hidden.pk])
+
+    def test_limit(self):
+        for name in ('Ace Plumbing', 'Best Plumbing', 'Cool Plumbing'):
+            make_profile(name)
+        self.assertEqual(len(self._ids('plumbing', limit=2)), 2)
+
+    def test_name_matches_rank_above_detail_matches(self):
+        if search.search_backend() == 'basic':
+            self.skipTest('the basic backend does not rank')
+        in_details = make_profile('Best Electric', certifications='Plumbing certified')
+        in_title = make_profile('Ace Plumbing')
+        self.assertEqual(self._ids('plumbing'), [in_title.pk, in_details.pk])
+
+
+class BasicSearchBackendTests(NativeSearchBackendTests):
+    """icontains fallback for databases without a full-text index"""
+
+    def setUp(self):
+        basic = mock.patch.dict(search._search_backend, {connection.alias: 'basic'})
+        basic.start()
+        self.addCleanup(basic.stop)
+
+    def test_documents_are_kept_without_an_index(self):
+        profile = make_profile('Ace Plumbing')
+        self.assertEqual(search.search_backend(), 'basic')
+        self.assertEqual(
+            ProfileSearchDocument.objects.get(profile=profile).title, 'Ace Plumbing'
+        )
+        BusinessProfile.objects.filter(pk=profile.pk).delete()
+        self.assertEqual(self._ids('ace'), [])
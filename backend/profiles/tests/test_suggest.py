@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from .. import suggest
+from ..suggest import BUSINESS, CITY, SuggestionIndex
+from .base import make_profile
+
+
+class SuggestionIndexTests(TestCase):
+    def setUp(self):
+        self.index = SuggestionIndex(max_entries=100, name_words=4)
+
+    def _labels(self, prefix, limit=8):
+        return [(entry['label'], entry['type']) for entry in self.index.lookup(prefix, limit, scan=64)]
+
+    def test_shared_labels_are_reference_counted(self):
+        self.index.update(1, 'Ace Plumbing', 'Springfield, IL')
+        self.index.update(2, 'Best Electric', 'Springfield, IL')
+
+        self.index.remove(1)
+        self.assertEqual(self._labels('spring'), [('Springfield, IL', CITY)])
+        self.assertEqual(self._labels('ace'), [])
+        self.index.remove(2)
+        self.assertEqual(self._labels('spring'), [])
+        self.assertEqual(len(self.index), 0)
+
+    def test_reindexing_drops_the_old_name(self):
+        self.index.update(1, 'Ace Plumbing', 'Springfield, IL')
+        self.index.update(1, 'Ace Drains', 'Springfield, IL')
+        self.assertEqual(self._labels('ace'), [('Ace Drains', BUSINESS)])
+        self.assertEqual(self._labels('plumb'), [])
+        # Removing twice is harmless
+        self.index.remove(1)
+        self.index.remove(1)
+        self.assertEqual(len(self.index), 0)
+
+    def test_first_word_matches_then_popularity(self):
+        self.index.update(1, 'Plumbing Pros', 'Dayton, OH')
+        self.index.update(2, 'Ace Plumbing', 'Dayton, OH')
+        self.index.update(3, 'Plumb Perfect', 'Dayton, OH')
+        self.index.update(4, 'Plumb Perfect', 'Akron, OH')
+        self.assertEqual(self._labels('plumb'), [
+            ('Plumb Perfect', BUSINESS),
+            ('Plumbing Pros', BUSINESS),
+            ('Ace Plumbing', BUSINESS),
+        ])
+        self.assertEqual(self._labels('plumb', limit=1), [('Plumb Perfect', BUSINESS)])
+
+    def test_prefixes_are_normalized(self):
+        self.index.update(1, 'Café Ölé, LLC', 'Saint-Louis, MO')
+        self.assertEqual(self._labels('CAFE OL'), [('Café Ölé, LLC', BUSINESS)])
+        self.assertEqual(self._labels('saint l'), [('Saint-Louis, MO', CITY)])
+        self.assertEqual(self._labels(' !? '), [])
+
+    def test_load_matches_incremental_updates(self):
+        rows = [
+            (1, 'Ace Plumbing', 'Springfield', 'IL'),
+            (2, 'Ace Plumbing', 'Peoria', 'IL'),
+            (3, 'Best Electric', '', ''),
+        ]
+        for profile_id, name, city, state in rows:
+            self.index.update(profile_id, name, suggest._city_label(city, state))
+        loaded = SuggestionIndex(max_entries=100, name_words=4)
+        loaded.load(rows)
+        self.assertEqual(loaded._entries, self.index._entries)
+        self.assertEqual(loaded._counts, self.index._counts)
+
+    def test_entries_are_capped(self):
+        index = SuggestionIndex(max_entries=3, name_words=4)
+        index.update(1, 'Ace Plumbing', 'Springfield, IL')
+        index.update(2, 'Best Electric', '')
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.lookup('best', 8, 64), [])
+
+
+class SuggestEndpointTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(suggest, '_index', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _suggest(self, prefix):
+        response = self.client.get('/api/v1/profiles/suggest/', {'q': prefix})
+        self.assertEqual(response.status_code, 200)
+        return [entry['label'] for entry in response.json()['suggestions']]
+
+    def test_lookups_skip_the_database_and_follow_saves(self):
+        profile = make_profile('Ace Plumbing')
+        make_profile('Best Electric', is_active=False)
+        self.assertEqual(self._suggest('ace'), ['Ace Plumbing'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._suggest('best'), [])
+
+        profile.business_name = 'Ace Drains'
+        profile.save()
+        self.assertEqual(self._suggest('ace'), ['Ace Drains'])
+        profile.delete()
+        self.assertEqual(self._suggest('ace'), [])
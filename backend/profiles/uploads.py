@@ -0,0 +1,326 @@
+# File: backend/profiles/uploads.py
+# Streaming gallery uploads - files are written to storage chunk by chunk
+# while being hashed, checked against the profile's quota as they arrive, and
+# turned into GalleryImage rows in one bulk insert
+
+import hashlib
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.db import transaction
+from django.db.models import Count, Sum
+from PIL import Image
+
+from .media import add_references
+from .models import GalleryImage
+from .storage import ContentAddressedStorage
+
+GALLERY_UPLOADS_DEFAULTS = {
+    'FIELD_NAME': 'images',
+    'MAX_FILE_SIZE': 10 * 1024 * 1024,         # Bytes per image
+    'MAX_FILES_PER_REQUEST': 20,
+    'MAX_IMAGES': 50,                          # Gallery images per profile
+    'MAX_TOTAL_BYTES': 200 * 1024 * 1024,      # Gallery bytes per profile
+    'FORMATS': ('JPEG', 'PNG', 'WEBP', 'GIF'),  # Pillow format names accepted
+    'CACHE_ALIAS': 'default',                  # Where progress is published
+    'PROGRESS_INTERVAL': 512 * 1024,           # Bytes between progress updates
+    'PROGRESS_TIMEOUT': 600,                   # Seconds progress stays readable
+}
+
+UPLOAD_ID_PATTERN = re.compile(r'^[\w-]{1,64}$')
+
+
+def get_upload_settings():
+    conf = dict(GALLERY_UPLOADS_DEFAULTS)
+    conf.update(getattr(settings, 'GALLERY_UPLOADS', {}))
+    return conf
+
+
+def gallery_usage(profile):
+    """(images, bytes) a profile's gallery uses, from the stored file sizes"""
+    usage = GalleryImage.objects.filter(profile=profile).aggregate(
+        images=Count('id'), size=Sum('file_size')
+    )
+    return usage['images'], usage['size'] or 0
+
+
+def check_gallery_quota(profile, count, size):
+    """Error message if adding count files of size bytes goes over quota, else None"""
+    conf = get_upload_settings()
+    images, used = gallery_usage(profile)
+    if images + count > conf['MAX_IMAGES']:
+        return f'A gallery holds at most {conf["MAX_IMAGES"]} images ({images} already uploaded).'
+    if used + size > conf['MAX_TOTAL_BYTES']:
+        return f'Gallery storage limit of {conf["MAX_TOTAL_BYTES"] // (1024 * 1024)} MB reached.'
+    return None
+
+
+# Progress
+
+def _progress_key(profile_id, upload_id):
+    return f'gallery-upload:{profile_id}:{upload_id}'
+
+
+def get_upload_progress(profile_id, upload_id):
+    conf = get_upload_settings()
+    return caches[conf['CACHE_ALIAS']].get(_progress_key(profile_id, upload_id))
+
+
+# Handler
+
+class StoredUpload(UploadedFile):
+    """An upload GalleryUploadHandler has already written to storage"""
+
+    def __init__(self, storage_name, name, content_type, size, sha256):
+        super().__init__(file=None, name=name, content_type=content_type, size=size)
+        self.storage_name = storage_name
+        self.sha256 = sha256
+
+    def delete(self):
+        storage = GalleryImage._meta.get_field('image').storage
+        # Content-addressed files may be shared; collect_media removes them
+        if not isinstance(storage, ContentAddressedStorage):
+            storage.delete(self.storage_name)
+
+
+class GalleryUploadHandler(FileUploadHandler):
+    """
+    Replaces Django's memory/temp-file handlers for a gallery upload.
+    Each file goes straight to its final place in storage and is hashed on
+    the way (content-addressed storage renames it to its hash at the end,
+    other non-filesystem storages get a temp file copied in).
+    Over-quota, oversized, duplicate and non-image files are dropped, and
+    the rest arrive in request.FILES as StoredUploads. Per-file results are
+    in .results and, with an upload_id, published for get_upload_progress.
+    """
+
+    def __init__(self, request, profile, upload_id=None):
+        super().__init__(request)
+        self.conf = get_upload_settings()
+        self.profile = profile
+        self.upload_id = upload_id
+        self.results = []
+
+        images, used = gallery_usage(profile)
+        self.images_left = min(self.conf['MAX_IMAGES'] - images, self.conf['MAX_FILES_PER_REQUEST'])
+        self.bytes_left = self.conf['MAX_TOTAL_BYTES'] - used
+        self.known_hashes = set(
+            GalleryImage.objects.filter(profile=profile).exclude(sha256='').values_list('sha256', flat=True)
+        )
+
+        self.storage = GalleryImage._meta.get_field('image').storage
+        self.request_length = None   # Content-Length of the whole request
+        self.received = 0
+        self._reported_at = 0
+        self._reset()
+
+    def _reset(self):
+        self.current = None        # Result entry of the file being received
+        self.destination = None    # Open file the chunks are written to
+        self.storage_name = None   # Name in storage
+        self.temp_path = None      # Temp file (non-filesystem storages)
+        self.digest = None
+
+    # Progress
+
+    def report(self, status='uploading', force=False):
+        if not self.upload_id:
+            return
+        if not force and self.received - self._reported_at < self.conf['PROGRESS_INTERVAL']:
+            return
+        self._reported_at = self.received
+        caches[self.conf['CACHE_ALIAS']].set(
+            _progress_key(self.profile.pk, self.upload_id),
+            {
+                'status': status,
+                'received': self.received,
+                'total': self.request_length,
+                'files': self.results,
+            },
+            self.conf['PROGRESS_TIMEOUT']
+        )
+
+    def _reject(self, error):
+        self.current.update(status='rejected', error=error)
+        self._discard()
+        self.report(force=True)
+        raise SkipFile(error)
+
+    # Destination
+
+    def _open_destination(self, file_name):
+        field = GalleryImage._meta.get_field('image')
+        name = field.generate_filename(None, file_name)
+        if isinstance(self.storage, ContentAddressedStorage):
+            # Named by the hash once it's known; same filesystem, so a rename
+            fd, self.temp_path = tempfile.mkstemp(dir=self.storage.incoming_dir(), suffix='.upload')
+            self.destination = os.fdopen(fd, 'wb')
+            self.storage_name = name
+            return
+        if not isinstance(self.storage, FileSystemStorage):
+            fd, self.temp_path = tempfile.mkstemp(dir=settings.FILE_UPLOAD_TEMP_DIR, suffix='.upload')
+            self.destination = os.fdopen(fd, 'wb')
+            self.storage_name = name
+            return
+
+        # Claim the name with O_EXCL so concurrent uploads can't share it
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+        while True:
+            name = self.storage.get_available_name(name)
+            path = self.storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                fd = os.open(path, flags, 0o666)
+            except FileExistsError:
+                continue
+            break
+        if self.storage.file_permissions_mode is not None:
+            os.chmod(path, self.storage.file_permissions_mode)
+        self.destination = os.fdopen(fd, 'wb')
+        self.storage_name = name
+
+    def _discard(self):
+        if self.destination is not None:
+            self.destination.close()
+        if self.temp_path:
+            os.unlink(self.temp_path)
+        elif self.storage_name:
+            self.storage.delete(self.storage_name)
+        self._reset()
+
+    def _image_error(self, fh):
+        try:
+            with Image.open(fh) as image:
+                image_format = image.format
+                image.verify()
+        except Exception:
+            return 'Not a valid image.'
+        if image_format not in self.conf['FORMATS']:
+            return f'{image_format} images are not accepted.'
+        return None
+
+    # FileUploadHandler
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request_length = content_length
+        self.report(force=True)
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        if field_name != self.conf['FIELD_NAME']:
+            raise SkipFile()
+        self.current = {'name': file_name, 'status': 'uploading', 'received': 0}
+        self.results.append(self.current)
+        if self.images_left <= 0:
+            self._reject('Gallery image limit reached.')
+        self._open_destination(file_name)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.current is None:
+            return None
+        size = start + len(raw_data)
+        self.received += len(raw_data)
+        self.current['received'] = size
+        if size > self.conf['MAX_FILE_SIZE']:
+            self._reject(f'Larger than {self.conf["MAX_FILE_SIZE"] // (1024 * 1024)} MB.')
+        if size > self.bytes_left:
+            self._reject('Gallery storage limit reached.')
+        self.destination.write(raw_data)
+        self.digest.update(raw_data)
+        self.report()
+        return None
+
+    def file_complete(self, file_size):
+        if self.current is None:
+            return None
+        self.destination.close()
+        sha256 = self.digest.hexdigest()
+        current = self.current
+
+        if sha256 in self.known_hashes:
+            error = 'Already in the gallery.'
+        elif self.temp_path:
+            with open(self.temp_path, 'rb') as fh:
+                error = self._image_error(fh)
+        else:
+            with self.storage.open(self.storage_name, 'rb') as fh:
+                error = self._image_error(fh)
+        if error:
+            current.update(status='rejected', error=error)
+            self._discard()
+            self.report(force=True)
+            return None
+
+        if isinstance(self.storage, ContentAddressedStorage):
+            self.storage_name = self.storage.save_local_file(self.storage_name, self.temp_path, sha256)
+        elif self.temp_path:
+            with open(self.temp_path, 'rb') as fh:
+                self.storage_name = self.storage.save(self.storage_name, File(fh))
+            os.unlink(self.temp_path)
+
+        upload = StoredUpload(self.storage_name, self.file_name, self.content_type, file_size, sha256)
+        self.known_hashes.add(sha256)
+        self.images_left -= 1
+        self.bytes_left -= file_size
+        current['status'] = 'received'
+        self._reset()
+        self.report(force=True)
+        return upload
+
+    def upload_interrupted(self):
+        if self.current is not None and self.destination is not None:
+            self.current.update(status='rejected', error='Upload interrupted.')
+            self._discard()
+        self.report('interrupted', force=True)
+
+
+# Rows
+
+def _file_sha256(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def add_gallery_images(profile, files, caption=''):
+    """
+    Create the GalleryImage rows for uploaded files in one transaction.
+    StoredUploads are already in storage; other UploadedFiles are written
+    by the insert. Returns the new images.
+    """
+    files = list(files)
+    images = [
+        GalleryImage(
+            profile=profile,
+            image=upload.storage_name if isinstance(upload, StoredUpload) else upload,
+            caption=caption,
+            file_size=upload.size,
+            sha256=upload.sha256 if isinstance(upload, StoredUpload) else _file_sha256(upload),
+        )
+        for upload in files
+    ]
+    if not images:
+        return []
+    try:
+        with transaction.atomic():
+            GalleryImage.objects.bulk_create(images)
+            # bulk_create sends no post_save
+            add_references(image.image.name for image in images)
+    except Exception:
+        for upload in files:
+            if isinstance(upload, StoredUpload):
+                upload.delete()
+        raise
+    for image in images:
+        image._loaded_media = {'image': image.image.name}
+    return images
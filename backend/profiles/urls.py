@@ -2,12 +2,16 @@
 # ------------------------------
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BusinessProfileViewSet
+from .views import BusinessProfileViewSet, ProfileSearchView, profile_suggestions
 
 router = DefaultRouter()
 router.register('profiles', BusinessProfileViewSet, basename='profile')
 
 urlpatterns = [
+    # Ahead of the router so these aren't taken as a profile pk
+    path('profiles/search/', ProfileSearchView.as_view(), name='profile-search'),
+    path('profiles/suggest/', profile_suggestions, name='profile-suggest'),
+
     path('', include(router.urls)),
     
     # Legacy endpoints for backward compatibility
@@ -1,25 +1,99 @@
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.response import Response
-from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import (
+    action, api_view, authentication_classes, permission_classes, renderer_classes
+)
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.authentication import SessionAuthentication
 from django.shortcuts import get_object_or_404
+from users.authentication import StatelessJWTAuthentication
+from .availability import available_profile_ids, window_masks
+from .geo import covering_profiles, get_geo_settings
 from .models import BusinessProfile, GalleryImage, ServicePackage
+from .packages import (
+    packages_in_price_range, parse_price, profiles_by_package_price
+)
+from .querysets import SerializerRelatedMixin
+from .search import get_search_settings, search_profiles
+from .suggest import suggest
+from .uploads import (
+    UPLOAD_ID_PATTERN, GalleryUploadHandler, add_gallery_images, get_upload_progress
+)
 from .serializers import (
     BusinessProfileSerializer, 
     BusinessProfileCreateSerializer,
     BusinessProfileUpdateSerializer,
-    GalleryImageSerializer
+    GalleryImageSerializer,
+    ProfileSearchResultSerializer
 )
 
-class BusinessProfileViewSet(viewsets.ModelViewSet):
+class DeferredCsrfSessionAuthentication(SessionAuthentication):
+    """
+    Session auth whose CSRF check is left to the view (check_csrf). The check
+    reads request.POST, which for a streamed upload has to wait until the
+    view has installed its upload handler.
+    """
+
+    def enforce_csrf(self, request):
+        return
+
+    def check_csrf(self, request):
+        super().enforce_csrf(request)
+
+
+def price_range(params):
+    """(min_price, max_price) from query params, either may be None"""
+    bounds = []
+    for name in ('min_price', 'max_price'):
+        raw = params.get(name)
+        if raw in (None, ''):
+            bounds.append(None)
+            continue
+        try:
+            bounds.append(parse_price(raw))
+        except ValueError:
+            raise ValidationError({name: 'A non-negative price is required.'})
+    if None not in bounds and bounds[0] > bounds[1]:
+        raise ValidationError({'max_price': 'Must not be less than min_price.'})
+    return tuple(bounds)
+
+
+def availability_window(params):
+    """
+    (day, from, until) from available_day / available_from / available_until,
+    or None when no availability filter was asked for. Without times, from
+    and until are None: free at any time that day.
+    """
+    day = params.get('available_day')
+    if not day:
+        return None
+    start = params.get('available_from') or None
+    end = params.get('available_until') or None
+    if start is None and end is not None:
+        # From midnight
+        start = '00:00'
+    window = (day, start, end)
+    try:
+        window_masks(*window)
+    except ValueError as e:
+        raise ValidationError({'available_day': str(e)})
+    return window
+
+
+class BusinessProfileViewSet(SerializerRelatedMixin, viewsets.ModelViewSet):
     """
     Enhanced ViewSet for managing business profiles
     """
     serializer_class = BusinessProfileSerializer
     permission_classes = [IsAuthenticated]
+    # Owner checks only need the user id, which the token already carries
+    authentication_classes = [StatelessJWTAuthentication, SessionAuthentication]
 
     def get_queryset(self):
-        return BusinessProfile.objects.filter(user=self.request.user)
+        return BusinessProfile.objects.filter(user_id=self.request.user.pk)
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -29,12 +103,12 @@ class BusinessProfileViewSet(viewsets.ModelViewSet):
         return BusinessProfileSerializer
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.pk)
 
     def create(self, request, *args, **kwargs):
         """Enhanced create with better error handling"""
         # Check if user already has a profile
-        existing_profile = BusinessProfile.objects.filter(user=request.user).first()
+        existing_profile = BusinessProfile.objects.filter(user_id=request.user.pk).first()
         if existing_profile:
             return Response({
                 'error': 'Profile already exists',
@@ -58,7 +132,7 @@ class BusinessProfileViewSet(viewsets.ModelViewSet):
     def get_my_profile(self, request):
         """Get the current user's profile"""
         try:
-            profile = BusinessProfile.objects.get(user=request.user)
+            profile = self.filter_queryset(self.get_queryset()).get()
             serializer = self.get_serializer(profile)
             return Response(serializer.data)
         except BusinessProfile.DoesNotExist:
@@ -70,7 +144,7 @@ class BusinessProfileViewSet(viewsets.ModelViewSet):
     def update_my_profile(self, request):
         """Update the current user's profile"""
         try:
-            profile = BusinessProfile.objects.get(user=request.user)
+            profile = BusinessProfile.objects.get(user_id=request.user.pk)
             partial = request.method == 'PATCH'
             serializer = BusinessProfileUpdateSerializer(
                 profile, 
@@ -105,31 +179,69 @@ class BusinessProfileViewSet(viewsets.ModelViewSet):
                     'details': serializer.errors
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=['post'], url_path='upload-images')
+    def _upload_id(self, request):
+        upload_id = request.query_params.get('upload_id')
+        if upload_id is not None and not UPLOAD_ID_PATTERN.match(upload_id):
+            raise ValidationError({'upload_id': 'Up to 64 letters, digits, "-" or "_".'})
+        return upload_id
+
+    @action(
+        detail=True, methods=['post'], url_path='upload-images',
+        authentication_classes=[StatelessJWTAuthentication, DeferredCsrfSessionAuthentication],
+    )
     def upload_images(self, request, pk=None):
-        """Upload gallery images for a profile"""
+        """
+        Upload gallery images for a profile
+        Files are streamed to storage as they arrive; pass ?upload_id=<id>
+        to follow per-file progress at upload-progress/?upload_id=<id>.
+        """
         profile = self.get_object()
-        
-        uploaded_files = request.FILES.getlist('images')
+        handler = GalleryUploadHandler(request._request, profile, self._upload_id(request))
+        # Has to be in place before request.data/FILES is first read, so
+        # session requests are CSRF-checked only now (the check reads the body)
+        request._request.upload_handlers = [handler]
+        authenticator = request.successful_authenticator
+        if isinstance(authenticator, DeferredCsrfSessionAuthentication):
+            try:
+                authenticator.check_csrf(request)
+            except PermissionDenied:
+                for upload in request.FILES.getlist(handler.conf['FIELD_NAME']):
+                    upload.delete()
+                raise
+
+        uploaded_files = request.FILES.getlist(handler.conf['FIELD_NAME'])
         if not uploaded_files:
+            handler.report('failed', force=True)
             return Response({
-                'error': 'No images provided'
+                'error': 'No images accepted' if handler.results else 'No images provided',
+                'files': handler.results
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        created_images = []
-        for image_file in uploaded_files:
-            gallery_image = GalleryImage.objects.create(
-                profile=profile,
-                image=image_file,
-                caption=request.data.get('caption', '')
-            )
-            created_images.append(GalleryImageSerializer(gallery_image).data)
+        images = add_gallery_images(profile, uploaded_files, request.data.get('caption', ''))
+        created_images = GalleryImageSerializer(images, many=True).data
+        received = [result for result in handler.results if result['status'] == 'received']
+        for result, image in zip(received, images):
+            result.update(status='created', id=image.pk)
+        handler.report('complete', force=True)
 
         return Response({
             'message': f'Uploaded {len(created_images)} images',
-            'images': created_images
+            'images': created_images,
+            'files': handler.results
         }, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['get'], url_path='upload-progress')
+    def upload_progress(self, request, pk=None):
+        """Progress of an upload-images request started with ?upload_id=<id>"""
+        profile = self.get_object()
+        upload_id = self._upload_id(request)
+        progress = get_upload_progress(profile.pk, upload_id) if upload_id else None
+        if progress is None:
+            return Response({
+                'error': 'Upload not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response(progress)
+
     @action(detail=True, methods=['delete'], url_path='images/(?P<image_id>[^/.]+)')
     def delete_image(self, request, pk=None, image_id=None):
         """Delete a specific gallery image"""
@@ -159,28 +271,186 @@ class BusinessProfileViewSet(viewsets.ModelViewSet):
 
     def _get_missing_fields(self, profile):
         """Get list of missing required fields"""
-        missing = []
-        
-        required_fields = {
-            'business_name': 'Business Name',
-            'business_phone': 'Business Phone',
-            'business_email': 'Business Email',
-            'address_line1': 'Street Address',
-            'city': 'City',
-            'state': 'State',
-            'zip_code': 'ZIP Code',
-            'service_radius': 'Service Radius',
-            'pricing_mode': 'Pricing Mode',
-        }
-        
-        for field, label in required_fields.items():
-            if not getattr(profile, field):
-                missing.append(label)
-        
-        # Check pricing-specific requirements
-        if profile.pricing_mode == 'hourly' and not profile.hourly_rate:
-            missing.append('Hourly Rate')
-        elif profile.pricing_mode == 'quoted' and not profile.quote_packages:
-            missing.append('Quote Packages')
-            
-        return missing
\ No newline at end of file
+        # Stored as a bitmask on save, no need to re-check every field
+        return profile.get_missing_field_labels()
+
+
+class ProfileSearchPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        conf = get_geo_settings()
+        self.page_size = conf['PAGE_SIZE']
+        self.max_page_size = conf['MAX_PAGE_SIZE']
+
+
+class ProfileSearchView(generics.ListAPIView):
+    """
+    Public search for tradespeople by location, text, package price, or any mix
+    GET /api/v1/profiles/search/?lat=<lat>&lng=<lng>&q=<words>&min_price=<$>&max_price=<$>
+    Location-only results are nearest first, text results best match first,
+    price-only results cheapest matching package first.
+    Availability: available_day=<monday-sunday>, optionally available_from
+    and available_until (HH:MM, past midnight if until is earlier); without
+    times, any time that day.
+    Optional: min_completion=<0-100>, ordering=-completion_percentage
+    (or completion_percentage) to sort by profile completion instead.
+    """
+    ORDERINGS = ('completion_percentage', '-completion_percentage')
+    serializer_class = ProfileSearchResultSerializer
+    pagination_class = ProfileSearchPagination
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def _coordinate(self, name, limit):
+        raw = self.request.query_params.get(name)
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({name: 'A numeric value is required.'})
+        if not -limit <= value <= limit:
+            raise ValidationError({name: f'Must be between -{limit} and {limit}.'})
+        return value
+
+    def get_queryset(self):
+        fields = [name for name in ProfileSearchResultSerializer.Meta.fields if name != 'distance_miles']
+        return BusinessProfile.objects.only(*fields)
+
+    def _matches(self):
+        """[(profile_id, distance_miles or None)] in result order"""
+        params = self.request.query_params
+        query = params.get('q', '').strip()
+        located = 'lat' in params or 'lng' in params
+        min_price, max_price = price_range(params)
+        priced = min_price is not None or max_price is not None
+        window = availability_window(params)
+        limit = get_search_settings()['MAX_RESULTS']
+        if query or located:
+            matches = self._located_or_text(query, located)
+            if priced:
+                matches = self._by_price(matches, min_price, max_price)
+        elif priced:
+            ranked = profiles_by_package_price(min_price, max_price, limit=None if window else limit)
+            matches = [(profile_id, None) for profile_id, _ in ranked]
+        elif window is not None:
+            available = available_profile_ids(*window).order_by('profile_id').values_list('profile_id', flat=True)
+            return [(profile_id, None) for profile_id in available[:limit]]
+        else:
+            raise ValidationError({
+                'q': 'Provide a search term, a location (lat and lng), a price range, availability, or a mix.'
+            })
+
+        if window is not None:
+            matches = self._by_availability(matches, window)
+            if not (query or located):
+                matches = matches[:limit]
+        return matches
+
+    def _located_or_text(self, query, located):
+        covering = None
+        if located:
+            covering = covering_profiles(self._coordinate('lat', 90), self._coordinate('lng', 180))
+            if not query:
+                return covering
+
+        if covering is None:
+            ranked = search_profiles(query, limit=get_search_settings()['MAX_RESULTS'])
+            return [(profile_id, None) for profile_id, _ in ranked]
+        distances = dict(covering)
+        return [
+            (profile_id, distances[profile_id])
+            for profile_id, _ in search_profiles(query) if profile_id in distances
+        ]
+
+    def _by_price(self, matches, min_price, max_price):
+        """Keep matches with an active package in the price range"""
+        ids = [profile_id for profile_id, _ in matches]
+        priced = set()
+        for start in range(0, len(ids), 500):
+            # Answered from the (is_active, price, profile) index
+            priced.update(
+                packages_in_price_range(min_price, max_price)
+                .filter(profile_id__in=ids[start:start + 500]).order_by().values_list('profile_id', flat=True)
+            )
+        return [match for match in matches if match[0] in priced]
+
+    def _by_availability(self, matches, window):
+        """Keep matches free for the whole availability window"""
+        ids = [profile_id for profile_id, _ in matches]
+        available = set()
+        for start in range(0, len(ids), 500):
+            # Bitwise test on the slot bitmaps, no schedule JSON is read
+            available.update(
+                available_profile_ids(*window).filter(profile_id__in=ids[start:start + 500])
+                .values_list('profile_id', flat=True)
+            )
+        return [match for match in matches if match[0] in available]
+
+    def _by_completion(self, matches):
+        """Apply min_completion and completion ordering to the matches"""
+        params = self.request.query_params
+        ordering = params.get('ordering')
+        if ordering is not None and ordering not in self.ORDERINGS:
+            raise ValidationError({'ordering': f'Must be one of: {", ".join(self.ORDERINGS)}.'})
+        minimum = params.get('min_completion')
+        if minimum is not None:
+            try:
+                minimum = int(minimum)
+            except ValueError:
+                raise ValidationError({'min_completion': 'A whole number is required.'})
+        if ordering is None and not minimum:
+            return matches
+
+        # Stored column, so one indexed lookup per chunk of matches
+        ids = [profile_id for profile_id, _ in matches]
+        scores = {}
+        for start in range(0, len(ids), 500):
+            scores.update(
+                BusinessProfile.objects.filter(pk__in=ids[start:start + 500])
+                .values_list('id', 'completion_percentage')
+            )
+        if minimum:
+            matches = [match for match in matches if scores.get(match[0], 0) >= minimum]
+        if ordering is not None:
+            # Stable, so equal scores keep distance/relevance order
+            matches = sorted(
+                matches, key=lambda match: scores.get(match[0], 0),
+                reverse=ordering.startswith('-')
+            )
+        return matches
+
+    def list(self, request, *args, **kwargs):
+        # Matching happens outside the ORM (R-tree candidates, full-text
+        # index), so paginate the (id, distance) list and load only the
+        # profiles on this page
+        matches = self._by_completion(self._matches())
+        page = self.paginate_queryset(matches)
+        profiles = self.get_queryset().in_bulk([profile_id for profile_id, _ in page])
+
+        results = []
+        for profile_id, distance in page:
+            profile = profiles.get(profile_id)
+            if profile is not None:
+                profile.distance_miles = distance
+                results.append(profile)
+        serializer = self.get_serializer(results, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+@renderer_classes([JSONRenderer])
+def profile_suggestions(request):
+    """
+    Typeahead suggestions from the in-memory index, no database query
+    GET /api/v1/profiles/suggest/?q=<prefix>&limit=<n>
+    """
+    query = request.query_params.get('q', '')
+    try:
+        limit = int(request.query_params.get('limit', 0))
+    except ValueError:
+        raise ValidationError({'limit': 'A whole number is required.'})
+    if limit < 0:
+        raise ValidationError({'limit': 'Must not be negative.'})
+    return Response({'query': query, 'suggestions': suggest(query, limit)})
@@ -105,6 +105,19 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashers - the first entry hashes new passwords, the rest verify
+# older hashes until they are upgraded on login
+PASSWORD_HASHERS = [
+    'users.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Set per deployment with `manage.py tune_password_hashers`
+PASSWORD_HASHER_ITERATIONS = config('PASSWORD_HASHER_ITERATIONS', default=600000, cast=int)
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -134,7 +147,7 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
-    'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
+    'EXCEPTION_HANDLER': 'users.exceptions.exception_handler',
 }
 
 # Simple JWT Configuration
@@ -178,6 +191,124 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer',
 }
 
+# Cache - local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend (e.g. Redis) when running several workers
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='tradeprohub-default'),
+    }
+}
+
+# Cached GET /auth/status/ snapshots, invalidated when the user row changes
+AUTH_STATUS_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,  # seconds
+}
+
+# Failed login limits, counted in the cache (see users.throttling)
+LOGIN_THROTTLE = {
+    'CACHE_ALIAS': 'default',
+    'WINDOW': 900,  # seconds
+    'MAX_FAILURES_PER_EMAIL': 5,
+    'MAX_FAILURES_PER_IP': 20,
+    'LOCKOUT_MINUTES': 30,
+}
+
+# Password hashing pool (see users.hashing)
+PASSWORD_HASHING = {
+    'ENABLED': config('PASSWORD_HASHING_POOL', default=True, cast=bool),
+    'WORKERS': config('PASSWORD_HASHING_WORKERS', default=0, cast=int),  # 0 = min(4, CPUs)
+    'MAX_PENDING': 32,
+    'ACQUIRE_TIMEOUT': 5,  # seconds a request waits for a free slot before the 503
+    'RETRY_AFTER': 1,  # seconds, sent with the 503 when no slot frees up in time
+    'START_METHOD': 'spawn',
+}
+
+# Public profile search by location (see profiles.geo)
+GEO_SEARCH = {
+    'CELL_DEGREES': 0.5,  # Changing this requires `manage.py rebuild_coverage_index --force`
+    'CIRCLE_VERTICES': 48,
+    'MAX_POLYGON_VERTICES': 5000,  # Limit for drawn (custom_draw) service areas
+    'MAX_CANDIDATES': 5000,  # Nearest bounding-box hits given the exact test per search
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 100,
+}
+
+# Full-text profile search (see profiles.search; `manage.py rebuild_search_index`)
+PROFILE_SEARCH = {
+    'MAX_RESULTS': 1000,
+    'MAX_TERMS': 8,
+}
+
+# Typeahead suggestions (see profiles.suggest; an in-memory index per process)
+PROFILE_SUGGEST = {
+    'LIMIT': 8,
+    'MAX_LIMIT': 20,
+    'MAX_ENTRIES': 200000,
+    'MAX_AGE': 300,               # seconds; picks up saves made by other processes
+}
+
+# Profile address geocoding (drained by `manage.py geocode_profiles --loop`)
+GEOCODING = {
+    'PROVIDER': config('GEOCODING_PROVIDER', default='profiles.geocoding.ZipCentroidProvider'),
+    'CACHE_PATH': config('GEOCODING_CACHE_PATH', default=os.path.join(BASE_DIR, 'geocode_cache.sqlite3')),
+    'NEGATIVE_TTL': 86400,        # seconds
+    'BATCH_SIZE': 200,
+    'POLL_INTERVAL': 30,
+}
+
+# Resized gallery/logo/photo variants (rendered by `manage.py process_images --loop`)
+IMAGE_VARIANTS = {
+    'SIZES': {'thumb': 200, 'card': 600, 'full': 1600},  # longest edge, px
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 82,
+    'BATCH_SIZE': 50,
+    'POLL_INTERVAL': 10,          # seconds
+}
+
+# Gallery uploads, streamed to storage by profiles.uploads.GalleryUploadHandler
+GALLERY_UPLOADS = {
+    'MAX_FILE_SIZE': 10 * 1024 * 1024,      # bytes
+    'MAX_FILES_PER_REQUEST': 20,
+    'MAX_IMAGES': 50,                       # per profile
+    'MAX_TOTAL_BYTES': 200 * 1024 * 1024,   # per profile
+    'PROGRESS_INTERVAL': 512 * 1024,        # bytes between progress updates
+}
+
+# Unreferenced profile images (`manage.py collect_media`)
+MEDIA_GC = {
+    'GRACE_PERIOD': 3600,         # seconds
+    'BATCH_SIZE': 500,
+    # Orphaned files (`collect_media --orphans --quarantine`) are moved here
+    'QUARANTINE_DIR': os.path.join(BASE_DIR, 'media_quarantine'),
+    'QUARANTINE_DAYS': 30,
+}
+
+# Stateless JWT authentication (users.authentication.StatelessJWTAuthentication)
+# CACHE_ALIAS must be shared between workers (Redis, Memcached) outside
+# DEBUG; `manage.py check --deploy` fails on a local-memory cache (users.checks)
+STATELESS_JWT_AUTH = {
+    'CACHE_ALIAS': 'default',
+    'REVOCATION_TIMEOUT': None,  # None = refresh token lifetime
+    'ACTIVE_TIMEOUT': 300,       # seconds an active user is trusted without a query
+}
+
+# Audit log pipeline - events are batched and written off the request thread
+AUDIT_LOG = {
+    'ASYNC': config('AUDIT_LOG_ASYNC', default=True, cast=bool),
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 1.0,        # seconds
+    'QUEUE_SIZE': 10000,
+    'SLOW_FLUSH_SECONDS': 2.0,
+    'SHUTDOWN_TIMEOUT': 10.0,
+    'SPILL_DIR': os.path.join(BASE_DIR, 'audit_spill'),
+    # Partitioning / archive tier (`manage.py manage_audit_partitions`)
+    'PARTITION_MONTHS_AHEAD': 3,
+    'HOT_MONTHS': config('AUDIT_LOG_HOT_MONTHS', default=12, cast=int),
+    'ARCHIVE_DIR': os.path.join(BASE_DIR, 'audit_archive'),
+}
+
 # CORS Configuration (for frontend)
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # Vite development server
@@ -214,6 +345,23 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    # Gallery images, logos and profile photos, named by content hash (profiles.storage)
+    'media': {'BACKEND': 'profiles.storage.ContentAddressedStorage'},
+}
+
+# Serving MEDIA_URL (profiles.serving). Behind nginx, set OFFLOAD to
+# 'x-accel-redirect' with an internal location:
+#   location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+MEDIA_SERVING = {
+    'OFFLOAD': config('MEDIA_OFFLOAD', default=None),
+    'ACCEL_PREFIX': '/protected-media/',
+    'MAX_AGE': 3600,                  # seconds
+    'IMMUTABLE_MAX_AGE': 31536000,    # seconds, content-addressed names
+}
+
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
@@ -233,6 +381,16 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 # EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 # DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@tradepro-hub.com')
 
+# Outbound email queue (drained by `manage.py send_queued_email --loop`)
+EMAIL_QUEUE = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 60,          # seconds, doubled per attempt
+    'MAX_BACKOFF': 3600,
+    'LEASE_SECONDS': 300,
+    'POLL_INTERVAL': 5,
+}
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -1,9 +1,11 @@
 # File: backend/backend/urls.py
 # -----------------------------------
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from profiles.serving import serve_media
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -19,5 +21,9 @@ urlpatterns = [
     ])),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media is served with ETags and Range support (profiles.serving); in
+# production the body is handed to the front server (MEDIA_SERVING['OFFLOAD'])
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+    ]
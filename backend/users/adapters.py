@@ -1,9 +1,11 @@
 # File: backend/users/adapters.py
 from allauth.account.adapter import DefaultAccountAdapter
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
+from django import forms
 from django.conf import settings
 from django.urls import reverse
-from .models import AuditLog
+from .audit import log_audit_event
+from .throttling import get_login_throttle
 
 
 class AccountAdapter(DefaultAccountAdapter):
@@ -34,11 +36,10 @@ class AccountAdapter(DefaultAccountAdapter):
             user.save()
             
             # Log registration
-            AuditLog.objects.create(
+            log_audit_event(
                 user=user,
                 action='register',
-                ip_address=self.get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                request=request,
                 details={
                     'email': user.email,
                     'method': 'email'
@@ -72,7 +73,7 @@ class AccountAdapter(DefaultAccountAdapter):
         Send the confirmation email with custom template
         """
         # Log email sent
-        AuditLog.objects.create(
+        log_audit_event(
             user=emailconfirmation.email_address.user,
             action='email_sent',
             details={
@@ -98,8 +99,11 @@ class AccountAdapter(DefaultAccountAdapter):
         """
         Called before authentication
         """
-        # Could implement additional checks here
-        pass
+        email = credentials.get('email', credentials.get('username', ''))
+        if get_login_throttle().check(email, self.get_client_ip(request)):
+            raise forms.ValidationError(
+                'Too many failed login attempts. Please try again later.'
+            )
     
     def authentication_failed(self, request, **credentials):
         """
@@ -108,24 +112,19 @@ class AccountAdapter(DefaultAccountAdapter):
         email = credentials.get('email', credentials.get('username', ''))
         
         # Log failed attempt
-        AuditLog.objects.create(
+        log_audit_event(
             action='login_failed',
-            ip_address=self.get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            request=request,
             details={
                 'email': email
             }
         )
         
-        # Update failed login attempts if user exists
-        from .models import User
-        try:
-            user = User.objects.get(email=email)
-            user.failed_login_attempts += 1
-            user.last_login_attempt = timezone.now()
-            user.save(update_fields=['failed_login_attempts', 'last_login_attempt'])
-        except User.DoesNotExist:
-            pass
+        # Counted in the cache; the user row is only written on lockout
+        throttle = get_login_throttle()
+        failures = throttle.record_failure(email, self.get_client_ip(request))
+        if failures is not None:
+            throttle.lock_account(email, failures)
 
 
 class SocialAccountAdapter(DefaultSocialAccountAdapter):
@@ -178,11 +177,10 @@ class SocialAccountAdapter(DefaultSocialAccountAdapter):
         user.save()
         
         # Log social registration
-        AuditLog.objects.create(
+        log_audit_event(
             user=user,
             action='register',
-            ip_address=self.get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            request=request,
             details={
                 'email': user.email,
                 'method': f'social_{sociallogin.account.provider}'
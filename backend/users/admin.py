@@ -10,8 +10,11 @@ from django.urls import reverse
 from django.db.models import Count, Q
 from .models import (
     EmailVerificationToken, PasswordResetToken, 
-    UserSession, AuditLog
+    UserSession, AuditLog, OutboundEmail, SecurityMetric
 )
+from .auth_status import invalidate_auth_status
+from .security_metrics import get_event_summary, get_user_summary
+from .throttling import get_login_throttle
 
 User = get_user_model()
 
@@ -148,7 +151,9 @@ class UserAdmin(BaseUserAdmin):
     # Admin Actions
     def verify_email(self, request, queryset):
         """Bulk verify email addresses"""
+        user_ids = list(queryset.values_list('pk', flat=True))
         count = queryset.update(email_verified=True)
+        invalidate_auth_status(*user_ids)
         self.message_user(
             request, 
             f'{count} user(s) email verified successfully.'
@@ -157,7 +162,9 @@ class UserAdmin(BaseUserAdmin):
 
     def unverify_email(self, request, queryset):
         """Bulk unverify email addresses"""
+        user_ids = list(queryset.values_list('pk', flat=True))
         count = queryset.update(email_verified=False)
+        invalidate_auth_status(*user_ids)
         self.message_user(
             request, 
             f'{count} user(s) email unverified.'
@@ -170,6 +177,7 @@ class UserAdmin(BaseUserAdmin):
         for user in queryset:
             if user.is_account_locked:
                 user.unlock_account()
+                get_login_throttle().record_success(user.email)
                 count += 1
         self.message_user(
             request, 
@@ -179,7 +187,9 @@ class UserAdmin(BaseUserAdmin):
 
     def force_password_change(self, request, queryset):
         """Force users to change password on next login"""
+        user_ids = list(queryset.values_list('pk', flat=True))
         count = queryset.update(force_password_change=True)
+        invalidate_auth_status(*user_ids)
         self.message_user(
             request, 
             f'{count} user(s) will be required to change password on next login.'
@@ -315,6 +325,55 @@ class AuditLogAdmin(admin.ModelAdmin):
     details_display.short_description = 'Details'
 
 
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """Admin for the outbound email queue"""
+    
+    list_display = [
+        'subject', 'recipients_display', 'status', 'attempts',
+        'next_attempt_at', 'created_at', 'sent_at'
+    ]
+    
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'to']
+    readonly_fields = [
+        'to', 'from_email', 'subject', 'template_name', 'context', 'body',
+        'attempts', 'last_error', 'created_at', 'sent_at'
+    ]
+    
+    actions = ['retry_now']
+    
+    def recipients_display(self, obj):
+        """Display recipient list"""
+        return ', '.join(obj.to)
+    recipients_display.short_description = 'To'
+    
+    def retry_now(self, request, queryset):
+        """Requeue failed or pending emails for immediate delivery"""
+        count = queryset.exclude(status='sent').update(
+            status='pending', next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{count} email(s) requeued.')
+    retry_now.short_description = 'Retry now'
+
+
+@admin.register(SecurityMetric)
+class SecurityMetricAdmin(admin.ModelAdmin):
+    """Read-only view of the hourly security metrics rollup"""
+    
+    list_display = ['bucket', 'dimension', 'key', 'count']
+    list_filter = ['dimension', 'bucket']
+    search_fields = ['key']
+    
+    def has_add_permission(self, request):
+        """Metrics are maintained by the audit writer"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Prevent modification of metrics"""
+        return False
+
+
 # Customize Admin Site
 admin.site.site_header = "TradeProHub Administration"
 admin.site.site_title = "TradeProHub Admin"
@@ -328,32 +387,24 @@ class SecurityDashboardAdmin(admin.ModelAdmin):
         """Add security statistics to admin dashboard"""
         extra_context = extra_context or {}
         
-        # Calculate security statistics
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        verified_users = User.objects.filter(email_verified=True).count()
-        locked_accounts = User.objects.filter(
-            account_locked_until__gt=timezone.now()
-        ).count()
-        
-        recent_logins = AuditLog.objects.filter(
-            action='login',
-            timestamp__gte=timezone.now() - timezone.timedelta(days=7)
-        ).count()
+        # Calculate security statistics from one user aggregate and the
+        # hourly metrics rollup instead of counting AuditLog rows
+        user_stats = get_user_summary()
+        actions = get_event_summary(
+            timezone.now() - timezone.timedelta(days=7)
+        ).get('action', {})
         
-        failed_logins = AuditLog.objects.filter(
-            action='login_failed',
-            timestamp__gte=timezone.now() - timezone.timedelta(days=7)
-        ).count()
+        total_users = user_stats['total_users']
+        verified_users = user_stats['verified_users']
         
         extra_context.update({
             'security_stats': {
                 'total_users': total_users,
-                'active_users': active_users,
+                'active_users': user_stats['active_users'],
                 'verified_users': verified_users,
-                'locked_accounts': locked_accounts,
-                'recent_logins': recent_logins,
-                'failed_logins': failed_logins,
+                'locked_accounts': user_stats['locked_accounts'],
+                'recent_logins': actions.get('login', 0),
+                'failed_logins': actions.get('login_failed', 0),
                 'verification_rate': (verified_users / total_users * 100) if total_users > 0 else 0,
             }
         })
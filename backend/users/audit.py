@@ -0,0 +1,430 @@
+# File: backend/users/audit.py
+# Buffered audit pipeline - events are queued in-process and written with
+# bulk_create from a background worker instead of one INSERT per request
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .utils import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+AUDIT_DEFAULTS = {
+    'ASYNC': True,               # False writes each event inline (tests, scripts)
+    'BATCH_SIZE': 200,           # Max events per bulk_create
+    'FLUSH_INTERVAL': 1.0,       # Max seconds an event waits in the queue
+    'QUEUE_SIZE': 10000,         # Events held in memory before spilling to disk
+    'SLOW_FLUSH_SECONDS': 2.0,   # A flush slower than this sheds the backlog to disk
+    'SHUTDOWN_TIMEOUT': 10.0,    # Seconds to wait for the final flush at exit
+    'SPILL_DIR': None,           # Directory for spilled events (JSONL)
+    'PARTITION_MONTHS_AHEAD': 3, # Monthly partitions created ahead of time (PostgreSQL)
+    'HOT_MONTHS': 12,            # Months kept in the database before archiving
+    'ARCHIVE_DIR': None,         # Directory for archived partitions (JSONL.gz)
+}
+
+_STOP = object()
+
+DEAD_LETTER_DIR = 'dead-letter'
+# A claim older than this was left by a replay that died; replayed again
+# (duplicating its rows only if it died between commit and removal)
+STALE_CLAIM_SECONDS = 3600
+
+
+def get_audit_settings():
+    """Return AUDIT_LOG settings merged over the defaults"""
+    conf = dict(AUDIT_DEFAULTS)
+    conf.update(getattr(settings, 'AUDIT_LOG', {}))
+    if not conf['SPILL_DIR']:
+        conf['SPILL_DIR'] = os.path.join(settings.BASE_DIR, 'audit_spill')
+    if not conf['ARCHIVE_DIR']:
+        conf['ARCHIVE_DIR'] = os.path.join(settings.BASE_DIR, 'audit_archive')
+    return conf
+
+
+def build_event(action, user=None, request=None, details=None,
+                ip_address=None, user_agent=None):
+    """Build a plain-dict audit event that can be queued or spilled as JSON"""
+    if request is not None:
+        if ip_address is None:
+            ip_address = get_client_ip(request)
+        if user_agent is None:
+            user_agent = request.META.get('HTTP_USER_AGENT', '')
+
+    user_id = getattr(user, 'pk', None) if user is not None else None
+
+    return {
+        'user_id': user_id,
+        'action': action,
+        'ip_address': ip_address or None,
+        'user_agent': user_agent or '',
+        'details': details or {},
+        'timestamp': timezone.now(),
+    }
+
+
+def write_events(events):
+    """Persist a batch of events with a single bulk_create and roll them up"""
+    from .models import AuditLog
+    from .security_metrics import record_events
+
+    conf = get_audit_settings()
+    with transaction.atomic():
+        AuditLog.objects.bulk_create(
+            [AuditLog(**event) for event in events],
+            batch_size=conf['BATCH_SIZE'],
+        )
+        record_events(events)
+
+
+def _encode_event(event):
+    data = dict(event)
+    data['timestamp'] = event['timestamp'].isoformat()
+    return json.dumps(data, default=str)
+
+
+def _decode_event(line):
+    data = json.loads(line)
+    data['timestamp'] = parse_datetime(data['timestamp'])
+    return data
+
+
+class AuditWriter:
+    """
+    Background writer for audit events.
+    Events are flushed when a batch fills up or the flush interval elapses,
+    spilled to disk when the database cannot keep up, and drained at exit.
+    """
+
+    def __init__(self, batch_size, flush_interval, queue_size,
+                 slow_flush_seconds, shutdown_timeout, spill_dir):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.slow_flush_seconds = slow_flush_seconds
+        self.shutdown_timeout = shutdown_timeout
+        self.spill_dir = spill_dir
+
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._queue = None
+        self._atexit_registered = False
+
+    @classmethod
+    def from_settings(cls):
+        conf = get_audit_settings()
+        return cls(
+            batch_size=conf['BATCH_SIZE'],
+            flush_interval=conf['FLUSH_INTERVAL'],
+            queue_size=conf['QUEUE_SIZE'],
+            slow_flush_seconds=conf['SLOW_FLUSH_SECONDS'],
+            shutdown_timeout=conf['SHUTDOWN_TIMEOUT'],
+            spill_dir=conf['SPILL_DIR'],
+        )
+
+    # Producer side
+
+    def enqueue(self, event):
+        """Queue an event; spills straight to disk if the queue is full"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            logger.warning('Audit queue full, spilling event to disk')
+            self.spill([event])
+
+    @property
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+
+            # A forked worker inherits a dead thread and a possibly locked queue
+            if self._pid != pid:
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._pid = pid
+
+            self._thread = threading.Thread(
+                target=self._run, name='audit-writer', daemon=True
+            )
+            self._thread.start()
+
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+
+    def shutdown(self):
+        """Stop the worker and flush everything still queued"""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+
+        self._queue.put(_STOP)
+        thread.join(self.shutdown_timeout)
+
+        if thread.is_alive():
+            logger.error('Audit writer did not stop in time, spilling backlog')
+            self.spill(self._drain_queue())
+
+    # Consumer side
+
+    def _run(self):
+        self._replay_spilled_safely()
+
+        while True:
+            batch, stop = self._collect()
+            if batch:
+                elapsed = self._flush(batch)
+                if elapsed is not None and elapsed > self.slow_flush_seconds:
+                    # Database is struggling: move the backlog to disk and
+                    # let replay catch up once flushes are fast again
+                    logger.warning(
+                        'Audit flush took %.2fs, spilling %d queued events',
+                        elapsed, self.pending
+                    )
+                    self.spill(self._drain_queue())
+                elif elapsed is not None:
+                    self._replay_spilled_safely()
+            if stop:
+                break
+
+    def _collect(self):
+        """Block until a batch is full, the interval elapses, or stop is requested"""
+        batch = []
+        deadline = None
+
+        while len(batch) < self.batch_size:
+            try:
+                if deadline is None:
+                    item = self._queue.get()
+                    deadline = time.monotonic() + self.flush_interval
+                else:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Drain whatever arrived before the stop request
+                batch.extend(self._drain_queue())
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _drain_queue(self):
+        items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return items
+            if item is not _STOP:
+                items.append(item)
+
+    def _flush(self, batch):
+        """Write a batch; returns elapsed seconds or None if it was spilled"""
+        started = time.monotonic()
+        try:
+            for start in range(0, len(batch), self.batch_size):
+                write_events(batch[start:start + self.batch_size])
+        except Exception as e:
+            logger.error(f'Audit flush of {len(batch)} events failed: {str(e)}')
+            self.spill(batch)
+            return None
+        finally:
+            close_old_connections()
+        return time.monotonic() - started
+
+    # Spill files
+
+    def spill(self, events):
+        """
+        Write events to a new spill file and fsync it. The file only gets
+        its .jsonl name once complete, so replay never claims a file that
+        is still being written.
+        """
+        if not events:
+            return
+
+        with self._spill_lock:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            name = f'audit-{os.getpid()}-{uuid.uuid4().hex}'
+            partial = os.path.join(self.spill_dir, f'{name}.part')
+            path = os.path.join(self.spill_dir, f'{name}.jsonl')
+            with open(partial, 'w', encoding='utf-8') as fh:
+                for event in events:
+                    fh.write(_encode_event(event) + '\n')
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.rename(partial, path)
+
+        logger.info(f'Spilled {len(events)} audit events to {path}')
+
+    def _claimable(self):
+        """Complete spill files, and claims left behind by a crashed replay"""
+        stale_before = time.time() - STALE_CLAIM_SECONDS
+        for name in sorted(os.listdir(self.spill_dir)):
+            path = os.path.join(self.spill_dir, name)
+            if name.endswith('.jsonl'):
+                yield path
+            elif '.replay-' in name:
+                try:
+                    if os.path.getmtime(path) < stale_before:
+                        yield path
+                except FileNotFoundError:
+                    continue
+
+    def _read_spill_file(self, path):
+        """(events, dead) for a spill file; dead lines can't be decoded"""
+        events = []
+        dead = []
+        with open(path, encoding='utf-8') as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                try:
+                    events.append(_decode_event(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    dead.append((line.rstrip('\n'), f'undecodable: {e}'))
+        return events, dead
+
+    def _write_spilled(self, events, dead):
+        """
+        Write one file's events in a single transaction. Events whose user
+        is gone (the FK cascades) or that the database rejects go to dead.
+        """
+        from .models import AuditLog, User
+
+        user_ids = {event['user_id'] for event in events if event.get('user_id') is not None}
+        existing = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        live = []
+        for event in events:
+            if event.get('user_id') is not None and event['user_id'] not in existing:
+                dead.append((_encode_event(event), 'user no longer exists'))
+            else:
+                live.append(event)
+
+        written = 0
+        with transaction.atomic():
+            for start in range(0, len(live), self.batch_size):
+                batch = live[start:start + self.batch_size]
+                try:
+                    write_events(batch)
+                    written += len(batch)
+                    continue
+                except (IntegrityError, DataError, ValueError, TypeError):
+                    pass
+                # Find the rejected events one savepoint at a time
+                for event in batch:
+                    try:
+                        write_events([event])
+                        written += 1
+                    except (IntegrityError, DataError, ValueError, TypeError) as e:
+                        dead.append((_encode_event(event), str(e)))
+        return written
+
+    def _dead_letter(self, source, dead):
+        """Keep events that can't be written, with the reason, out of replay"""
+        dead_dir = os.path.join(self.spill_dir, DEAD_LETTER_DIR)
+        os.makedirs(dead_dir, exist_ok=True)
+        path = os.path.join(dead_dir, f'{os.path.basename(source)}.{uuid.uuid4().hex}.jsonl')
+        with open(path, 'w', encoding='utf-8') as fh:
+            for line, reason in dead:
+                fh.write(json.dumps({'error': reason, 'line': line}) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+        logger.error(f'{len(dead)} spilled audit events could not be written, kept in {path}')
+
+    def replay_spilled(self):
+        """
+        Load spilled events back into the database; returns rows written.
+        Each file is written in one transaction, so a failure leaves nothing
+        of it behind and the file is retried whole; events that can never
+        be written are moved to the dead-letter directory instead.
+        """
+        if not os.path.isdir(self.spill_dir):
+            return 0
+
+        written = 0
+        for source in self._claimable():
+            # Claim the file so concurrent workers don't replay it twice
+            base = source.split('.replay-', 1)[0]
+            claimed = f'{base}.replay-{uuid.uuid4().hex}'
+            try:
+                os.rename(source, claimed)
+            except FileNotFoundError:
+                continue
+
+            try:
+                events, dead = self._read_spill_file(claimed)
+                written += self._write_spilled(events, dead)
+            except Exception:
+                # Nothing from this file was committed; hand it back whole
+                os.rename(claimed, base)
+                raise
+            finally:
+                close_old_connections()
+
+            if dead:
+                self._dead_letter(base, dead)
+            os.remove(claimed)
+
+        if written:
+            logger.info(f'Replayed {written} spilled audit events')
+        return written
+
+    def _replay_spilled_safely(self):
+        try:
+            self.replay_spilled()
+        except Exception as e:
+            logger.error(f'Audit spill replay failed: {str(e)}')
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    """Return the process-wide audit writer"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter.from_settings()
+    return _writer
+
+
+def log_audit_event(action, user=None, request=None, details=None,
+                    ip_address=None, user_agent=None):
+    """
+    Record a security event.
+    Queued for the background writer unless AUDIT_LOG['ASYNC'] is off.
+    """
+    event = build_event(
+        action, user=user, request=request, details=details,
+        ip_address=ip_address, user_agent=user_agent
+    )
+
+    if not get_audit_settings()['ASYNC']:
+        write_events([event])
+        return
+
+    get_audit_writer().enqueue(event)
@@ -0,0 +1,88 @@
+# File: backend/users/auth_status.py
+# Cached per-user auth status snapshot for GET /auth/status/
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils import timezone
+
+User = get_user_model()
+
+AUTH_STATUS_DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,  # Safety net only; snapshots are invalidated on change
+}
+
+# Columns the status payload is built from; saving any of them invalidates
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'is_active',
+    'email_verified', 'account_type', 'profile_completed',
+    'password_changed_at', 'force_password_change',
+)
+
+
+def get_auth_status_settings():
+    conf = dict(AUTH_STATUS_DEFAULTS)
+    conf.update(getattr(settings, 'AUTH_STATUS_CACHE', {}))
+    return conf
+
+
+def _cache():
+    return caches[get_auth_status_settings()['CACHE_ALIAS']]
+
+
+def _cache_key(user_id):
+    return f'auth_status:v1:{user_id}'
+
+
+def get_snapshot(user_id):
+    """Return the cached snapshot, loading it with one narrow query on a miss"""
+    cache = _cache()
+    key = _cache_key(user_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = User.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).first()
+        if snapshot is None:
+            return None
+        cache.set(key, snapshot, get_auth_status_settings()['TIMEOUT'])
+    return snapshot
+
+
+def invalidate_auth_status(*user_ids):
+    """Drop cached snapshots for the given users"""
+    if user_ids:
+        _cache().delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def needs_password_change(snapshot):
+    """Mirror of User.needs_password_change, evaluated at read time"""
+    if snapshot['force_password_change']:
+        return True
+    password_age = timezone.now() - snapshot['password_changed_at']
+    return password_age.days > 90
+
+
+def build_status_payload(snapshot):
+    full_name = f"{snapshot['first_name']} {snapshot['last_name']}".strip()
+    return {
+        'authenticated': True,
+        'user': {
+            'id': snapshot['id'],
+            'username': snapshot['username'],
+            'email': snapshot['email'],
+            'full_name': full_name or snapshot['username'],
+            'email_verified': snapshot['email_verified'],
+            'account_type': snapshot['account_type'],
+            'profile_completed': snapshot['profile_completed'],
+            'needs_password_change': needs_password_change(snapshot),
+        }
+    }
+
+
+def compute_etag(payload):
+    """Strong ETag over the serialized payload"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+    return f'"{hashlib.sha256(encoded).hexdigest()[:32]}"'
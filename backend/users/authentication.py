@@ -0,0 +1,161 @@
+# File: backend/users/authentication.py
+# Opt-in stateless JWT authentication - builds the request user from signed
+# claims and only loads the User row when a model attribute is needed
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+# User fields copied into tokens as claims
+CLAIM_FIELDS = ('account_type', 'email_verified', 'is_active')
+
+STATELESS_AUTH_DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    # Keep revocations at least as long as a refresh token can mint new
+    # access tokens
+    'REVOCATION_TIMEOUT': None,
+    # How long a user looked up as active is trusted without another query
+    'ACTIVE_TIMEOUT': 300,
+}
+
+# Cache backends that are not shared between processes (see users.checks)
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def get_stateless_auth_settings():
+    conf = dict(STATELESS_AUTH_DEFAULTS)
+    conf.update(getattr(settings, 'STATELESS_JWT_AUTH', {}))
+    if conf['REVOCATION_TIMEOUT'] is None:
+        conf['REVOCATION_TIMEOUT'] = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    return conf
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token carrying CLAIM_FIELDS; access tokens derived from it copy them"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for field in CLAIM_FIELDS:
+            token[field] = getattr(user, field)
+        return token
+
+
+class DisabledUserCache:
+    """
+    Cached is_active state per user, consulted on every stateless request.
+    A miss (new process, restart, eviction) reads User.is_active, so an
+    empty cache never lets a deactivated user through; the cache has to
+    be shared between processes for deactivations to reach all of them
+    at once.
+    """
+    DISABLED = 'disabled'
+    ACTIVE = 'active'
+
+    def _cache(self):
+        return caches[get_stateless_auth_settings()['CACHE_ALIAS']]
+
+    def _key(self, user_id):
+        return f'auth:disabled:{user_id}'
+
+    def mark_disabled(self, user_id):
+        self._cache().set(
+            self._key(user_id), self.DISABLED, get_stateless_auth_settings()['REVOCATION_TIMEOUT']
+        )
+
+    def clear(self, user_id):
+        self._cache().delete(self._key(user_id))
+
+    def is_disabled(self, user_id):
+        state = self._cache().get(self._key(user_id))
+        if state is None:
+            # Missing rows count as disabled: the user was deleted
+            is_active = User.objects.filter(pk=user_id).values_list('is_active', flat=True).first()
+            if is_active:
+                conf = get_stateless_auth_settings()
+                self._cache().set(self._key(user_id), self.ACTIVE, conf['ACTIVE_TIMEOUT'])
+                return False
+            self.mark_disabled(user_id)
+            return True
+        return state != self.ACTIVE
+
+
+disabled_users = DisabledUserCache()
+
+
+class TokenClaimsUser:
+    """
+    Request user built from token claims.
+    id, account_type, email_verified and is_active come from the token (as of
+    issue time); any other attribute loads the real User once and delegates.
+
+    Only is_active is re-checked per request (see DisabledUserCache).
+    account_type and email_verified stay as they were when the refresh token
+    was issued until the client logs in again, so views that must see a
+    change right away should read them from get_user() instead.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        self.token = token
+        self.id = self.pk = token[api_settings.USER_ID_CLAIM]
+        for field in CLAIM_FIELDS:
+            setattr(self, field, token[field])
+        self._user = None
+
+    def get_user(self):
+        """Return the backing User model instance, loading it on first use"""
+        if self._user is None:
+            try:
+                self._user = User.objects.get(**{api_settings.USER_ID_FIELD: self.id})
+            except User.DoesNotExist:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        return self._user
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set from claims
+        if name.startswith('__') or name in ('token', '_user'):
+            raise AttributeError(name)
+        return getattr(self.get_user(), name)
+
+    def __eq__(self, other):
+        other_pk = getattr(other, 'pk', None)
+        return other_pk is not None and other_pk == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return f'TokenClaimsUser {self.pk}'
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user query.
+    Tokens issued before claims were added fall back to the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        if any(field not in validated_token for field in CLAIM_FIELDS):
+            return super().get_user(validated_token)
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if not validated_token['is_active'] or disabled_users.is_disabled(user_id):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return TokenClaimsUser(validated_token)
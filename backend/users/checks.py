@@ -0,0 +1,28 @@
+# File: backend/users/checks.py
+# System checks for the users app
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .authentication import LOCAL_CACHE_BACKENDS, get_stateless_auth_settings
+
+
+@register(deploy=True)
+def check_revocation_cache(app_configs, **kwargs):
+    """
+    `manage.py check --deploy` fails on a per-process revocation cache.
+    Deploy-only so the local-memory default stays quiet in development
+    and test runs, where there is a single process anyway.
+    """
+    alias = get_stateless_auth_settings()['CACHE_ALIAS']
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Error(
+            f"STATELESS_JWT_AUTH['CACHE_ALIAS'] ('{alias}') uses {backend}, which is per process: "
+            f"other workers keep accepting a deactivated user's tokens until their cached state expires.",
+            hint='Point CACHE_ALIAS at a shared cache such as Redis or Memcached.',
+            id='users.E001',
+        )
+    ]
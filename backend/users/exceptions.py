@@ -0,0 +1,22 @@
+# File: backend/users/exceptions.py
+# REST framework exception handler - adds the errors raised below the views
+# (such as a saturated password hashing pool) to DRF's own handling
+
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from .hashing import HashingBusy, get_hashing_settings
+
+
+def exception_handler(exc, context):
+    """DRF's handler, plus 503 + Retry-After when no hashing slot was free"""
+    if isinstance(exc, HashingBusy):
+        response = Response({
+            'success': False,
+            'error': 'Service busy',
+            'message': 'Too many sign-in requests right now. Please try again shortly.'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = str(get_hashing_settings()['RETRY_AFTER'])
+        return response
+    return drf_exception_handler(exc, context)
@@ -0,0 +1,17 @@
+# File: backend/users/hashers.py
+# Password hashers with deployment-tuned cost (see tune_password_hashers)
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with iterations from settings.PASSWORD_HASHER_ITERATIONS.
+    Keeps the pbkdf2_sha256 algorithm name, so existing hashes verify as-is and
+    are re-encoded at the new cost on their next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASHER_ITERATIONS', PBKDF2PasswordHasher.iterations)
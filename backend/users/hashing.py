@@ -0,0 +1,306 @@
+# File: backend/users/hashing.py
+# Password hashing service - PBKDF2 runs in a bounded process pool so request
+# threads wait on a future instead of burning CPU while holding the GIL
+
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+
+logger = logging.getLogger(__name__)
+
+HASHING_DEFAULTS = {
+    'ENABLED': True,           # False hashes inline on the calling thread
+    'WORKERS': None,           # Pool processes (None = min(4, cpu count))
+    'MAX_PENDING': 32,         # Hashes queued or running before callers wait
+    'ACQUIRE_TIMEOUT': 5,      # Seconds to wait for a slot before HashingBusy (None = wait forever)
+    'RETRY_AFTER': 1,          # Retry-After seconds sent with the 503 when no slot was free
+    'START_METHOD': 'spawn',   # Don't fork the audit/email threads into workers
+}
+
+
+# Upper bounds (ms) of the per-hasher latency histogram buckets
+HISTOGRAM_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class HashingBusy(Exception):
+    """No hashing slot became free within ACQUIRE_TIMEOUT"""
+
+
+def get_hashing_settings():
+    conf = dict(HASHING_DEFAULTS)
+    conf.update(getattr(settings, 'PASSWORD_HASHING', {}))
+    if not conf['WORKERS']:
+        conf['WORKERS'] = min(4, os.cpu_count() or 1)
+    return conf
+
+
+# Worker side - these run in the pool processes
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _make_password(password, salt=None, hasher='default'):
+    return hashers.make_password(password, salt, hasher)
+
+
+def _check_password(password, encoded):
+    """Returns (is_correct, must_update) without touching the database"""
+    must_update = []
+    is_correct = hashers.check_password(
+        password, encoded, setter=lambda raw: must_update.append(True)
+    )
+    return is_correct, bool(must_update)
+
+
+def _timed(func, *args):
+    started = time.time()
+    result = func(*args)
+    return result, started, time.time()
+
+
+def _histogram_key(func, args):
+    """(algorithm, operation) used to bucket a call's run time"""
+    if func is _check_password:
+        encoded = args[1] or ''
+        algorithm = encoded.split('$', 1)[0] if '$' in encoded else 'unusable'
+        return algorithm, 'check'
+    try:
+        algorithm = hashers.get_hasher(args[2]).algorithm
+    except ValueError:
+        algorithm = str(args[2])
+    return algorithm, 'make'
+
+
+def _bucket_label(elapsed_ms):
+    for bound in HISTOGRAM_BUCKETS_MS:
+        if elapsed_ms <= bound:
+            return f'<={bound}'
+    return f'>{HISTOGRAM_BUCKETS_MS[-1]}'
+
+
+class HashingService:
+    """
+    Process pool for make/check password with a cap on outstanding work.
+    Callers beyond MAX_PENDING block on a semaphore rather than growing an
+    unbounded queue; counters are exposed through metrics().
+    """
+
+    def __init__(self, enabled, workers, max_pending, acquire_timeout, start_method):
+        self.enabled = enabled
+        self.workers = workers
+        self.max_pending = max_pending
+        self.acquire_timeout = acquire_timeout
+        self.start_method = start_method
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._atexit_registered = False
+        self._reset_stats()
+
+    @classmethod
+    def from_settings(cls):
+        conf = get_hashing_settings()
+        return cls(
+            enabled=conf['ENABLED'],
+            workers=conf['WORKERS'],
+            max_pending=conf['MAX_PENDING'],
+            acquire_timeout=conf['ACQUIRE_TIMEOUT'],
+            start_method=conf['START_METHOD'],
+        )
+
+    def _reset_stats(self):
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'in_flight': 0,
+            'peak_in_flight': 0,
+            'wait_seconds': 0.0,
+            'run_seconds': 0.0,
+        }
+        self._histograms = {}
+
+    def _observe(self, key, seconds):
+        """Record one run time; caller holds self._lock"""
+        elapsed_ms = seconds * 1000
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = {
+                'count': 0,
+                'sum_ms': 0.0,
+                'buckets': dict.fromkeys(
+                    [f'<={bound}' for bound in HISTOGRAM_BUCKETS_MS]
+                    + [f'>{HISTOGRAM_BUCKETS_MS[-1]}'], 0
+                ),
+            }
+        histogram['count'] += 1
+        histogram['sum_ms'] += elapsed_ms
+        histogram['buckets'][_bucket_label(elapsed_ms)] += 1
+
+    def _ensure_pool(self):
+        pid = os.getpid()
+        if self._pid == pid and self._executor is not None:
+            return
+
+        with self._lock:
+            if self._pid == pid and self._executor is not None:
+                return
+
+            # A forked worker can't reuse the parent's pool
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'tradepro_hub.settings'),),
+            )
+            self._slots = threading.BoundedSemaphore(self.max_pending)
+            self._pid = pid
+            self._reset_stats()
+
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+
+    def shutdown(self):
+        executor = self._executor
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def submit(self, func, *args):
+        """Queue func(*args) on the pool; returns a concurrent.futures.Future"""
+        self._ensure_pool()
+        slots = self._slots
+        if not slots.acquire(timeout=self.acquire_timeout):
+            raise HashingBusy(f'No hashing slot free after {self.acquire_timeout}s')
+
+        submitted_at = time.time()
+        key = _histogram_key(func, args)
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._stats['in_flight'] += 1
+            self._stats['peak_in_flight'] = max(
+                self._stats['peak_in_flight'], self._stats['in_flight']
+            )
+
+        def _done(future):
+            slots.release()
+            with self._lock:
+                self._stats['in_flight'] -= 1
+                if future.cancelled() or future.exception() is not None:
+                    self._stats['failed'] += 1
+                    return
+                _, started, finished = future.result()
+                self._stats['completed'] += 1
+                self._stats['wait_seconds'] += max(started - submitted_at, 0)
+                self._stats['run_seconds'] += finished - started
+                self._observe(key, finished - started)
+
+        try:
+            future = self._executor.submit(_timed, func, *args)
+        except Exception:
+            slots.release()
+            with self._lock:
+                self._stats['in_flight'] -= 1
+                self._stats['failed'] += 1
+            raise
+        future.add_done_callback(_done)
+        return future
+
+    def _call_inline(self, func, *args):
+        result, started, finished = _timed(func, *args)
+        with self._lock:
+            self._observe(_histogram_key(func, args), finished - started)
+        return result
+
+    def _call(self, func, *args):
+        if not self.enabled:
+            return self._call_inline(func, *args)
+        result, _, _ = self.submit(func, *args).result()
+        return result
+
+    async def _acall(self, func, *args):
+        if not self.enabled:
+            return await sync_to_async(self._call_inline, thread_sensitive=False)(func, *args)
+        # Waiting for a slot blocks, so do it off the event loop
+        future = await sync_to_async(self.submit, thread_sensitive=False)(func, *args)
+        result, _, _ = await asyncio.wrap_future(future)
+        return result
+
+    # Public API
+
+    def make_password(self, password, salt=None, hasher='default'):
+        return self._call(_make_password, password, salt, hasher)
+
+    def check_password(self, password, encoded):
+        """Returns (is_correct, must_update)"""
+        return self._call(_check_password, password, encoded)
+
+    async def amake_password(self, password, salt=None, hasher='default'):
+        return await self._acall(_make_password, password, salt, hasher)
+
+    async def acheck_password(self, password, encoded):
+        return await self._acall(_check_password, password, encoded)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            histograms = {}
+            for (algorithm, operation), histogram in self._histograms.items():
+                histograms.setdefault(algorithm, {})[operation] = {
+                    'count': histogram['count'],
+                    'avg_ms': round(histogram['sum_ms'] / histogram['count'], 2),
+                    'buckets': dict(histogram['buckets']),
+                }
+        completed = stats['completed'] or 1
+        return {
+            'enabled': self.enabled,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'in_flight': stats['in_flight'],
+            'queue_depth': max(stats['in_flight'] - self.workers, 0),
+            'peak_in_flight': stats['peak_in_flight'],
+            'submitted': stats['submitted'],
+            'completed': stats['completed'],
+            'failed': stats['failed'],
+            'avg_wait_ms': round(stats['wait_seconds'] * 1000 / completed, 2),
+            'avg_run_ms': round(stats['run_seconds'] * 1000 / completed, 2),
+            'hashers': histograms,
+        }
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_hashing_service():
+    """Return the process-wide hashing service"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = HashingService.from_settings()
+    return _service
+
+
+def make_password(password, salt=None, hasher='default'):
+    return get_hashing_service().make_password(password, salt, hasher)
+
+
+def check_password(password, encoded):
+    """Returns (is_correct, must_update)"""
+    return get_hashing_service().check_password(password, encoded)
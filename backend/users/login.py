@@ -0,0 +1,106 @@
+# File: backend/users/login.py
+# Login engine - one read per attempt and at most one UPDATE, instead of the
+# separate lookups and saves done by authenticate() and the User helpers
+
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils import timezone
+
+from . import hashing
+from .throttling import get_login_throttle
+
+User = get_user_model()
+
+
+class LoginFailed(Exception):
+    """Login rejected; field and message map onto serializer errors"""
+
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+        self.message = message
+
+
+def _attempt_updates(throttle, email, ip_address, password_ok, now):
+    """Column changes for one login attempt; empty when nothing needs writing"""
+    if password_ok:
+        throttle.record_success(email)
+        return {
+            'failed_login_attempts': 0,
+            'last_login_attempt': now,
+            'last_activity': now,
+            'last_login': now,
+        }
+
+    # Failures are counted in the cache; the row is only touched on lockout
+    failures = throttle.record_failure(email, ip_address)
+    if failures is None:
+        return {}
+    return {
+        'failed_login_attempts': failures,
+        'last_login_attempt': now,
+        'account_locked_until': throttle.lock_until(),
+    }
+
+
+def login_user(email, password, ip_address=None):
+    """
+    Verify credentials and record the attempt.
+    Returns the User on success, raises LoginFailed otherwise. The row is
+    read without a lock and the password is verified before anything is
+    written, so no row lock is held while waiting on the hashing pool
+    (hashing.HashingBusy propagates to the caller). Bookkeeping, including
+    upgrading a legacy hash, is one conditional UPDATE that only applies if
+    the row still has the verified hash and is still usable; failed
+    attempts only write when the lockout trips. Callers should check
+    users.throttling.get_login_throttle() first so throttled attempts never
+    reach the password hasher.
+    """
+    throttle = get_login_throttle()
+
+    user = User.objects.filter(email=email.lower()).first()
+    if user is None:
+        throttle.record_failure(email, ip_address)
+        raise LoginFailed('email', 'No account found with this email address.')
+
+    if user.is_account_locked:
+        raise LoginFailed(
+            'non_field_errors',
+            f'Account is locked until {user.account_locked_until}. Please try again later.'
+        )
+
+    if not user.is_active:
+        raise LoginFailed('non_field_errors', 'This account has been deactivated.')
+
+    # Verified in the hashing pool without a setter, so the hash upgrade
+    # below rides along in the same UPDATE
+    verified_hash = user.password
+    password_ok, must_update = hashing.check_password(password, verified_hash)
+
+    now = timezone.now()
+    updates = _attempt_updates(throttle, email, ip_address, password_ok, now)
+    if not password_ok:
+        if updates:
+            # Lockout; written whatever happened to the row in the meantime
+            User.objects.filter(pk=user.pk).update(**updates)
+        raise LoginFailed('password', 'Invalid password.')
+
+    if must_update:
+        try:
+            # Legacy algorithm or outdated cost: re-encode with the current hasher
+            updates['password'] = hashing.make_password(password)
+        except hashing.HashingBusy:
+            pass  # Upgraded on a later login
+
+    # Matches nothing if the password changed, or the account was locked or
+    # deactivated, after it was read
+    written = User.objects.filter(
+        Q(account_locked_until__isnull=True) | Q(account_locked_until__lte=now),
+        pk=user.pk, password=verified_hash, is_active=True,
+    ).update(**updates)
+    if not written:
+        raise LoginFailed('non_field_errors', 'Account changed during login. Please try again.')
+
+    for field, value in updates.items():
+        setattr(user, field, value)
+    return user
@@ -0,0 +1,179 @@
+# File: backend/users/mail.py
+# Outbound email queue - views enqueue, the send_queued_email worker renders
+# and delivers in batches over a single SMTP connection
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.template import TemplateDoesNotExist
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.html import strip_tags
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+EMAIL_QUEUE_DEFAULTS = {
+    'BATCH_SIZE': 50,          # Emails claimed and sent per SMTP connection
+    'MAX_ATTEMPTS': 5,         # Attempts before an email is marked failed
+    'RETRY_BACKOFF': 60,       # Seconds before the first retry, doubled each time
+    'MAX_BACKOFF': 3600,       # Upper bound on the retry delay
+    'LEASE_SECONDS': 300,      # A 'sending' row older than this is reclaimed
+    'POLL_INTERVAL': 5,        # Worker sleep when the queue is empty
+}
+
+
+def get_email_queue_settings():
+    """Return EMAIL_QUEUE settings merged over the defaults"""
+    conf = dict(EMAIL_QUEUE_DEFAULTS)
+    conf.update(getattr(settings, 'EMAIL_QUEUE', {}))
+    return conf
+
+
+def user_context(user):
+    """JSON-safe subset of a user for email templates"""
+    return {
+        'id': user.pk,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+    }
+
+
+def queue_email(subject, recipient_list, template_name='', context=None,
+                body='', from_email=None):
+    """
+    Queue an email for the worker; costs a single INSERT.
+    Pass template_name + context to defer rendering, or a plain body.
+    """
+    return OutboundEmail.objects.create(
+        to=list(recipient_list),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        subject=subject,
+        template_name=template_name,
+        context=context or {},
+        body=body,
+    )
+
+
+def _restore_context(context):
+    # JSON turns datetimes into strings; template date filters need them back
+    restored = {}
+    for key, value in context.items():
+        if key.endswith('_at') and isinstance(value, str):
+            value = parse_datetime(value) or value
+        restored[key] = value
+    return restored
+
+
+def build_message(email, connection=None):
+    """Render a queued email into an EmailMultiAlternatives"""
+    if email.template_name:
+        html_message = render_to_string(email.template_name, _restore_context(email.context))
+        plain_message = strip_tags(html_message)
+    else:
+        html_message = None
+        plain_message = email.body
+
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=plain_message,
+        from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=email.to,
+        connection=connection,
+    )
+    if html_message:
+        message.attach_alternative(html_message, 'text/html')
+    return message
+
+
+def claim_batch(batch_size, lease_seconds):
+    """Lock and lease up to batch_size due emails so parallel workers don't overlap"""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='pending') | Q(status='sending'), next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if emails:
+            OutboundEmail.objects.filter(pk__in=[e.pk for e in emails]).update(
+                status='sending',
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(seconds=lease_seconds),
+            )
+            for email in emails:
+                email.attempts += 1
+    return emails
+
+
+def _mark_failed_attempt(email, error, conf, permanent=False):
+    email.last_error = str(error)
+    if permanent or email.attempts >= conf['MAX_ATTEMPTS']:
+        email.status = 'failed'
+        logger.error(f'Giving up on email {email.pk} to {email.to}: {error}')
+    else:
+        delay = min(conf['RETRY_BACKOFF'] * 2 ** (email.attempts - 1), conf['MAX_BACKOFF'])
+        email.status = 'pending'
+        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        logger.warning(f'Email {email.pk} failed, retrying in {delay}s: {error}')
+    email.save(update_fields=['status', 'last_error', 'next_attempt_at'])
+
+
+def send_queued_emails(batch_size=None):
+    """
+    Send one batch of due emails over a single connection.
+    Returns (sent, failed) counts for the batch.
+    """
+    conf = get_email_queue_settings()
+    emails = claim_batch(batch_size or conf['BATCH_SIZE'], conf['LEASE_SECONDS'])
+    if not emails:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            _mark_failed_attempt(email, e, conf)
+        return 0, len(emails)
+
+    try:
+        for email in emails:
+            try:
+                message = build_message(email, connection=connection)
+            except TemplateDoesNotExist as e:
+                _mark_failed_attempt(email, f'Template not found: {e}', conf, permanent=True)
+                failed += 1
+                continue
+            except Exception as e:
+                # Bad template or context: fail this email, not the rest of the batch
+                _mark_failed_attempt(email, f'Could not build message: {e}', conf)
+                failed += 1
+                continue
+
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                _mark_failed_attempt(email, e, conf)
+                failed += 1
+                continue
+
+            email.status = 'sent'
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            email.save(update_fields=['status', 'sent_at', 'last_error'])
+            sent += 1
+    finally:
+        connection.close()
+
+    logger.info(f'Email batch complete: {sent} sent, {failed} failed')
+    return sent, failed
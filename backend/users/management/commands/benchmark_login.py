@@ -0,0 +1,97 @@
+# File: backend/users/management/commands/benchmark_login.py
+# Compare queries and time per login for the legacy flow and users.login
+
+import time
+import uuid
+
+from django.contrib.auth import authenticate, get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from users.login import LoginFailed, login_user
+from users.throttling import get_login_throttle
+
+User = get_user_model()
+
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+def legacy_login(email, password):
+    """The login flow UserLoginSerializer used before users.login existed"""
+    user = User.objects.get(email=email.lower())
+    if user.is_account_locked or not user.is_active:
+        return None
+
+    user = authenticate(request=None, email=email, password=password)
+    if user:
+        user.reset_failed_login()
+        return user
+
+    failed_user = User.objects.get(email=email.lower())
+    failed_user.increment_failed_login()
+    return None
+
+
+def engine_login(email, password):
+    try:
+        return login_user(email, password)
+    except LoginFailed:
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark queries and latency per login (legacy flow vs login engine)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Logins per scenario (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        password = uuid.uuid4().hex
+        email = f'benchmark-{uuid.uuid4().hex[:12]}@example.invalid'
+        user = User.objects.create_user(
+            username=email, email=email, password=password, is_active=True
+        )
+
+        try:
+            self.stdout.write(
+                f'{"flow":<8} {"outcome":<8} {"queries/login":>14} '
+                f'{"tx control":>11} {"ms/login":>10}'
+            )
+            for name, flow in (('legacy', legacy_login), ('engine', engine_login)):
+                for outcome, attempt in (('success', password), ('failure', 'wrong-password')):
+                    queries, control, elapsed = self._run(user, flow, email, attempt, iterations)
+                    self.stdout.write(
+                        f'{name:<8} {outcome:<8} {queries / iterations:>14.1f} '
+                        f'{control / iterations:>11.1f} {elapsed * 1000 / iterations:>10.1f}'
+                    )
+        finally:
+            user.delete()
+
+        self.stdout.write(self.style.SUCCESS('Login benchmark complete'))
+
+    def _run(self, user, flow, email, password, iterations):
+        queries = 0
+        control = 0
+        elapsed = 0.0
+        for _ in range(iterations):
+            # Keep failures below the lockout threshold
+            User.objects.filter(pk=user.pk).update(
+                failed_login_attempts=0, account_locked_until=None
+            )
+            get_login_throttle().record_success(email)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                flow(email, password)
+                elapsed += time.perf_counter() - started
+            for query in captured:
+                if query['sql'].upper().startswith(TRANSACTION_CONTROL):
+                    control += 1
+                else:
+                    queries += 1
+        return queries, control, elapsed
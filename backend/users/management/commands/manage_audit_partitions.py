@@ -0,0 +1,84 @@
+# File: backend/users/management/commands/manage_audit_partitions.py
+# Maintain monthly AuditLog partitions and archive cold months
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from users.audit import get_audit_settings
+from users.partitions import (
+    add_months, archive_partition, ensure_partition, is_partitioned,
+    list_partitions, month_start
+)
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming AuditLog partitions and archive partitions older than the hot window'
+
+    def add_arguments(self, parser):
+        conf = get_audit_settings()
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=conf['PARTITION_MONTHS_AHEAD'],
+            help=f'Partitions to create ahead of the current month (default: {conf["PARTITION_MONTHS_AHEAD"]})'
+        )
+        parser.add_argument(
+            '--hot-months',
+            type=int,
+            default=conf['HOT_MONTHS'],
+            help=f'Months kept in the database; older ones are archived, 0 disables (default: {conf["HOT_MONTHS"]})'
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=conf['ARCHIVE_DIR'],
+            help='Directory for archived partitions'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be created or archived without changing anything'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        if not is_partitioned():
+            self.stdout.write(
+                self.style.WARNING('users_auditlog is not partitioned (PostgreSQL only), nothing to do.')
+            )
+            return
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be made'))
+
+        current = month_start(timezone.now())
+        existing = list_partitions()
+
+        # Upcoming partitions
+        created = 0
+        for offset in range(options['months_ahead'] + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            if not dry_run:
+                ensure_partition(month)
+            created += 1
+            self.stdout.write(f'{"Would create" if dry_run else "Created"} partition for {month:%Y-%m}')
+
+        # Cold partitions
+        archived = 0
+        if options['hot_months'] > 0:
+            cutoff = add_months(current, -options['hot_months'])
+            for month in sorted(m for m in existing if m < cutoff):
+                if dry_run:
+                    self.stdout.write(f'Would archive partition {existing[month]}')
+                else:
+                    rows = archive_partition(month, options['archive_dir'])
+                    self.stdout.write(f'Archived {existing[month]}: {rows} rows')
+                archived += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Partitions {"to create" if dry_run else "created"}: {created}, '
+                f'{"to archive" if dry_run else "archived"}: {archived}'
+            )
+        )
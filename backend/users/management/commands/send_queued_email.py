@@ -0,0 +1,58 @@
+# File: backend/users/management/commands/send_queued_email.py
+# Drain the outbound email queue
+
+import time
+
+from django.core.management.base import BaseCommand
+from users.mail import get_email_queue_settings, send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbound emails, reusing one SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Emails per batch (default: EMAIL_QUEUE["BATCH_SIZE"])'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll for new emails'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Seconds to sleep when the queue is empty (default: EMAIL_QUEUE["POLL_INTERVAL"])'
+        )
+
+    def handle(self, *args, **options):
+        conf = get_email_queue_settings()
+        batch_size = options['batch_size'] or conf['BATCH_SIZE']
+        interval = options['interval'] or conf['POLL_INTERVAL']
+
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = send_queued_emails(batch_size)
+                total_sent += sent
+                total_failed += failed
+
+                if sent or failed:
+                    self.stdout.write(f'Batch: {sent} sent, {failed} failed')
+                    # Full batch means there is likely more waiting
+                    if sent + failed >= batch_size:
+                        continue
+
+                if not options['loop']:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping email worker...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Emails sent: {total_sent}, Failed attempts: {total_failed}')
+        )
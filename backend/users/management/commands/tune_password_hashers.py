@@ -0,0 +1,136 @@
+# File: backend/users/management/commands/tune_password_hashers.py
+# Benchmark the configured password hashers and tune PBKDF2 to a target latency
+
+import os
+import re
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher, PBKDF2SHA1PasswordHasher, get_hashers
+)
+from django.core.management.base import BaseCommand, CommandError
+from users.hashers import TunedPBKDF2PasswordHasher
+
+ENV_SETTING = 'PASSWORD_HASHER_ITERATIONS'
+
+
+def time_encode(hasher, samples, **kwargs):
+    """Median seconds for one encode on this machine"""
+    timings = []
+    for _ in range(samples):
+        salt = hasher.salt()
+        started = time.perf_counter()
+        hasher.encode('benchmark-password', salt, **kwargs)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def write_env_setting(path, name, value):
+    """Set NAME=value in a .env file, replacing an existing line if present"""
+    lines = []
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as fh:
+            lines = fh.read().splitlines()
+
+    pattern = re.compile(rf'^\s*{re.escape(name)}\s*=')
+    for index, line in enumerate(lines):
+        if pattern.match(line):
+            lines[index] = f'{name}={value}'
+            break
+    else:
+        lines.append(f'{name}={value}')
+
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write('\n'.join(lines) + '\n')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark PASSWORD_HASHERS and recommend PBKDF2 iterations for a target latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target-ms',
+            type=float,
+            default=250,
+            help='Target time for one password hash in milliseconds (default: 250)'
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=5,
+            help='Timed runs per hasher, the median is used (default: 5)'
+        )
+        parser.add_argument(
+            '--min-iterations',
+            type=int,
+            default=PBKDF2PasswordHasher.iterations,
+            help=f'Never recommend fewer PBKDF2 iterations than this (default: {PBKDF2PasswordHasher.iterations})'
+        )
+        parser.add_argument(
+            '--write-env',
+            nargs='?',
+            const=os.path.join(settings.BASE_DIR, '.env'),
+            help=f'Write {ENV_SETTING} to this .env file (default: BASE_DIR/.env)'
+        )
+
+    def handle(self, *args, **options):
+        target = options['target_ms'] / 1000
+        samples = options['samples']
+        if target <= 0 or samples < 1:
+            raise CommandError('--target-ms and --samples must be positive')
+
+        self.stdout.write(f'Benchmarking password hashers ({samples} samples each)...')
+        recommended = None
+
+        for hasher in get_hashers():
+            try:
+                elapsed = time_encode(hasher, samples)
+            except ValueError as e:
+                # Library for this hasher isn't installed
+                self.stdout.write(f'  {hasher.algorithm:<22} unavailable ({e})')
+                continue
+
+            line = f'  {hasher.algorithm:<22} {elapsed * 1000:>8.1f} ms'
+            if isinstance(hasher, (PBKDF2PasswordHasher, PBKDF2SHA1PasswordHasher)):
+                # PBKDF2 cost is linear in the iteration count
+                iterations = max(
+                    int(round(hasher.iterations * target / elapsed, -3)),
+                    options['min_iterations']
+                )
+                line += f'  iterations {hasher.iterations} -> {iterations}'
+                if isinstance(hasher, TunedPBKDF2PasswordHasher) and recommended is None:
+                    recommended = iterations
+            self.stdout.write(line)
+
+        if recommended is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    'users.hashers.TunedPBKDF2PasswordHasher is not in PASSWORD_HASHERS, nothing to tune.'
+                )
+            )
+            return
+
+        check = time_encode(TunedPBKDF2PasswordHasher(), samples, iterations=recommended)
+        self.stdout.write(
+            f'{ENV_SETTING}={recommended} measures {check * 1000:.1f} ms '
+            f'(target {options["target_ms"]:.0f} ms)'
+        )
+        if recommended == options['min_iterations'] and check > target:
+            self.stdout.write(
+                self.style.WARNING('Target is below the minimum iteration floor on this hardware.')
+            )
+
+        if options['write_env']:
+            write_env_setting(options['write_env'], ENV_SETTING, recommended)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Wrote {ENV_SETTING}={recommended} to {options["write_env"]}. '
+                    f'Restart to apply; existing hashes are upgraded on next login.'
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'Recommended: {ENV_SETTING}={recommended} (use --write-env to apply)')
+            )
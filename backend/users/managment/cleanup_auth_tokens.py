@@ -180,8 +180,9 @@ class Command(BaseCommand):
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from django.db.models import Count, Q
-from users.models import User, AuditLog, UserSession
+from django.db.models import Count
+from users.models import User, UserSession
+from users.security_metrics import get_event_summary, get_user_summary
 from datetime import timedelta
 
 
@@ -212,11 +213,12 @@ class Command(BaseCommand):
         )
         self.stdout.write('=' * 50)
         
-        # User Statistics
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        verified_users = User.objects.filter(email_verified=True).count()
-        locked_users = User.objects.filter(account_locked_until__gt=timezone.now()).count()
+        # User Statistics (single aggregate query)
+        user_stats = get_user_summary(since=start_date)
+        total_users = user_stats['total_users']
+        active_users = user_stats['active_users']
+        verified_users = user_stats['verified_users']
+        locked_users = user_stats['locked_accounts']
         
         self.stdout.write('\nUSER STATISTICS:')
         self.stdout.write(f'Total Users: {total_users}')
@@ -224,26 +226,13 @@ class Command(BaseCommand):
         self.stdout.write(f'Verified Users: {verified_users} ({verified_users/total_users*100:.1f}%)')
         self.stdout.write(f'Locked Accounts: {locked_users}')
         
-        # Authentication Events
-        login_events = AuditLog.objects.filter(
-            action='login',
-            timestamp__gte=start_date
-        ).count()
-        
-        failed_logins = AuditLog.objects.filter(
-            action='login_failed',
-            timestamp__gte=start_date
-        ).count()
-        
-        password_changes = AuditLog.objects.filter(
-            action='password_change',
-            timestamp__gte=start_date
-        ).count()
-        
-        password_resets = AuditLog.objects.filter(
-            action='password_reset',
-            timestamp__gte=start_date
-        ).count()
+        # Authentication Events (hourly rollup, not a scan of AuditLog)
+        events = get_event_summary(start_date)
+        actions = events.get('action', {})
+        login_events = actions.get('login', 0)
+        failed_logins = actions.get('login_failed', 0)
+        password_changes = actions.get('password_change', 0)
+        password_resets = actions.get('password_reset', 0)
         
         self.stdout.write('\nAUTHENTICATION EVENTS:')
         self.stdout.write(f'Successful Logins: {login_events}')
@@ -256,18 +245,16 @@ class Command(BaseCommand):
             self.stdout.write(f'Login Success Rate: {success_rate:.1f}%')
         
         # Top Failed Login IPs
-        failed_ips = AuditLog.objects.filter(
-            action='login_failed',
-            timestamp__gte=start_date,
-            ip_address__isnull=False
-        ).values('ip_address').annotate(
-            count=Count('ip_address')
-        ).order_by('-count')[:10]
+        failed_ips = sorted(
+            events.get('failed_login_ip', {}).items(),
+            key=lambda item: item[1],
+            reverse=True
+        )[:10]
         
         if failed_ips:
             self.stdout.write('\nTOP FAILED LOGIN IPs:')
-            for ip_data in failed_ips:
-                self.stdout.write(f"{ip_data['ip_address']}: {ip_data['count']} attempts")
+            for ip_address, count in failed_ips:
+                self.stdout.write(f"{ip_address}: {count} attempts")
         
         # Active Sessions
         active_sessions = UserSession.objects.filter(is_active=True).count()
@@ -282,23 +269,26 @@ class Command(BaseCommand):
         for account_type in account_types:
             self.stdout.write(f"{account_type['account_type']}: {account_type['count']}")
         
-        # Recent Registrations
-        new_users = User.objects.filter(created_at__gte=start_date).count()
-        self.stdout.write(f'\nNew Registrations: {new_users}')
+        # Recent Registrations - counted from User, so allauth signups and
+        # accounts older than the rollup are included
+        self.stdout.write(f'\nNew Registrations: {user_stats["new_users"]}')
+        account_type_events = sorted(events.get('account_type', {}).items())
+        if account_type_events:
+            self.stdout.write('  By account type (API registrations, from account_created events):')
+            for account_type, count in account_type_events:
+                self.stdout.write(f'    {account_type}: {count}')
         
         # Users requiring attention
-        unverified_old = User.objects.filter(
-            email_verified=False,
-            created_at__lt=timezone.now() - timedelta(days=7)
-        ).count()
-        
-        multiple_failed = User.objects.filter(
-            failed_login_attempts__gte=3
-        ).count()
+        unverified_old = user_stats['unverified_old']
+        # Failed attempts are counted in the cache and only reach the user
+        # row on lockout, so repeated failures are counted per IP instead
+        repeat_failed_ips = sum(
+            1 for count in events.get('failed_login_ip', {}).values() if count >= 3
+        )
         
         self.stdout.write('\nUSERS REQUIRING ATTENTION:')
         self.stdout.write(f'Unverified >7 days: {unverified_old}')
-        self.stdout.write(f'Multiple failed attempts: {multiple_failed}')
+        self.stdout.write(f'IPs with 3+ failed logins: {repeat_failed_ips}')
         
         self.stdout.write('\n' + '=' * 50)
         self.stdout.write('Report completed successfully!')
@@ -0,0 +1,123 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from datetime import date, datetime, timezone
+
+
+def _add_months(month, count):
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+
+
+def partition_auditlog(apps, schema_editor):
+    """Rebuild users_auditlog as a monthly range-partitioned table (PostgreSQL only)"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    execute = schema_editor.execute
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE relname = 'users_auditlog'")
+        if cursor.fetchone()[0] == "p":
+            return
+        cursor.execute("SELECT MIN(timestamp), MAX(id) FROM users_auditlog")
+        oldest, max_id = cursor.fetchone()
+
+    execute("ALTER TABLE users_auditlog RENAME TO users_auditlog_unpartitioned")
+    # Identity columns are not allowed on partitioned tables before
+    # PostgreSQL 17, so the id comes from a plain owned sequence instead
+    execute(
+        "CREATE TABLE users_auditlog "
+        "(LIKE users_auditlog_unpartitioned INCLUDING DEFAULTS) "
+        'PARTITION BY RANGE ("timestamp")'
+    )
+    execute("CREATE SEQUENCE users_auditlog_part_id_seq OWNED BY users_auditlog.id")
+    execute(
+        "ALTER TABLE users_auditlog ALTER COLUMN id "
+        "SET DEFAULT nextval('users_auditlog_part_id_seq')"
+    )
+    execute(
+        "SELECT setval('users_auditlog_part_id_seq', %s, false)", [(max_id or 0) + 1]
+    )
+
+    today = date.today()
+    month = (
+        date(oldest.year, oldest.month, 1)
+        if oldest
+        else date(today.year, today.month, 1)
+    )
+    last = _add_months(date(today.year, today.month, 1), 3)
+    while month <= last:
+        execute(
+            f'CREATE TABLE "users_auditlog_p{month.year:04d}_{month.month:02d}" '
+            f"PARTITION OF users_auditlog FOR VALUES FROM (%s) TO (%s)",
+            [_bound(month), _bound(_add_months(month, 1))],
+        )
+        month = _add_months(month, 1)
+    execute("CREATE TABLE users_auditlog_default PARTITION OF users_auditlog DEFAULT")
+
+    execute("INSERT INTO users_auditlog SELECT * FROM users_auditlog_unpartitioned")
+    execute("DROP TABLE users_auditlog_unpartitioned")
+
+    # Unique constraints on a partitioned table must include the partition key
+    execute('ALTER TABLE users_auditlog ADD PRIMARY KEY (id, "timestamp")')
+    execute(
+        "ALTER TABLE users_auditlog ADD CONSTRAINT users_auditlog_user_id_fk "
+        "FOREIGN KEY (user_id) REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED"
+    )
+    execute(
+        'CREATE INDEX users_audit_action_ts_idx ON users_auditlog (action, "timestamp")'
+    )
+    execute(
+        'CREATE INDEX users_audit_user_ts_idx ON users_auditlog (user_id, "timestamp")'
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_outboundemail"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="auditlog",
+            name="users_audit_user_id_7372bd_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="auditlog",
+            name="users_audit_action_8b2088_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="auditlog",
+            name="users_audit_timesta_45d1d4_idx",
+        ),
+        migrations.AlterField(
+            model_name="auditlog",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["action", "timestamp"], name="users_audit_action_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["user", "timestamp"], name="users_audit_user_ts_idx"
+            ),
+        ),
+        migrations.RunPython(partition_auditlog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_partition_auditlog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SecurityMetric",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("action", "Events by action"),
+                            ("failed_login_ip", "Failed logins by IP"),
+                            ("account_type", "Registrations by account type"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("key", models.CharField(max_length=100)),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["-bucket"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="securitymetric",
+            constraint=models.UniqueConstraint(
+                fields=("dimension", "key", "bucket"),
+                name="users_securitymetric_unique_bucket",
+            ),
+        ),
+    ]
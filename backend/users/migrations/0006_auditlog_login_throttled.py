@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0005_securitymetric"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="auditlog",
+            name="action",
+            field=models.CharField(
+                choices=[
+                    ("login", "Login"),
+                    ("logout", "Logout"),
+                    ("login_failed", "Login Failed"),
+                    ("login_throttled", "Login Throttled"),
+                    ("password_reset", "Password Reset"),
+                    ("password_change", "Password Change"),
+                    ("email_verified", "Email Verified"),
+                    ("account_locked", "Account Locked"),
+                    ("account_unlocked", "Account Unlocked"),
+                    ("profile_updated", "Profile Updated"),
+                    ("account_created", "Account Created"),
+                ],
+                max_length=50,
+            ),
+        ),
+    ]
@@ -4,8 +4,11 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
 from django.core.validators import RegexValidator
+from django.core.serializers.json import DjangoJSONEncoder
 import uuid
 
+from . import hashing
+
 class User(AbstractUser):
     """
     Enhanced User model for TradeProHub
@@ -134,11 +137,22 @@ class User(AbstractUser):
         return password_age.days > 90
 
     def set_password(self, raw_password):
-        """Override to track password changes"""
-        super().set_password(raw_password)
+        """Override to track password changes; hashes in the worker pool"""
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
         self.password_changed_at = timezone.now()
         self.force_password_change = False
 
+    def check_password(self, raw_password):
+        """Verify in the worker pool, upgrading outdated hashes like Django does"""
+        is_correct, must_update = hashing.check_password(raw_password, self.password)
+        if is_correct and must_update:
+            # Not a password change, so password_changed_at stays put
+            self.password = hashing.make_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return is_correct
+
 
 class EmailVerificationToken(models.Model):
     """Email verification tokens"""
@@ -221,6 +235,7 @@ class AuditLog(models.Model):
         ('login', 'Login'),
         ('logout', 'Logout'),
         ('login_failed', 'Login Failed'),
+        ('login_throttled', 'Login Throttled'),
         ('password_reset', 'Password Reset'),
         ('password_change', 'Password Change'),
         ('email_verified', 'Email Verified'),
@@ -230,20 +245,84 @@ class AuditLog(models.Model):
         ('account_created', 'Account Created'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    # Indexed together with timestamp below; a standalone FK index would be
+    # one more b-tree for every insert to maintain
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, db_index=False)
     action = models.CharField(max_length=50, choices=ACTION_CHOICES)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     details = models.JSONField(default=dict, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the batched writer flushes it
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
+        # On PostgreSQL the table is range-partitioned by month on timestamp
+        # (see users/partitions.py), so time-window scans prune partitions
         indexes = [
-            models.Index(fields=['user']),
-            models.Index(fields=['action']),
-            models.Index(fields=['timestamp']),
+            models.Index(fields=['action', 'timestamp'], name='users_audit_action_ts_idx'),
+            models.Index(fields=['user', 'timestamp'], name='users_audit_user_ts_idx'),
         ]
         ordering = ['-timestamp']
 
     def __str__(self):
-        return f"{self.user} - {self.action} at {self.timestamp}"
\ No newline at end of file
+        return f"{self.user} - {self.action} at {self.timestamp}"
+
+class OutboundEmail(models.Model):
+    """Outbound email queue, drained by the send_queued_email worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to = models.JSONField(default=list)
+    from_email = models.CharField(max_length=254, blank=True)
+    subject = models.CharField(max_length=255)
+    # Either a template rendered by the worker or a pre-built plain body
+    template_name = models.CharField(max_length=255, blank=True)
+    context = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    body = models.TextField(blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+class SecurityMetric(models.Model):
+    """Hourly pre-aggregated audit event counts for reports and the admin dashboard"""
+    DIMENSION_CHOICES = [
+        ('action', 'Events by action'),
+        ('failed_login_ip', 'Failed logins by IP'),
+        ('account_type', 'Registrations by account type'),
+    ]
+
+    bucket = models.DateTimeField()  # Start of the hour (UTC)
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=100)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also serves (dimension, key, bucket >= x) lookups
+            models.UniqueConstraint(
+                fields=['dimension', 'key', 'bucket'],
+                name='users_securitymetric_unique_bucket'
+            ),
+        ]
+        ordering = ['-bucket']
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key} @ {self.bucket:%Y-%m-%d %H:00} = {self.count}"
@@ -0,0 +1,169 @@
+# File: backend/users/partitions.py
+# Monthly range partitions for users_auditlog (PostgreSQL) and the cold
+# archive tier: old partitions are exported to gzipped JSONL and dropped
+
+import gzip
+import json
+import logging
+import os
+from collections import Counter
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = 'users_auditlog'
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+ARCHIVE_COLUMNS = ['id', 'user_id', 'action', 'ip_address', 'user_agent', 'details', 'timestamp']
+
+
+def month_start(value):
+    """First day of the month containing value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """Shift a first-of-month date by count months"""
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARENT_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat()
+
+
+def is_partitioned():
+    """True when users_auditlog is a declaratively partitioned table"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [PARENT_TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions():
+    """Return {month: table_name} for the monthly partitions that exist"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [PARENT_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    prefix = f'{PARENT_TABLE}_p'
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        year, month = name[len(prefix):].split('_')
+        partitions[date(int(year), int(month), 1)] = name
+    return partitions
+
+
+def ensure_partition(month):
+    """
+    Create the partition for a month if it is missing.
+    Rows that already landed in the default partition for that range are
+    moved into the new partition before it is attached.
+    """
+    name = partition_name(month)
+    start, end = _bound(month), _bound(add_months(month, 1))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0]:
+            return False
+
+        cursor.execute(
+            f'CREATE TABLE "{name}" (LIKE "{PARENT_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f'WITH moved AS ('
+            f'  DELETE FROM "{DEFAULT_PARTITION}" WHERE "timestamp" >= %s AND "timestamp" < %s'
+            f'  RETURNING *'
+            f') INSERT INTO "{name}" SELECT * FROM moved',
+            [start, end]
+        )
+        cursor.execute(
+            f'ALTER TABLE "{PARENT_TABLE}" ATTACH PARTITION "{name}" '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [start, end]
+        )
+
+    logger.info(f'Created audit log partition {name}')
+    return True
+
+
+def archive_partition(month, archive_dir, batch_size=5000):
+    """
+    Export one partition to <archive_dir>/auditlog-YYYY-MM.jsonl.gz plus a
+    per-day/per-action summary, then detach and drop it.
+    Returns the number of rows archived.
+    """
+    name = partition_name(month)
+    os.makedirs(archive_dir, exist_ok=True)
+    stem = os.path.join(archive_dir, f'auditlog-{month.year:04d}-{month.month:02d}')
+    data_path = f'{stem}.jsonl.gz'
+    summary_path = f'{stem}.summary.json'
+
+    rows = 0
+    by_action = Counter()
+    by_day = Counter()
+
+    with transaction.atomic():
+        # Block writers for the month while it is exported so nothing
+        # lands after the snapshot and gets dropped with the table
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE "{name}" IN SHARE MODE')
+
+        tmp_path = f'{data_path}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as fh:
+            with connection.chunked_cursor() as cursor:
+                cursor.execute(
+                    f'SELECT {", ".join(ARCHIVE_COLUMNS)} FROM "{name}" ORDER BY id'
+                )
+                while True:
+                    chunk = cursor.fetchmany(batch_size)
+                    if not chunk:
+                        break
+                    for values in chunk:
+                        record = dict(zip(ARCHIVE_COLUMNS, values))
+                        if isinstance(record['details'], str):
+                            record['details'] = json.loads(record['details'])
+                        record['timestamp'] = record['timestamp'].isoformat()
+                        fh.write(json.dumps(record, default=str) + '\n')
+                        by_action[record['action']] += 1
+                        by_day[record['timestamp'][:10]] += 1
+                        rows += 1
+        with open(tmp_path, 'rb') as raw:
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, data_path)
+
+        with open(summary_path, 'w', encoding='utf-8') as fh:
+            json.dump({
+                'partition': name,
+                'month': month.isoformat(),
+                'rows': rows,
+                'by_action': dict(by_action),
+                'by_day': dict(sorted(by_day.items())),
+                'archived_at': datetime.now(dt_timezone.utc).isoformat(),
+            }, fh, indent=2)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{PARENT_TABLE}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+
+    logger.info(f'Archived {rows} audit rows from {name} to {data_path}')
+    return rows
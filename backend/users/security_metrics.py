@@ -0,0 +1,139 @@
+# File: backend/users/security_metrics.py
+# Hourly rollup of audit events - maintained incrementally as the audit
+# writer flushes, read by security_report and the admin dashboard
+
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import AuditLog, SecurityMetric
+
+User = get_user_model()
+
+UPSERT_SQL = (
+    'INSERT INTO {table} (bucket, dimension, "key", count) VALUES {values} '
+    'ON CONFLICT (dimension, "key", bucket) '
+    'DO UPDATE SET count = {table}.count + EXCLUDED.count'
+)
+
+
+def hour_bucket(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_events(events):
+    """Count plain-dict audit events into {(dimension, key, bucket): count}"""
+    counts = Counter()
+    for event in events:
+        bucket = hour_bucket(event['timestamp'])
+        action = event['action']
+        counts[('action', action, bucket)] += 1
+
+        if action == 'login_failed' and event.get('ip_address'):
+            counts[('failed_login_ip', event['ip_address'], bucket)] += 1
+
+        if action == 'account_created':
+            account_type = (event.get('details') or {}).get('account_type')
+            if account_type:
+                counts[('account_type', account_type, bucket)] += 1
+    return counts
+
+
+def apply_counts(counts):
+    """
+    Add counts onto the rollup table with one upsert statement.
+    Rows go in unique-index order so concurrent flushes lock them in the
+    same order instead of deadlocking on each other.
+    """
+    if not counts:
+        return
+
+    # Keys that collide once truncated must be merged, one statement cannot
+    # update the same row twice
+    merged = Counter()
+    for (dimension, key, bucket), count in counts.items():
+        merged[(dimension, key[:100], bucket)] += count
+
+    table = connection.ops.quote_name(SecurityMetric._meta.db_table)
+    values = []
+    params = []
+    for (dimension, key, bucket), count in sorted(merged.items()):
+        values.append('(%s, %s, %s, %s)')
+        params.extend([
+            connection.ops.adapt_datetimefield_value(bucket),
+            dimension,
+            key,
+            count,
+        ])
+
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_SQL.format(table=table, values=', '.join(values)), params)
+
+
+def record_events(events):
+    """Roll a batch of audit events into the hourly metrics"""
+    apply_counts(rollup_events(events))
+
+
+def rebuild_metrics(since):
+    """Recompute the rollup from AuditLog for every hour from `since` on"""
+    since = hour_bucket(since)
+    SecurityMetric.objects.filter(bucket__gte=since).delete()
+
+    logs = AuditLog.objects.filter(timestamp__gte=since).annotate(hour=TruncHour('timestamp'))
+    counts = Counter()
+
+    for row in logs.values('hour', 'action').annotate(n=Count('id')).order_by():
+        counts[('action', row['action'], row['hour'])] += row['n']
+
+    failed = logs.filter(action='login_failed', ip_address__isnull=False)
+    for row in failed.values('hour', 'ip_address').annotate(n=Count('id')).order_by():
+        counts[('failed_login_ip', row['ip_address'], row['hour'])] += row['n']
+
+    created = logs.filter(action='account_created')
+    for row in created.values('hour', 'details__account_type').annotate(n=Count('id')).order_by():
+        if row['details__account_type']:
+            counts[('account_type', row['details__account_type'], row['hour'])] += row['n']
+
+    apply_counts(counts)
+    return len(counts)
+
+
+def get_event_summary(since):
+    """
+    Totals per dimension and key since the start of the hour containing `since`.
+    Returns {dimension: {key: total}} from a single query over the rollup.
+    """
+    summary = defaultdict(dict)
+    rows = (
+        SecurityMetric.objects.filter(bucket__gte=hour_bucket(since))
+        .values('dimension', 'key')
+        .annotate(total=Sum('count'))
+        .order_by()
+    )
+    for row in rows:
+        summary[row['dimension']][row['key']] = row['total']
+    return summary
+
+
+def get_user_summary(since=None):
+    """
+    User account statistics in a single aggregate query; new_users counts
+    accounts created since `since`, however they signed up
+    """
+    now = timezone.now()
+    since = since or now
+    return User.objects.aggregate(
+        new_users=Count('id', filter=Q(created_at__gte=since)),
+        total_users=Count('id'),
+        active_users=Count('id', filter=Q(is_active=True)),
+        verified_users=Count('id', filter=Q(email_verified=True)),
+        locked_accounts=Count('id', filter=Q(account_locked_until__gt=now)),
+        unverified_old=Count(
+            'id', filter=Q(email_verified=False, created_at__lt=now - timezone.timedelta(days=7))
+        ),
+    )
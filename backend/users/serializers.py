@@ -1,11 +1,13 @@
 # File: backend/users/serializers.py
 # Enhanced serializers for comprehensive authentication
 from rest_framework import serializers
-from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from .login import LoginFailed, login_user
 from .models import EmailVerificationToken, PasswordResetToken, AuditLog
+from .utils import get_client_ip
 import re
 
 User = get_user_model()
@@ -170,44 +172,12 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if email and password:
-            # Find user by email
             try:
-                user = User.objects.get(email=email.lower())
-            except User.DoesNotExist:
-                raise serializers.ValidationError({
-                    'email': 'No account found with this email address.'
-                })
-
-            # Check if account is locked
-            if user.is_account_locked:
-                raise serializers.ValidationError({
-                    'non_field_errors': f'Account is locked until {user.account_locked_until}. Please try again later.'
-                })
-
-            # Check if account is active
-            if not user.is_active:
-                raise serializers.ValidationError({
-                    'non_field_errors': 'This account has been deactivated.'
-                })
-
-            # Authenticate user
-            user = authenticate(request=self.context.get('request'), email=email, password=password)
-            
-            if user:
-                # Reset failed login attempts on successful authentication
-                user.reset_failed_login()
-                attrs['user'] = user
-            else:
-                # Increment failed login attempts
-                try:
-                    failed_user = User.objects.get(email=email.lower())
-                    failed_user.increment_failed_login()
-                except User.DoesNotExist:
-                    pass
-                
-                raise serializers.ValidationError({
-                    'password': 'Invalid password.'
-                })
+                request = self.context.get('request')
+                ip_address = get_client_ip(request) if request is not None else None
+                attrs['user'] = login_user(email, password, ip_address=ip_address)
+            except LoginFailed as e:
+                raise serializers.ValidationError({e.field: e.message})
         else:
             raise serializers.ValidationError({
                 'non_field_errors': 'Must include email and password.'
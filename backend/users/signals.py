@@ -0,0 +1,35 @@
+# File: backend/users/signals.py
+# Model signal handlers for the users app
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth_status import SNAPSHOT_FIELDS, invalidate_auth_status
+from .authentication import disabled_users
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_auth_status(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached auth status when a field it depends on is saved"""
+    if update_fields is None or set(update_fields) & set(SNAPSHOT_FIELDS):
+        invalidate_auth_status(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def track_disabled_users(sender, instance, update_fields=None, **kwargs):
+    """Keep the stateless JWT revocation cache in step with is_active"""
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+    if instance.is_active:
+        disabled_users.clear(instance.pk)
+    else:
+        disabled_users.mark_disabled(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def drop_cached_auth_status(sender, instance, **kwargs):
+    invalidate_auth_status(instance.pk)
+    disabled_users.mark_disabled(instance.pk)
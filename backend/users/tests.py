@@ -1,3 +1,597 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.cache import cache
+from django.core.checks import run_checks
+from django.core.management import call_command
+from django.db import connection
+from django.template import TemplateSyntaxError
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import hashing, throttling
+from . import mail as mail_queue
+from .audit import DEAD_LETTER_DIR, AuditWriter, _encode_event
+from .authentication import ClaimsRefreshToken, StatelessJWTAuthentication, TokenClaimsUser
+from .checks import check_revocation_cache
+from .hashers import TunedPBKDF2PasswordHasher
+from .login import LoginFailed, login_user
+from .management.commands import tune_password_hashers
+from .models import AuditLog, OutboundEmail, SecurityMetric
+from .partitions import (
+    DEFAULT_PARTITION, add_months, archive_partition, ensure_partition, is_partitioned,
+    list_partitions, month_start, partition_name
+)
+from .security_metrics import apply_counts, get_event_summary, get_user_summary, record_events
+from .throttling import SlidingWindowCounter, get_login_throttle
+
+User = get_user_model()
+
+
+def make_user(email='pro@example.com', password='Str0ng!pass', **extra):
+    extra.setdefault('username', email.split('@')[0])
+    return User.objects.create_user(email=email, password=password, **extra)
+
+
+class InlineHashingMixin:
+    """Hash on the test thread instead of spawning the process pool"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        previous = hashing._service
+        hashing._service = hashing.HashingService(
+            enabled=False, workers=1, max_pending=1, acquire_timeout=None, start_method='spawn',
+        )
+        self.addCleanup(setattr, hashing, '_service', previous)
+
+
+class AuditSpillReplayTests(TestCase):
+    def setUp(self):
+        self.spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spill_dir)
+        self.writer = AuditWriter(
+            batch_size=2, flush_interval=0.1, queue_size=10,
+            slow_flush_seconds=2.0, shutdown_timeout=1.0, spill_dir=self.spill_dir,
+        )
+        self.user = make_user()
+
+    def _event(self, user_id=None, action='login'):
+        return {
+            'user_id': user_id, 'action': action, 'ip_address': '10.0.0.1',
+            'user_agent': 'tests', 'details': {}, 'timestamp': timezone.now(),
+        }
+
+    def _dead_letters(self):
+        dead_dir = os.path.join(self.spill_dir, DEAD_LETTER_DIR)
+        if not os.path.isdir(dead_dir):
+            return []
+        lines = []
+        for name in os.listdir(dead_dir):
+            with open(os.path.join(dead_dir, name)) as fh:
+                lines.extend(json.loads(line) for line in fh)
+        return lines
+
+    def test_spill_files_are_complete_before_they_are_claimable(self):
+        self.writer.spill([self._event(self.user.pk)])
+        names = os.listdir(self.spill_dir)
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names[0].endswith('.jsonl'))
+
+    def test_replay_writes_events_and_removes_the_file(self):
+        self.writer.spill([self._event(self.user.pk) for _ in range(3)])
+        self.assertEqual(self.writer.replay_spilled(), 3)
+        self.assertEqual(AuditLog.objects.count(), 3)
+        self.assertEqual(os.listdir(self.spill_dir), [])
+
+    def test_failing_events_are_dead_lettered_and_replay_is_not_repeated(self):
+        deleted = make_user(email='gone@example.com')
+        deleted_id = deleted.pk
+        deleted.delete()
+        self.writer.spill([self._event(self.user.pk), self._event(deleted_id), self._event(None)])
+        with open(os.path.join(self.spill_dir, 'audit-1-manual.jsonl'), 'w') as fh:
+            fh.write('{not json\n')
+
+        self.assertEqual(self.writer.replay_spilled(), 2)
+        # Nothing is left to replay, so a second pass writes no duplicates
+        self.assertEqual(self.writer.replay_spilled(), 0)
+        self.assertEqual(AuditLog.objects.count(), 2)
+
+        reasons = sorted(entry['error'] for entry in self._dead_letters())
+        self.assertEqual(len(reasons), 2)
+        self.assertTrue(reasons[0].startswith('undecodable'))
+        self.assertEqual(reasons[1], 'user no longer exists')
+
+    def test_partial_files_are_not_claimed(self):
+        partial = os.path.join(self.spill_dir, 'audit-1-abc.part')
+        with open(partial, 'w') as fh:
+            fh.write(_encode_event(self._event(self.user.pk)) + '\n')
+        self.assertEqual(self.writer.replay_spilled(), 0)
+        self.assertTrue(os.path.exists(partial))
+
+
+class EmailQueueTests(TestCase):
+    def _queue(self, subject='Hello', **extra):
+        return mail_queue.queue_email(subject, ['pro@example.com'], body='Plain body', **extra)
+
+    def test_claim_leases_due_emails_once(self):
+        email = self._queue()
+        claimed = mail_queue.claim_batch(10, lease_seconds=300)
+        self.assertEqual([row.pk for row in claimed], [email.pk])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('sending', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        # Leased, so another worker gets nothing until the lease runs out
+        self.assertEqual(mail_queue.claim_batch(10, lease_seconds=300), [])
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(len(mail_queue.claim_batch(10, lease_seconds=300)), 1)
+
+    def test_batch_is_sent(self):
+        email = self._queue()
+        self.assertEqual(mail_queue.send_queued_emails(), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'sent')
+        self.assertEqual(mail.outbox[0].body, 'Plain body')
+
+    @override_settings(EMAIL_QUEUE={'RETRY_BACKOFF': 60, 'MAX_ATTEMPTS': 2})
+    def test_delivery_errors_retry_with_backoff_then_give_up(self):
+        email = self._queue()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=OSError('connection reset')):
+            self.assertEqual(mail_queue.send_queued_emails(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.status, 'pending')
+            self.assertAlmostEqual(
+                (email.next_attempt_at - timezone.now()).total_seconds(), 60, delta=5
+            )
+
+            OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(mail_queue.send_queued_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 2))
+        self.assertEqual(email.last_error, 'connection reset')
+
+    def test_missing_template_fails_permanently(self):
+        email = self._queue(template_name='emails/no_such_template.html')
+        self.assertEqual(mail_queue.send_queued_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 1))
+
+    def test_build_error_fails_only_that_email(self):
+        broken = self._queue('Broken')
+        fine = self._queue('Fine')
+        build_message = mail_queue.build_message
+
+        def build_or_fail(email, connection=None):
+            if email.pk == broken.pk:
+                raise TemplateSyntaxError('Unclosed tag')
+            return build_message(email, connection=connection)
+
+        with mock.patch.object(mail_queue, 'build_message', build_or_fail):
+            self.assertEqual(mail_queue.send_queued_emails(), (1, 1))
+        broken.refresh_from_db()
+        fine.refresh_from_db()
+        self.assertEqual(broken.status, 'pending')
+        self.assertIn('Unclosed tag', broken.last_error)
+        self.assertEqual(fine.status, 'sent')
+
+
+class AuditPartitionTests(TestCase):
+    def test_month_helpers_cross_year_boundaries(self):
+        self.assertEqual(month_start(datetime(2026, 3, 31, 23, 59)), date(2026, 3, 1))
+        self.assertEqual(add_months(date(2026, 11, 1), 3), date(2027, 2, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -25), date(2023, 12, 1))
+        self.assertEqual(partition_name(date(2027, 2, 1)), 'users_auditlog_p2027_02')
+
+    @skipIf(connection.vendor == 'postgresql', 'auditlog is partitioned on PostgreSQL')
+    def test_command_is_a_no_op_without_partitioning(self):
+        self.assertFalse(is_partitioned())
+        out = StringIO()
+        call_command('manage_audit_partitions', stdout=out)
+        self.assertIn('not partitioned', out.getvalue())
+
+    @skipUnless(connection.vendor == 'postgresql', 'partitioning is PostgreSQL only')
+    def test_new_partition_takes_rows_from_default_and_archives(self):
+        month = date(2099, 1, 1)
+        AuditLog.objects.create(
+            action='login', details={'n': 1},
+            timestamp=datetime(2099, 1, 15, tzinfo=dt_timezone.utc),
+        )
+        self.assertTrue(is_partitioned())
+        self.assertNotIn(month, list_partitions())
+
+        self.assertTrue(ensure_partition(month))
+        self.assertFalse(ensure_partition(month))
+        self.assertEqual(list_partitions()[month], partition_name(month))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM "{partition_name(month)}"')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute(f'SELECT COUNT(*) FROM "{DEFAULT_PARTITION}"')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir)
+        self.assertEqual(archive_partition(month, archive_dir), 1)
+        self.assertNotIn(month, list_partitions())
+        self.assertEqual(AuditLog.objects.count(), 0)
+
+        with gzip.open(os.path.join(archive_dir, 'auditlog-2099-01.jsonl.gz'), 'rt') as fh:
+            records = [json.loads(line) for line in fh]
+        self.assertEqual([r['details'] for r in records], [{'n': 1}])
+        with open(os.path.join(archive_dir, 'auditlog-2099-01.summary.json')) as fh:
+            summary = json.load(fh)
+        self.assertEqual(summary['by_action'], {'login': 1})
+        self.assertEqual(summary['by_day'], {'2099-01-15': 1})
+
+
+class UserSummaryTests(TestCase):
+    def test_new_users_counts_accounts_without_account_created_events(self):
+        since = timezone.now() - timezone.timedelta(days=1)
+        make_user()
+        make_user(email='second@example.com')
+        self.assertFalse(AuditLog.objects.filter(action='account_created').exists())
+        self.assertEqual(get_user_summary(since=since)['new_users'], 2)
+
+
+class SecurityMetricRollupTests(TestCase):
+    def _failed(self, ip_address, timestamp):
+        return {'action': 'login_failed', 'ip_address': ip_address, 'timestamp': timestamp}
+
+    def test_flushes_add_onto_existing_buckets(self):
+        now = timezone.now()
+        record_events([self._failed('10.0.0.1', now), self._failed('10.0.0.2', now)])
+        record_events([self._failed('10.0.0.1', now)])
+
+        summary = get_event_summary(now)
+        self.assertEqual(summary['action'], {'login_failed': 3})
+        self.assertEqual(summary['failed_login_ip'], {'10.0.0.1': 2, '10.0.0.2': 1})
+
+    def test_rows_are_written_in_index_order_and_truncated_keys_merge(self):
+        now = timezone.now()
+        bucket = now.replace(minute=0, second=0, microsecond=0)
+        long_key = 'x' * 100
+        counts = Counter({
+            ('failed_login_ip', 'b', bucket): 1,
+            ('action', 'login', bucket): 1,
+            ('failed_login_ip', 'a', bucket): 1,
+            ('account_type', long_key + 'one', bucket): 1,
+            ('account_type', long_key + 'two', bucket): 1,
+        })
+        with CaptureQueriesContext(connection) as queries:
+            apply_counts(counts)
+        self.assertEqual(len(queries), 1)
+
+        rows = list(SecurityMetric.objects.order_by('pk').values_list('dimension', 'key', 'count'))
+        self.assertEqual(rows, [
+            ('account_type', long_key, 2),
+            ('action', 'login', 1),
+            ('failed_login_ip', 'a', 1),
+            ('failed_login_ip', 'b', 1),
+        ])
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.token = ClaimsRefreshToken.for_user(self.user).access_token
+
+    def test_active_user_is_built_from_claims(self):
+        user = StatelessJWTAuthentication().get_user(self.token)
+        self.assertIsInstance(user, TokenClaimsUser)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_deactivation_is_seen_after_the_cache_is_emptied(self):
+        # As after a restart, or in a worker that never saw the signal
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.clear()
+        with self.assertRaises(AuthenticationFailed):
+            StatelessJWTAuthentication().get_user(self.token)
+
+    def test_deleted_user_is_rejected(self):
+        User.objects.filter(pk=self.user.pk).delete()
+        cache.clear()
+        with self.assertRaises(AuthenticationFailed):
+            StatelessJWTAuthentication().get_user(self.token)
+
+    def test_active_state_is_cached(self):
+        StatelessJWTAuthentication().get_user(self.token)
+        with self.assertNumQueries(0):
+            StatelessJWTAuthentication().get_user(self.token)
+
+
+class AuthStatusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        token = ClaimsRefreshToken.for_user(self.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def _status(self, etag=None):
+        headers = dict(self.auth)
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get(reverse('auth_status'), **headers)
+
+    def test_unchanged_status_revalidates_from_the_cache(self):
+        first = self._status()
+        self.assertEqual(first.status_code, 200)
+        self.assertFalse(first.json()['user']['email_verified'])
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self._status(first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(len(queries), 0)
+
+    def test_admin_bulk_action_invalidates_the_snapshot(self):
+        etag = self._status()['ETag']
+        admin_user = make_user(email='admin@example.com', is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+        self.client.post(reverse('admin:users_user_changelist'), {
+            'action': 'verify_email', '_selected_action': [self.user.pk],
+        })
+        self.client.logout()
+
+        response = self._status(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['user']['email_verified'])
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_saving_a_snapshot_field_invalidates_the_snapshot(self):
+        etag = self._status()['ETag']
+        self.user.first_name = 'Pat'
+        self.user.save(update_fields=['first_name'])
+
+        response = self._status(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['full_name'], 'Pat')
+
+
+class RevocationCacheCheckTests(TestCase):
+    LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+    def _users_checks(self, **kwargs):
+        return [error.id for error in run_checks(**kwargs) if error.id.startswith('users.')]
+
+    @override_settings(CACHES=LOCAL)
+    def test_local_memory_cache_fails_only_the_deploy_check(self):
+        self.assertEqual([error.id for error in check_revocation_cache(None)], ['users.E001'])
+        self.assertEqual(self._users_checks(include_deployment_checks=False), [])
+        self.assertEqual(self._users_checks(include_deployment_checks=True), ['users.E001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_revocation_cache(None), [])
+
+
+class LoginEngineTests(InlineHashingMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+
+    def _statements(self, queries):
+        return [query['sql'].split(' ', 1)[0] for query in queries]
+
+    def test_success_records_the_login_in_one_update(self):
+        User.objects.filter(pk=self.user.pk).update(failed_login_attempts=2)
+        with CaptureQueriesContext(connection) as queries:
+            user = login_user('PRO@example.com', 'Str0ng!pass', ip_address='10.0.0.1')
+        self.assertEqual(self._statements(queries), ['SELECT', 'UPDATE'])
+        self.assertEqual(user.pk, self.user.pk)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 0)
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_failures_only_write_when_the_lockout_trips(self):
+        for _ in range(4):
+            with CaptureQueriesContext(connection) as queries, self.assertRaises(LoginFailed) as raised:
+                login_user('pro@example.com', 'wrong', ip_address='10.0.0.1')
+            self.assertEqual(raised.exception.field, 'password')
+            self.assertEqual(self._statements(queries), ['SELECT'])
+        with self.assertRaises(LoginFailed):
+            login_user('pro@example.com', 'wrong', ip_address='10.0.0.1')
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 5)
+        self.assertTrue(self.user.is_account_locked)
+        with self.assertRaises(LoginFailed) as raised:
+            login_user('pro@example.com', 'Str0ng!pass')
+        self.assertEqual(raised.exception.field, 'non_field_errors')
+
+    def test_unknown_email_and_inactive_accounts_are_rejected(self):
+        with self.assertRaises(LoginFailed) as raised:
+            login_user('nobody@example.com', 'Str0ng!pass')
+        self.assertEqual(raised.exception.field, 'email')
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(LoginFailed) as raised:
+            login_user('pro@example.com', 'Str0ng!pass')
+        self.assertEqual(raised.exception.field, 'non_field_errors')
+
+    def test_legacy_hash_is_upgraded_on_login(self):
+        User.objects.filter(pk=self.user.pk).update(
+            password=make_password('Str0ng!pass', hasher='pbkdf2_sha1')
+        )
+        login_user('pro@example.com', 'Str0ng!pass')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.assertTrue(self.user.check_password('Str0ng!pass'))
+
+
+@override_settings(PASSWORD_HASHER_ITERATIONS=2000)
+class PasswordHasherTuningTests(InlineHashingMixin, TestCase):
+    def test_iterations_follow_the_setting(self):
+        self.assertEqual(TunedPBKDF2PasswordHasher().iterations, 2000)
+        self.assertTrue(make_password('Str0ng!pass').startswith('pbkdf2_sha256$2000$'))
+
+    def test_hash_at_the_old_cost_is_re_encoded_on_login(self):
+        with override_settings(PASSWORD_HASHER_ITERATIONS=1000):
+            user = make_user()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        login_user('pro@example.com', 'Str0ng!pass')
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_command_scales_iterations_to_the_target_and_writes_env(self):
+        env_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, env_dir)
+        env_path = os.path.join(env_dir, '.env')
+        with open(env_path, 'w') as fh:
+            fh.write('DEBUG=True\nPASSWORD_HASHER_ITERATIONS=1000\n')
+
+        # Pretend one hash at 2000 iterations takes 50ms: 250ms needs 10000
+        timing = mock.patch.object(tune_password_hashers, 'time_encode', return_value=0.05)
+        out = StringIO()
+        with timing:
+            call_command(
+                'tune_password_hashers', '--target-ms=250', '--min-iterations=1000',
+                f'--write-env={env_path}', stdout=out,
+            )
+        self.assertIn('PASSWORD_HASHER_ITERATIONS=10000', out.getvalue())
+        with open(env_path) as fh:
+            self.assertEqual(fh.read(), 'DEBUG=True\nPASSWORD_HASHER_ITERATIONS=10000\n')
+
+    def test_command_never_goes_below_the_floor(self):
+        timing = mock.patch.object(tune_password_hashers, 'time_encode', return_value=10.0)
+        out = StringIO()
+        with timing:
+            call_command('tune_password_hashers', '--min-iterations=1500', stdout=out)
+        self.assertIn('Recommended: PASSWORD_HASHER_ITERATIONS=1500', out.getvalue())
+        self.assertIn('below the minimum iteration floor', out.getvalue())
+
+
+class SlidingWindowCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.counter = SlidingWindowCounter(cache, 'test', 100)
+
+    def test_previous_bucket_fades_out_across_the_window(self):
+        for _ in range(4):
+            self.counter.hit('ident', now=1050)
+        self.assertEqual(self.counter.count('ident', now=1050), 4)
+        # A quarter into the next bucket, three quarters of it still count
+        self.assertEqual(self.counter.count('ident', now=1125), 3)
+        self.assertEqual(self.counter.count('ident', now=1250), 0)
+
+    def test_retry_after_is_when_the_count_drops_below_the_limit(self):
+        for _ in range(4):
+            self.counter.hit('ident', now=1050)
+        wait = self.counter.retry_after('ident', 4, now=1050)
+        self.assertEqual(self.counter.count('ident', now=1050 + wait - 2), 4)
+        self.assertLess(self.counter.count('ident', now=1050 + wait), 4)
+
+
+@override_settings(
+    LOGIN_THROTTLE={'MAX_FAILURES_PER_EMAIL': 3, 'MAX_FAILURES_PER_IP': 5},
+    AUDIT_LOG={'ASYNC': False},
+)
+class LoginThrottleTests(InlineHashingMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        throttling._throttle = None
+        self.addCleanup(setattr, throttling, '_throttle', None)
+        self.user = make_user()
+
+    def test_email_limit_locks_the_account_and_clears_the_counter(self):
+        throttle = get_login_throttle()
+        self.assertIsNone(throttle.record_failure('pro@example.com', '10.0.0.1'))
+        self.assertIsNone(throttle.record_failure('PRO@example.com', '10.0.0.1'))
+        self.assertEqual(throttle.record_failure('pro@example.com', '10.0.0.1'), 3)
+        # The database lock takes over from the counter
+        self.assertEqual(throttle.check('pro@example.com', None), 0)
+
+    def test_ip_limit_rejects_any_email(self):
+        throttle = get_login_throttle()
+        for n in range(5):
+            throttle.record_failure(f'user{n}@example.com', '10.0.0.9')
+        self.assertGreater(throttle.check('someone@example.com', '10.0.0.9'), 0)
+        self.assertEqual(throttle.check('someone@example.com', '10.0.0.10'), 0)
+
+    def test_throttled_login_is_rejected_before_hashing_and_audited(self):
+        throttle = get_login_throttle()
+        for _ in range(5):
+            throttle.record_failure('', '127.0.0.1')
+
+        hashed = hashing.get_hashing_service().metrics()['hashers']
+        response = self.client.post(
+            reverse('login'), {'email': 'pro@example.com', 'password': 'Str0ng!pass'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(hashing.get_hashing_service().metrics()['hashers'], hashed)
+
+        entry = AuditLog.objects.get(action='login_throttled')
+        self.assertEqual(entry.get_action_display(), 'Login Throttled')
+
+    def test_password_changed_during_verification_is_not_overwritten(self):
+        def check_then_change(password, encoded):
+            User.objects.filter(pk=self.user.pk).update(password=make_password('N3w!pass'))
+            return True, True
+
+        with mock.patch.object(hashing, 'check_password', check_then_change), \
+                self.assertRaises(LoginFailed):
+            login_user('pro@example.com', 'Str0ng!pass')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('N3w!pass'))
+        self.assertIsNone(self.user.last_login)
+
+
+@override_settings(AUDIT_LOG={'ASYNC': False}, PASSWORD_HASHING={'RETRY_AFTER': 3})
+class HashingBusyTests(InlineHashingMixin, TestCase):
+    def test_saturated_pool_answers_503_without_touching_the_account(self):
+        user = make_user()
+        busy = mock.patch.object(hashing, 'check_password', side_effect=hashing.HashingBusy('full'))
+        with busy, CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('login'), {'email': 'pro@example.com', 'password': 'Str0ng!pass'},
+                content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '3')
+        self.assertFalse(any('FOR UPDATE' in query['sql'] for query in queries))
+        self.assertFalse(AuditLog.objects.filter(action='login_failed').exists())
+        user.refresh_from_db()
+        self.assertEqual(user.failed_login_attempts, 0)
+        self.assertIsNone(user.last_login)
+
+    def test_request_waits_acquire_timeout_for_a_slot_then_gets_503(self):
+        make_user()
+        service = hashing.HashingService(
+            enabled=True, workers=1, max_pending=1, acquire_timeout=0.05, start_method='spawn',
+        )
+        hashing._service = service
+        service._ensure_pool()
+        self.addCleanup(service.shutdown)
+        # Another request holds the only slot
+        self.assertTrue(service._slots.acquire(blocking=False))
+        self.addCleanup(service._slots.release)
+
+        response = self.client.post(
+            reverse('login'), {'email': 'pro@example.com', 'password': 'Str0ng!pass'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '3')
+        self.assertEqual(service.metrics()['submitted'], 0)
+        self.assertFalse(AuditLog.objects.filter(action='login_failed').exists())
+
+    def test_default_slot_wait_is_bounded(self):
+        self.assertIsNotNone(hashing.HashingService.from_settings().acquire_timeout)
@@ -0,0 +1,173 @@
+# File: backend/users/throttling.py
+# Login throttling - failed attempts are counted per email and per client IP
+# in the Django cache; the database is only written when a lockout trips
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils import timezone
+
+User = get_user_model()
+
+LOGIN_THROTTLE_DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'WINDOW': 900,                # Sliding window length in seconds
+    'MAX_FAILURES_PER_EMAIL': 5,  # Failures in the window before the account locks
+    'MAX_FAILURES_PER_IP': 20,    # Failures in the window before the IP is rejected
+    'LOCKOUT_MINUTES': 30,
+}
+
+
+def get_login_throttle_settings():
+    conf = dict(LOGIN_THROTTLE_DEFAULTS)
+    conf.update(getattr(settings, 'LOGIN_THROTTLE', {}))
+    return conf
+
+
+class SlidingWindowCounter:
+    """
+    Approximate sliding-window counter over two fixed cache buckets.
+    The previous bucket is weighted by how much of it still overlaps the
+    window, which keeps every check to one get_many and every hit to one incr.
+    """
+
+    def __init__(self, cache, prefix, window):
+        self.cache = cache
+        self.prefix = prefix
+        self.window = window
+
+    def _keys(self, ident, now):
+        bucket = int(now // self.window)
+        return (
+            f'{self.prefix}:{ident}:{bucket}',
+            f'{self.prefix}:{ident}:{bucket - 1}',
+        )
+
+    def count(self, ident, now=None):
+        now = time.time() if now is None else now
+        current_key, previous_key = self._keys(ident, now)
+        values = self.cache.get_many([current_key, previous_key])
+        overlap = 1 - (now % self.window) / self.window
+        return values.get(current_key, 0) + values.get(previous_key, 0) * overlap
+
+    def hit(self, ident, now=None):
+        """Count one event and return the new windowed total"""
+        now = time.time() if now is None else now
+        current_key, _ = self._keys(ident, now)
+        # Two windows so the bucket survives while it is the previous one
+        if not self.cache.add(current_key, 1, self.window * 2):
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                self.cache.set(current_key, 1, self.window * 2)
+        return self.count(ident, now)
+
+    def reset(self, ident, now=None):
+        now = time.time() if now is None else now
+        self.cache.delete_many(list(self._keys(ident, now)))
+
+    def retry_after(self, ident, limit, now=None):
+        """Seconds until the windowed count drops below limit"""
+        now = time.time() if now is None else now
+        current_key, previous_key = self._keys(ident, now)
+        values = self.cache.get_many([current_key, previous_key])
+        current = values.get(current_key, 0)
+        previous = values.get(previous_key, 0)
+        elapsed = now % self.window
+
+        # While the previous bucket is still fading out
+        if current < limit and previous:
+            needed = (current + previous - limit) / previous * self.window
+            if needed > elapsed:
+                return math.ceil(needed - elapsed) + 1
+            return 1
+
+        # Otherwise the current bucket has to fade out in the next window
+        needed = (current - limit) / current * self.window if current else 0
+        return math.ceil(self.window - elapsed + needed) + 1
+
+
+def _email_ident(email):
+    # Hashed so arbitrary input is always a valid cache key
+    return hashlib.sha256((email or '').strip().lower().encode()).hexdigest()[:32]
+
+
+class LoginThrottle:
+    """Per-email and per-IP failed login limits"""
+
+    def __init__(self, cache, window, max_failures_per_email,
+                 max_failures_per_ip, lockout_minutes):
+        self.max_failures_per_email = max_failures_per_email
+        self.max_failures_per_ip = max_failures_per_ip
+        self.lockout_minutes = lockout_minutes
+        self.by_email = SlidingWindowCounter(cache, 'login_fail:email', window)
+        self.by_ip = SlidingWindowCounter(cache, 'login_fail:ip', window)
+
+    @classmethod
+    def from_settings(cls):
+        conf = get_login_throttle_settings()
+        return cls(
+            cache=caches[conf['CACHE_ALIAS']],
+            window=conf['WINDOW'],
+            max_failures_per_email=conf['MAX_FAILURES_PER_EMAIL'],
+            max_failures_per_ip=conf['MAX_FAILURES_PER_IP'],
+            lockout_minutes=conf['LOCKOUT_MINUTES'],
+        )
+
+    def check(self, email, ip_address):
+        """Return seconds to wait if this attempt must be rejected, else 0"""
+        if ip_address and self.by_ip.count(ip_address) >= self.max_failures_per_ip:
+            return self.by_ip.retry_after(ip_address, self.max_failures_per_ip)
+        ident = _email_ident(email)
+        if email and self.by_email.count(ident) >= self.max_failures_per_email:
+            return self.by_email.retry_after(ident, self.max_failures_per_email)
+        return 0
+
+    def record_failure(self, email, ip_address):
+        """
+        Count a failed attempt.
+        Returns the number of failures when the email limit trips (the caller
+        locks the account), otherwise None.
+        """
+        if ip_address:
+            self.by_ip.hit(ip_address)
+        if not email:
+            return None
+
+        ident = _email_ident(email)
+        failures = self.by_email.hit(ident)
+        if failures < self.max_failures_per_email:
+            return None
+
+        # The DB lock takes over from here
+        self.by_email.reset(ident)
+        return math.ceil(failures)
+
+    def record_success(self, email):
+        if email:
+            self.by_email.reset(_email_ident(email))
+
+    def lock_until(self):
+        return timezone.now() + timezone.timedelta(minutes=self.lockout_minutes)
+
+    def lock_account(self, email, failures):
+        """Write the lockout for an email address; the only DB write on failure"""
+        return User.objects.filter(email=email.strip().lower()).update(
+            account_locked_until=self.lock_until(),
+            failed_login_attempts=failures,
+        )
+
+
+_throttle = None
+
+
+def get_login_throttle():
+    """Return the process-wide login throttle"""
+    global _throttle
+    if _throttle is None:
+        _throttle = LoginThrottle.from_settings()
+    return _throttle
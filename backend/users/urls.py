@@ -7,7 +7,7 @@ from .views import (
     PasswordResetRequestView, PasswordResetConfirmView,
     EmailVerificationView, PasswordChangeView,
     UserProfileView, check_auth_status,
-    resend_verification_email
+    resend_verification_email, hashing_metrics
 )
 
 urlpatterns = [
@@ -34,4 +34,5 @@ urlpatterns = [
     
     # Authentication status
     path('auth/status/', check_auth_status, name='auth_status'),
+    path('auth/hashing-metrics/', hashing_metrics, name='hashing_metrics'),
 ]
\ No newline at end of file
@@ -2,22 +2,29 @@
 # Enhanced authentication views with comprehensive features
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from .models import EmailVerificationToken, PasswordResetToken, AuditLog, UserSession
+from django.utils.http import parse_etags
+from .models import EmailVerificationToken, PasswordResetToken, UserSession
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, PasswordResetRequestSerializer,
     PasswordResetConfirmSerializer, EmailVerificationSerializer, 
     PasswordChangeSerializer, UserProfileSerializer
 )
+from .audit import log_audit_event
+from .auth_status import build_status_payload, compute_etag, get_snapshot
+from .authentication import ClaimsRefreshToken, StatelessJWTAuthentication
+from .hashing import HashingBusy, get_hashing_service
+from .mail import queue_email, user_context
+from .throttling import get_login_throttle
+from .utils import get_client_ip
 import logging
 
 User = get_user_model()
@@ -37,7 +44,13 @@ class EmailBackend(ModelBackend):
         if user.check_password(password):
             return user
         return None
-    
+
+
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair for /token/ carrying the claims used by StatelessJWTAuthentication"""
+    token_class = ClaimsRefreshToken
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def resend_verification_email(request):
@@ -46,28 +59,23 @@ def resend_verification_email(request):
     if user.email_verified:
         return Response({'error': 'Your email is already verified.'}, status=400)
 
-    token = generate_verification_token(user)
-    verify_url = f"http://localhost:5173/verify-email?token={token}"
+    verification_token = EmailVerificationToken.objects.filter(
+        user=user, used=False
+    ).first()
 
-    send_mail(
-        'Verify Your Email',
-        f'Click this link to verify your account: {verify_url}',
-        'noreply@tradeprohub.com',
-        [user.email],
-        fail_silently=False,
-    )
+    if not verification_token or verification_token.is_expired:
+        verification_token = EmailVerificationToken.objects.create(user=user)
 
-    return Response({'success': True, 'message': 'Verification email sent.'})
+    verify_url = f"http://localhost:5173/verify-email?token={verification_token.token}"
 
+    queue_email(
+        subject='Verify Your Email',
+        recipient_list=[user.email],
+        body=f'Click this link to verify your account: {verify_url}',
+        from_email='noreply@tradeprohub.com',
+    )
 
-def get_client_ip(request):
-    """Get client IP address from request"""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    return Response({'success': True, 'message': 'Verification email sent.'})
 
 
 class RegisterView(generics.CreateAPIView):
@@ -91,11 +99,10 @@ class RegisterView(generics.CreateAPIView):
             self.send_verification_email(user, request)
             
             # Log registration
-            AuditLog.objects.create(
+            log_audit_event(
                 user=user,
                 action='account_created',
-                ip_address=get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                request=request,
                 details={
                     'email': user.email,
                     'account_type': user.account_type
@@ -103,7 +110,7 @@ class RegisterView(generics.CreateAPIView):
             )
             
             # Generate tokens for immediate login (optional)
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             
             return Response({
                 'success': True,
@@ -123,6 +130,9 @@ class RegisterView(generics.CreateAPIView):
                 'requires_verification': True
             }, status=status.HTTP_201_CREATED)
             
+        except HashingBusy:
+            raise
+
         except Exception as e:
             logger.error(f'Registration failed for {request.data.get("email", "unknown")}: {str(e)}')
             
@@ -154,29 +164,22 @@ class RegisterView(generics.CreateAPIView):
             # Build verification URL
             verification_url = f"{request.build_absolute_uri('/verify-email')}?token={verification_token.token}"
             
-            # Render email template
-            context = {
-                'user': user,
-                'verification_url': verification_url,
-                'site_name': 'TradeProHub',
-            }
-            
-            html_message = render_to_string('emails/verify_email.html', context)
-            plain_message = strip_tags(html_message)
-            
-            send_mail(
+            # Rendered and delivered by the send_queued_email worker
+            queue_email(
                 subject='Verify your TradeProHub account',
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[user.email],
-                html_message=html_message,
-                fail_silently=False,
+                template_name='emails/verify_email.html',
+                context={
+                    'user': user_context(user),
+                    'verification_url': verification_url,
+                    'site_name': 'TradeProHub',
+                },
             )
             
-            logger.info(f'Verification email sent to {user.email}')
+            logger.info(f'Verification email queued for {user.email}')
             
         except Exception as e:
-            logger.error(f'Failed to send verification email to {user.email}: {str(e)}')
+            logger.error(f'Failed to queue verification email for {user.email}: {str(e)}')
 
 
 class LoginView(generics.GenericAPIView):
@@ -188,6 +191,24 @@ class LoginView(generics.GenericAPIView):
     permission_classes = [AllowAny]
 
     def post(self, request, *args, **kwargs):
+        # Reject throttled attempts before any lookup or password hashing
+        retry_after = get_login_throttle().check(
+            request.data.get('email', ''), get_client_ip(request)
+        )
+        if retry_after:
+            log_audit_event(
+                action='login_throttled',
+                request=request,
+                details={'email': request.data.get('email', ''), 'retry_after': retry_after}
+            )
+            response = Response({
+                'success': False,
+                'error': 'Too many failed login attempts',
+                'message': f'Please try again in {retry_after} seconds.'
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = str(retry_after)
+            return response
+
         serializer = self.get_serializer(data=request.data)
         
         try:
@@ -195,7 +216,7 @@ class LoginView(generics.GenericAPIView):
             user = serializer.validated_data['user']
             
             # Generate tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             
             # Create user session
             session_key = request.session.session_key
@@ -211,11 +232,10 @@ class LoginView(generics.GenericAPIView):
                 )
             
             # Log successful login
-            AuditLog.objects.create(
+            log_audit_event(
                 user=user,
                 action='login',
-                ip_address=get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                request=request,
                 details={'method': 'email'}
             )
             
@@ -238,14 +258,17 @@ class LoginView(generics.GenericAPIView):
                 }
             }, status=status.HTTP_200_OK)
             
+        except HashingBusy:
+            # Not a failed login: users.exceptions answers 503 + Retry-After
+            raise
+
         except Exception as e:
             # Log failed login attempt
             email = request.data.get('email', '')
             if email:
-                AuditLog.objects.create(
+                log_audit_event(
                     action='login_failed',
-                    ip_address=get_client_ip(request),
-                    user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                    request=request,
                     details={'email': email, 'error': str(e)}
                 )
             
@@ -287,11 +310,10 @@ def logout_view(request):
             ).update(is_active=False)
         
         # Log logout
-        AuditLog.objects.create(
+        log_audit_event(
             user=request.user,
             action='logout',
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
+            request=request
         )
         
         return Response({
@@ -334,11 +356,10 @@ class PasswordResetRequestView(generics.GenericAPIView):
             self.send_reset_email(user, reset_token, request)
             
             # Log password reset request
-            AuditLog.objects.create(
+            log_audit_event(
                 user=user,
                 action='password_reset',
-                ip_address=get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                request=request,
                 details={'type': 'request'}
             )
             
@@ -357,29 +378,22 @@ class PasswordResetRequestView(generics.GenericAPIView):
         try:
             reset_url = f"{request.build_absolute_uri('/reset-password')}?token={reset_token.token}"
             
-            context = {
-                'user': user,
-                'reset_url': reset_url,
-                'site_name': 'TradeProHub',
-                'expires_at': reset_token.expires_at,
-            }
-            
-            html_message = render_to_string('emails/password_reset.html', context)
-            plain_message = strip_tags(html_message)
-            
-            send_mail(
+            queue_email(
                 subject='Reset your TradeProHub password',
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[user.email],
-                html_message=html_message,
-                fail_silently=False,
+                template_name='emails/password_reset.html',
+                context={
+                    'user': user_context(user),
+                    'reset_url': reset_url,
+                    'site_name': 'TradeProHub',
+                    'expires_at': reset_token.expires_at,
+                },
             )
             
-            logger.info(f'Password reset email sent to {user.email}')
+            logger.info(f'Password reset email queued for {user.email}')
             
         except Exception as e:
-            logger.error(f'Failed to send password reset email to {user.email}: {str(e)}')
+            logger.error(f'Failed to queue password reset email for {user.email}: {str(e)}')
 
 
 class PasswordResetConfirmView(generics.GenericAPIView):
@@ -407,11 +421,10 @@ class PasswordResetConfirmView(generics.GenericAPIView):
         reset_token.save()
         
         # Log password reset
-        AuditLog.objects.create(
+        log_audit_event(
             user=user,
             action='password_reset',
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            request=request,
             details={'type': 'confirmed'}
         )
         
@@ -445,11 +458,10 @@ class EmailVerificationView(generics.GenericAPIView):
         verification_token.save()
         
         # Log email verification
-        AuditLog.objects.create(
+        log_audit_event(
             user=user,
             action='email_verified',
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
+            request=request
         )
         
         return Response({
@@ -476,11 +488,10 @@ class PasswordChangeView(generics.GenericAPIView):
         user.save()
         
         # Log password change
-        AuditLog.objects.create(
+        log_audit_event(
             user=user,
             action='password_change',
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
+            request=request
         )
         
         return Response({
@@ -505,11 +516,10 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         
         if response.status_code == 200:
             # Log profile update
-            AuditLog.objects.create(
+            log_audit_event(
                 user=request.user,
                 action='profile_updated',
-                ip_address=get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                request=request,
                 details={'fields_updated': list(request.data.keys())}
             )
         
@@ -517,24 +527,43 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 
 
 @api_view(['GET'])
+@authentication_classes([StatelessJWTAuthentication, SessionAuthentication])
 @permission_classes([IsAuthenticated])
 def check_auth_status(request):
     """
     Check authentication status
     GET /api/v1/auth/status/
+    Served from a cached snapshot (no user row load on a hit) with ETag
+    revalidation, so an unchanged status returns an empty 304.
     """
-    user = request.user
+    snapshot = get_snapshot(request.user.id)
+    
+    if snapshot is None or not snapshot['is_active']:
+        return Response({
+            'authenticated': False,
+            'error': 'User not found or inactive'
+        }, status=status.HTTP_401_UNAUTHORIZED)
     
-    return Response({
-        'authenticated': True,
-        'user': {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'full_name': user.get_full_name(),
-            'email_verified': user.email_verified,
-            'account_type': user.account_type,
-            'profile_completed': user.profile_completed,
-            'needs_password_change': user.needs_password_change
-        }
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+    payload = build_status_payload(snapshot)
+    etag = compute_etag(payload)
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'private, no-cache',
+        'Vary': 'Authorization, Cookie',
+    }
+    
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(payload, status=status.HTTP_200_OK, headers=headers)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def hashing_metrics(request):
+    """
+    Password hashing pool counters (staff only)
+    GET /api/v1/auth/hashing-metrics/
+    """
+    return Response(get_hashing_service().metrics(), status=status.HTTP_200_OK)